@@ -0,0 +1,190 @@
+"""
+猜曲数据库基准测试.
+测量各实现在单个群组具有不同用户数量时的更新吞吐量与排行查询延迟.
+默认只使用本地实现与替身, 可离线运行; 指定 --mongo-uri 时额外测试真实 MongoDB,
+测试数据写入独立的 PJSK-Guess-Benchmark 数据库, 每次测试前清空.
+
+用法:
+    python scripts/bench_guess_database.py [--sizes 1000 100000 1000000] [--backends memory sqlite mongo-stub]
+"""
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from typing import Dict, List, Optional
+
+from guess_fixture import BACKENDS, DatabaseFactory, KEY, GUILD, base, mongo_factory
+
+DatabaseBase = base.PJSKGuessDatabaseBase
+
+
+async def populate(
+    database: DatabaseBase,
+    size: int,
+    concurrency: int
+) -> float:
+    """
+    为每个用户写入一次成绩.
+    Args:
+        database (DatabaseBase): 数据库.
+        size (int): 用户数量.
+        concurrency (int): 同时进行的更新数量.
+    Returns:
+        throughput (float): 每秒更新次数.
+    """
+    begin = time.perf_counter()
+    for start in range(0, size, concurrency):
+        await asyncio.gather(
+            *(
+                database.update(GUILD, user_id, KEY)
+                for user_id in range(start, min(start + concurrency, size))
+            )
+        )
+    return size / (time.perf_counter() - begin)
+
+
+async def measure_updates(
+    database: DatabaseBase,
+    size: int,
+    updates: int,
+    concurrency: int
+) -> float:
+    """
+    对随机的已有用户进行更新.
+    Args:
+        database (DatabaseBase): 数据库.
+        size (int): 用户数量.
+        updates (int): 更新次数.
+        concurrency (int): 同时进行的更新数量.
+    Returns:
+        throughput (float): 每秒更新次数.
+    """
+    user_ids = [random.randrange(size) for _ in range(updates)]
+    begin = time.perf_counter()
+    for start in range(0, updates, concurrency):
+        await asyncio.gather(
+            *(
+                database.update(GUILD, user_id, KEY)
+                for user_id in user_ids[start:start + concurrency]
+            )
+        )
+    return updates / (time.perf_counter() - begin)
+
+
+async def measure_latency(coroutines: List) -> float:
+    """
+    依次执行协程并返回延迟中位数.
+    Args:
+        coroutines (List): 协程列表.
+    Returns:
+        latency (float): 延迟中位数, 单位为毫秒.
+    """
+    latencies = []
+    for coroutine in coroutines:
+        begin = time.perf_counter()
+        await coroutine
+        latencies.append((time.perf_counter() - begin) * 1000)
+    return statistics.median(latencies)
+
+
+async def benchmark(
+    name: str,
+    factory: DatabaseFactory,
+    size: int,
+    updates: int,
+    queries: int,
+    concurrency: int
+) -> Dict[str, float]:
+    """
+    对一个实现在指定用户数量下进行基准测试.
+    Args:
+        name (str): 实现名称.
+        factory (DatabaseFactory): 创建空数据库的协程函数.
+        size (int): 用户数量.
+        updates (int): 测量吞吐量时的更新次数.
+        queries (int): 测量延迟时的查询次数.
+        concurrency (int): 同时进行的更新数量.
+    Returns:
+        result (Dict[str, float]): 测量结果.
+    """
+    database = await factory()
+    try:
+        insert = await populate(database, size, concurrency)
+        update = await measure_updates(database, size, updates, concurrency)
+        ranking = await measure_latency(
+            [database.get_ranking_data(GUILD, KEY) for _ in range(queries)]
+        )
+        rank = await measure_latency(
+            [
+                database.get_user_rank(GUILD, random.randrange(size), KEY)
+                for _ in range(queries)
+            ]
+        )
+        data = await database.get_ranking_data(GUILD, KEY)
+        generate = await measure_latency(
+            [database.generate_ranking(GUILD, data, KEY) for _ in range(queries)]
+        )
+    finally:
+        await database.close()
+
+    return {
+        "insert/s": insert,
+        "update/s": update,
+        "ranking ms": ranking,
+        "rank ms": rank,
+        "generate ms": generate,
+    }
+
+
+async def main(
+    sizes: List[int],
+    backends: List[str],
+    updates: int,
+    queries: int,
+    concurrency: int,
+    mongo_uri: Optional[str]
+) -> None:
+    """
+    运行基准测试并打印结果表格.
+    """
+    factories = {name: BACKENDS[name] for name in backends}
+    if mongo_uri:
+        factories["mongo"] = mongo_factory(mongo_uri, "PJSK-Guess-Benchmark")
+
+    columns = ["insert/s", "update/s", "ranking ms", "rank ms", "generate ms"]
+    print(f"{'backend':<12}{'users':>10}" + "".join(f"{c:>14}" for c in columns))
+    for name, factory in factories.items():
+        for size in sizes:
+            result = await benchmark(
+                name, factory, size, updates, queries, concurrency
+            )
+            print(
+                f"{name:<12}{size:>10}"
+                + "".join(f"{result[c]:>14.2f}" for c in columns)
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="猜曲数据库基准测试")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 100000, 1000000]
+    )
+    parser.add_argument(
+        "--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS)
+    )
+    parser.add_argument("--updates", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--mongo-uri", default=None)
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            args.sizes,
+            args.backends,
+            args.updates,
+            args.queries,
+            args.concurrency,
+            args.mongo_uri
+        )
+    )
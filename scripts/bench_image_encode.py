@@ -0,0 +1,127 @@
+"""
+卡片与二维码输出编码基准测试.
+报告各编码配置的编码耗时, 输出大小, 以及按上传带宽估算的总耗时, 用于选择默认配置.
+每种配置都会解码比对, 确认无损配置的可见像素与原图相同.
+
+用法:
+    python scripts/bench_image_encode.py [上传带宽Mbit/s]
+"""
+import sys
+import json
+import time
+import tempfile
+import importlib.util
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageChops
+
+from profile_fixture import ROOT, generate_profile, load_module, prepare_assets
+
+card = load_module("card")
+encoder = load_module("encoder")
+models = load_module("models")
+
+spec = importlib.util.spec_from_file_location(
+    "qrcode_config",
+    ROOT.joinpath("src/plugins/imaybeabu/plugins/qrcode/config.py")
+)
+qrcode_config = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(qrcode_config)
+
+
+def card_image() -> Image.Image:
+    """
+    渲染一张个人信息卡片.
+    """
+    data = generate_profile(cards=5, honors=5)
+    profile = models.PJSKProfileCardContent.from_json(json.dumps(data).encode())
+    with tempfile.TemporaryDirectory() as directory:
+        paths = prepare_assets(Path(directory), data)
+        return card.PJSKProfileRenderer(**paths).render(profile)
+
+
+def qrcode_image() -> Image.Image:
+    """
+    生成一张二维码, 与 QRCodeAbu.excute 编码前的图片相同.
+    """
+    import cv2
+
+    qr = qrcode_config.QRCodeAbu
+    result = qr.replace_qr_with_image(
+        qr.generate_qr_code("https://www.youtube.com/watch?v=dQw4w9WgXcQ" * 4)
+    )
+    result = cv2.cvtColor(qr.rgb_to_rgba(result), cv2.COLOR_BGRA2RGBA)
+    return Image.fromarray(result)
+
+
+def visible(img: Image.Image) -> Image.Image:
+    """
+    将全透明像素的颜色统一, 只比较可见像素.
+    """
+    img = img.convert("RGBA")
+    flat = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    flat.paste(img, mask=img.getchannel("A"))
+    return flat
+
+
+def configurations() -> List[Tuple[str, object]]:
+    """
+    待比较的编码配置.
+    """
+    configs: List[Tuple[str, object]] = [("png original (level 6, rgba)", None)]
+    for level in (1, 3, 6, 9):
+        configs.append((f"png level {level}", encoder.CardEncoder("PNG", level)))
+    configs.append(
+        ("png level 1 + quantize 40dB", encoder.CardEncoder("PNG", 1, min_psnr=40))
+    )
+    for method in (0, 4, 6):
+        configs.append(
+            (f"webp lossless method {method}", encoder.CardEncoder("WEBP", webp_method=method))
+        )
+    return configs
+
+
+def measure(img: Image.Image, config: object, rounds: int) -> Tuple[float, bytes]:
+    """
+    测量平均编码耗时.
+    """
+    def encode() -> bytes:
+        if config is None:
+            buffer = BytesIO()
+            img.save(buffer, format="PNG")
+            return buffer.getvalue()
+        return config.encode(img)
+
+    content = encode()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        encode()
+    return (time.perf_counter() - start) / rounds, content
+
+
+def main(bandwidth: float) -> None:
+    images: Dict[str, Image.Image] = {
+        "profile card": card_image(),
+        "qrcode": qrcode_image()
+    }
+    print(f"upload bandwidth {bandwidth} Mbit/s")
+    for name, img in images.items():
+        print(f"{name}: {img.size[0]}x{img.size[1]} {img.mode}")
+        for label, config in configurations():
+            elapsed, content = measure(img, config, 3)
+            upload = len(content) * 8 / (bandwidth * 1e6)
+            decoded = Image.open(BytesIO(content))
+            identical = ImageChops.difference(visible(img), visible(decoded)).getbbox() is None
+            print(
+                f"  {label:<30}"
+                f"{elapsed * 1000:8.1f} ms"
+                f"{len(content) / 1024:9.1f} KiB"
+                f"{(elapsed + upload) * 1000:9.1f} ms total"
+                f"{'' if identical else '  lossy'}"
+            )
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 20)
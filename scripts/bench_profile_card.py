@@ -0,0 +1,60 @@
+"""
+个人信息卡片渲染基准测试.
+比较每次重新加载模板与字体 (冷渲染) 和复用预加载渲染器 (热渲染) 的耗时.
+
+用法:
+    python scripts/bench_profile_card.py [rounds]
+"""
+import sys
+import json
+import time
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+from profile_fixture import generate_profile, load_module, prepare_assets
+
+card = load_module("card")
+models = load_module("models")
+
+
+def measure(render: Callable[[], object], rounds: int) -> float:
+    """
+    测量平均耗时.
+    Args:
+        render (Callable[[], object]): 渲染函数.
+        rounds (int): 计时轮数.
+    Returns:
+        elapsed (float): 平均耗时秒数.
+    """
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render()
+    return (time.perf_counter() - start) / rounds
+
+
+def main(rounds: int) -> None:
+    data = generate_profile()
+    profile = models.PJSKProfileCardContent.from_json(json.dumps(data).encode())
+    with tempfile.TemporaryDirectory() as directory:
+        paths = prepare_assets(Path(directory), data)
+
+        cold = measure(
+            lambda: card.PJSKProfileRenderer(**paths).render(profile),
+            rounds
+        )
+        renderer = card.PJSKProfileRenderer(**paths)
+        start = time.perf_counter()
+        renderer.warm_up()
+        warm_up = time.perf_counter() - start
+        warm = measure(lambda: renderer.render(profile), rounds)
+        warm_encoded = measure(lambda: renderer.render_bytes(profile), rounds)
+
+    print(f"warm up            {warm_up * 1000:8.2f} ms")
+    print(f"cold render        {cold * 1000:8.2f} ms")
+    print(f"warm render        {warm * 1000:8.2f} ms")
+    print(f"warm render + enc  {warm_encoded * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
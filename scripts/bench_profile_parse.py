@@ -0,0 +1,72 @@
+"""
+个人信息解析基准测试.
+比较完整模型解析与卡片字段投影解析的耗时与内存占用.
+
+用法:
+    python scripts/bench_profile_parse.py [profile.json ...]
+不指定文件时使用按真实响应结构生成的大体量个人信息.
+"""
+import sys
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+from profile_fixture import generate_profile, load_module
+
+models = load_module("models")
+
+
+def measure(parse: Callable[[bytes], Any], content: bytes, rounds: int) -> Tuple[float, int, int]:
+    """
+    测量解析耗时与内存.
+    Args:
+        parse (Callable[[bytes], Any]): 解析函数.
+        content (bytes): 响应内容.
+        rounds (int): 计时轮数.
+    Returns:
+        result (Tuple[float, int, int]): 平均耗时秒数, 内存峰值与保留的字节数.
+    """
+    parse(content)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        parse(content)
+    elapsed = (time.perf_counter() - start) / rounds
+
+    tracemalloc.start()
+    profile = parse(content)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del profile
+    return elapsed, peak, retained
+
+
+def main(paths: List[str]) -> None:
+    if paths:
+        payloads = [(path, Path(path).read_bytes()) for path in paths]
+    else:
+        payloads = [
+            (f"generated cards={cards}", json.dumps(generate_profile(cards)).encode())
+            for cards in (300, 1500, 4000)
+        ]
+
+    parsers = {
+        "full (json + model)": lambda c: models.PJSKProfileContentJP(**json.loads(c)),
+        "full (ujson + model)": models.PJSKProfileJP("http://localhost").parse_full,
+        "lean (ujson + projection)": models.PJSKProfileJP("http://localhost").parse
+    }
+    for name, content in payloads:
+        print(f"{name}: {len(content) / 1024:.1f} KiB")
+        for parser_name, parse in parsers.items():
+            elapsed, peak, retained = measure(parse, content, 50)
+            print(
+                f"  {parser_name:<28}"
+                f"{elapsed * 1000:8.2f} ms"
+                f"{peak / 1024:10.1f} KiB peak"
+                f"{retained / 1024:10.1f} KiB retained"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
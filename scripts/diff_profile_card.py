@@ -0,0 +1,57 @@
+"""
+个人信息卡片字形绘制的逐像素比对.
+以随机个人信息分别用预先栅格化的字形与 draw.text 渲染卡片, 任何像素不同即失败,
+同时报告两种方式的渲染耗时.
+
+用法:
+    python scripts/diff_profile_card.py [profiles]
+"""
+import sys
+import json
+import time
+import random
+import tempfile
+from pathlib import Path
+
+from PIL import ImageChops
+
+from profile_fixture import generate_profile, load_module, prepare_assets, randomize
+
+card = load_module("card")
+models = load_module("models")
+
+
+def main(count: int) -> None:
+    rng = random.Random(0)
+    data = generate_profile(cards=5, honors=5)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = prepare_assets(Path(directory), data)
+        glyphs = card.PJSKProfileRenderer(**paths)
+        reference = card.PJSKProfileRenderer(**paths, use_glyphs=False)
+        glyphs.warm_up()
+        reference.warm_up()
+
+        elapsed = {"glyphs": 0.0, "draw.text": 0.0}
+        for i in range(count):
+            profile = models.PJSKProfileCardContent.from_json(
+                json.dumps(randomize(data, rng)).encode()
+            )
+            start = time.perf_counter()
+            expected = reference.render(profile)
+            elapsed["draw.text"] += time.perf_counter() - start
+            start = time.perf_counter()
+            actual = glyphs.render(profile)
+            elapsed["glyphs"] += time.perf_counter() - start
+
+            bbox = ImageChops.difference(expected, actual).getbbox()
+            if bbox is not None:
+                print(f"profile {i}: pixels differ in {bbox}")
+                sys.exit(1)
+
+    print(f"{count} profiles pixel-identical")
+    for name, total in elapsed.items():
+        print(f"  {name:<10}{total / count * 1000:8.2f} ms per render")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
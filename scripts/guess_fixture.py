@@ -0,0 +1,109 @@
+"""
+猜曲数据库开发脚本与测试的公共部分.
+在不加载 NoneBot 插件的情况下导入 pjsk_guess 的数据库模块,
+并提供创建各实现空数据库的工厂.
+"""
+import os
+import sys
+import types
+import tempfile
+import importlib
+from pathlib import Path
+from typing import Awaitable, Callable, Dict
+
+from guess_stubs import AsyncCollectionStub, fetch_member_name_stub
+
+ROOT = Path(__file__).resolve().parent.parent
+PATH_PACKAGE = ROOT.joinpath("src/plugins/pjsk/plugins/pjsk_guess/database")
+
+KEY = "score_guess_jacket"
+KEY_OTHER = "score_guess_music"
+KEYS = [KEY, KEY_OTHER]
+GUILD = 1000
+GUILD_OTHER = 2000
+
+
+def load_module(name: str) -> types.ModuleType:
+    """
+    导入 pjsk_guess 的数据库模块, 不执行插件的 __init__.
+    Args:
+        name (str): 模块名.
+    Returns:
+        module (types.ModuleType): 模块.
+    """
+    if "pjsk_guess_database" not in sys.modules:
+        package = types.ModuleType("pjsk_guess_database")
+        package.__path__ = [str(PATH_PACKAGE)]
+        sys.modules["pjsk_guess_database"] = package
+    return importlib.import_module(f"pjsk_guess_database.{name}")
+
+
+base = load_module("base")
+member = load_module("member")
+
+DatabaseFactory = Callable[[], Awaitable[base.PJSKGuessDatabaseBase]]
+
+
+async def create_memory() -> base.PJSKGuessDatabaseBase:
+    """
+    创建内存数据库.
+    """
+    database = load_module("memory").PJSKGuessDatabaseMemory()
+    database.members = member.PJSKGuessMemberCache(fetch=fetch_member_name_stub)
+    await database.setup(KEYS)
+    return database
+
+
+async def create_sqlite() -> base.PJSKGuessDatabaseBase:
+    """
+    在临时目录中创建SQLite数据库.
+    """
+    directory = tempfile.mkdtemp(prefix="pjsk-guess-")
+    database = load_module("sqlite").PJSKGuessDatabaseSQLite(
+        f"{directory}/guess.sqlite3"
+    )
+    database.members = member.PJSKGuessMemberCache(fetch=fetch_member_name_stub)
+    await database.setup(KEYS)
+    return database
+
+
+async def create_mongo_stub() -> base.PJSKGuessDatabaseBase:
+    """
+    创建以进程内集合替身代替 MongoDB 的数据库, 不会建立网络连接.
+    只验证 MongoDB 实现生成的查询与更新在替身语义下的结果, 不能代替真实 MongoDB.
+    """
+    database = load_module("mongo").PJSKGuessDatabase("mongodb://localhost")
+    database.scores = AsyncCollectionStub()
+    database.members = member.PJSKGuessMemberCache(fetch=fetch_member_name_stub)
+    await database.setup(KEYS)
+    return database
+
+
+def mongo_factory(uri: str, name: str) -> DatabaseFactory:
+    """
+    创建使用真实 MongoDB 的数据库工厂, 数据写入独立的数据库, 每次创建前清空.
+    Args:
+        uri (str): MongoDB连接URI.
+        name (str): 数据库名称.
+    Returns:
+        factory (DatabaseFactory): 创建空数据库的协程函数.
+    """
+    async def create() -> base.PJSKGuessDatabaseBase:
+        database = load_module("mongo").PJSKGuessDatabase(uri)
+        await database.drop_database(name)
+        database.scores = database[name]["scores"]
+        database.members = member.PJSKGuessMemberCache(fetch=fetch_member_name_stub)
+        await database.setup(KEYS)
+        return database
+
+    return create
+
+
+BACKENDS: Dict[str, DatabaseFactory] = {
+    "memory": create_memory,
+    "sqlite": create_sqlite,
+    "mongo-stub": create_mongo_stub,
+}
+
+# 设置后测试额外对真实 MongoDB 运行, 数据写入独立的 PJSK-Guess-Test 数据库
+MONGO_URI = os.getenv("PJSK_GUESS_TEST_MONGO_URI")
@@ -0,0 +1,329 @@
+"""
+猜曲数据库外部依赖的本地替身.
+用于在没有 MongoDB 和 Discord 连接的环境中运行数据库测试与基准测试,
+只实现猜曲数据库实际用到的操作.
+"""
+from copy import deepcopy
+from itertools import count
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MISSING = object()
+
+
+async def fetch_member_name_stub(guild_id: int, user_id: int) -> str:
+    """
+    Discord 成员接口的替身, 以用户ID生成成员名称.
+    Args:
+        guild_id (int): 服务器ID.
+        user_id (int): 用户ID.
+    Returns:
+        name (str): 成员名称.
+    """
+    return f"user-{user_id}"
+
+
+def get_field(document: dict, path: str) -> Any:
+    """
+    按点分路径读取字段, 不存在时返回 MISSING.
+    """
+    value: Any = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return MISSING
+        value = value[part]
+    return value
+
+
+def set_field(document: dict, path: str, value: Any) -> None:
+    """
+    按点分路径写入字段, 自动创建中间文档.
+    """
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+
+def match(document: dict, query: dict) -> bool:
+    """
+    判断文档是否满足查询条件.
+    """
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(match(document, item) for item in condition):
+                return False
+            continue
+
+        value = get_field(document, field)
+        if isinstance(condition, dict) and condition \
+                and all(op.startswith("$") for op in condition):
+            for op, argument in condition.items():
+                if not match_operator(value, op, argument):
+                    return False
+        elif value is MISSING or value != condition:
+            return False
+    return True
+
+
+def match_operator(value: Any, op: str, argument: Any) -> bool:
+    """
+    判断字段值是否满足单个查询运算符.
+    """
+    if op == "$exists":
+        return (value is not MISSING) == bool(argument)
+    if op == "$in":
+        return value is not MISSING and value in argument
+    if op == "$ne":
+        return value is MISSING or value != argument
+    if value is MISSING or value is None:
+        return False
+    match op:
+        case "$gt":
+            return value > argument
+        case "$gte":
+            return value >= argument
+        case "$lt":
+            return value < argument
+        case "$lte":
+            return value <= argument
+    raise NotImplementedError(f"替身不支持查询运算符: {op}")
+
+
+def evaluate(document: dict, expression: Any) -> Any:
+    """
+    对文档求聚合表达式的值, 用于管道更新.
+    """
+    if isinstance(expression, str) and expression.startswith("$"):
+        return get_field(document, expression[1:])
+    if isinstance(expression, list):
+        return [evaluate(document, item) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+    if len(expression) != 1 or not next(iter(expression)).startswith("$"):
+        return {
+            field: evaluate(document, value)
+            for field, value in expression.items()
+        }
+
+    op, argument = next(iter(expression.items()))
+    if op == "$literal":
+        return argument
+    arguments = evaluate(document, argument)
+    match op:
+        case "$ifNull":
+            value, default = arguments
+            return default if value is MISSING or value is None else value
+        case "$cond":
+            condition, then, otherwise = arguments
+            return then if condition else otherwise
+        case "$eq":
+            left, right = (None if v is MISSING else v for v in arguments)
+            return left == right
+        case "$add":
+            if any(value is MISSING or value is None for value in arguments):
+                return None
+            return sum(arguments)
+        case "$max" | "$min":
+            values = [v for v in arguments if v is not MISSING and v is not None]
+            if not values:
+                return None
+            return max(values) if op == "$max" else min(values)
+    raise NotImplementedError(f"替身不支持表达式运算符: {op}")
+
+
+def project(document: dict, projection: Optional[dict]) -> dict:
+    """
+    按包含式或排除式投影复制文档.
+    """
+    if not projection:
+        return deepcopy(document)
+    if not any(include for path, include in projection.items() if path != "_id"):
+        copied = deepcopy(document)
+        for path in projection:
+            parts = path.split(".")
+            parent = get_field(copied, ".".join(parts[:-1])) \
+                if len(parts) > 1 else copied
+            if isinstance(parent, dict):
+                parent.pop(parts[-1], None)
+        return copied
+    result: dict = {}
+    if projection.get("_id", 1) and "_id" in document:
+        result["_id"] = document["_id"]
+    for path, include in projection.items():
+        if path == "_id" or not include:
+            continue
+        value = get_field(document, path)
+        if value is not MISSING:
+            set_field(result, path, deepcopy(value))
+    return result
+
+
+def sort_key(value: Any) -> Tuple[int, Any]:
+    """
+    缺失字段与空值排在最前, 与 MongoDB 的升序规则一致.
+    """
+    if value is MISSING or value is None:
+        return (0, 0)
+    return (1, value)
+
+
+class AsyncCursorStub:
+    """
+    MongoDB 异步游标的替身.
+    """
+
+    def __init__(self, documents: List[dict], projection: Optional[dict]) -> None:
+        self._documents = documents
+        self._projection = projection
+        self._limit = 0
+
+    def sort(self, key: Any, direction: Optional[int] = None) -> "AsyncCursorStub":
+        keys = [(key, direction or 1)] if isinstance(key, str) else list(key)
+        for field, order in reversed(keys):
+            self._documents.sort(
+                key=lambda document: sort_key(get_field(document, field)),
+                reverse=order < 0
+            )
+        return self
+
+    def limit(self, limit: int) -> "AsyncCursorStub":
+        self._limit = limit
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        documents = self._documents
+        if self._limit:
+            documents = documents[:self._limit]
+        if length is not None:
+            documents = documents[:length]
+        return [project(document, self._projection) for document in documents]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in await self.to_list():
+            yield document
+
+
+class AsyncCollectionStub:
+    """
+    MongoDB 异步集合的进程内替身.
+    唯一索引字段上的等值查询通过字典直接定位, 其余查询逐一扫描文档.
+    """
+
+    def __init__(self) -> None:
+        self._documents: Dict[int, dict] = {}
+        self._ids = count(1)
+        self._unique_fields: Optional[Tuple[str, ...]] = None
+        self._unique: Dict[tuple, int] = {}
+
+    async def create_indexes(self, indexes: Iterable[Any]) -> List[str]:
+        names = []
+        for index in indexes:
+            fields = tuple(index.document["key"].keys())
+            if index.document.get("unique") and self._unique_fields is None:
+                self._unique_fields = fields
+                self._unique = {
+                    self._unique_key(document): _id
+                    for _id, document in self._documents.items()
+                }
+            names.append(index.document["name"])
+        return names
+
+    async def find_one(
+        self,
+        query: dict,
+        projection: Optional[dict] = None
+    ) -> Optional[dict]:
+        document = self._find_one(query)
+        return None if document is None else project(document, projection)
+
+    def find(
+        self,
+        query: Optional[dict] = None,
+        projection: Optional[dict] = None
+    ) -> AsyncCursorStub:
+        return AsyncCursorStub(self._scan(query or {}), projection)
+
+    async def count_documents(self, query: dict) -> int:
+        return len(self._scan(query))
+
+    async def update_one(
+        self,
+        query: dict,
+        update: Any,
+        upsert: bool = False
+    ) -> None:
+        document = self._find_one(query)
+        if document is None:
+            if not upsert:
+                return
+            document = {
+                field: value
+                for field, value in query.items()
+                if not field.startswith("$") and not isinstance(value, dict)
+            }
+            document["_id"] = next(self._ids)
+            self._documents[document["_id"]] = document
+            if self._unique_fields is not None:
+                self._unique[self._unique_key(document)] = document["_id"]
+        self._apply(document, update)
+
+    def _apply(self, document: dict, update: Any) -> None:
+        """
+        对文档应用更新运算符或更新管道.
+        """
+        if isinstance(update, list):
+            for stage in update:
+                (op, fields), = stage.items()
+                if op not in ("$set", "$addFields"):
+                    raise NotImplementedError(f"替身不支持管道阶段: {op}")
+                # 同一阶段的表达式均以阶段开始时的文档求值
+                snapshot = deepcopy(document)
+                for path, expression in fields.items():
+                    value = evaluate(snapshot, expression)
+                    if value is not MISSING:
+                        set_field(document, path, deepcopy(value))
+            return
+
+        for op, fields in update.items():
+            for path, argument in fields.items():
+                value = get_field(document, path)
+                match op:
+                    case "$inc":
+                        value = argument if value is MISSING else value + argument
+                    case "$set":
+                        value = argument
+                    case "$max":
+                        value = argument if value is MISSING else max(value, argument)
+                    case "$min":
+                        value = argument if value is MISSING else min(value, argument)
+                    case _:
+                        raise NotImplementedError(f"替身不支持更新运算符: {op}")
+                set_field(document, path, value)
+
+    def _unique_key(self, document: dict) -> tuple:
+        assert self._unique_fields is not None, "必须先建立唯一索引."
+        return tuple(get_field(document, field) for field in self._unique_fields)
+
+    def _find_one(self, query: dict) -> Optional[dict]:
+        # 查询包含唯一索引的全部字段时直接定位
+        if self._unique_fields is not None \
+                and all(field in query for field in self._unique_fields):
+            key = tuple(query[field] for field in self._unique_fields)
+            if not any(isinstance(value, dict) for value in key):
+                _id = self._unique.get(key)
+                document = None if _id is None else self._documents[_id]
+                return document if document and match(document, query) else None
+        for document in self._documents.values():
+            if match(document, query):
+                return document
+        return None
+
+    def _scan(self, query: dict) -> List[dict]:
+        return [
+            document
+            for document in self._documents.values()
+            if match(document, query)
+        ]
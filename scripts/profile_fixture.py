@@ -0,0 +1,175 @@
+"""
+个人信息卡片开发脚本的公共部分.
+在不加载 NoneBot 插件的情况下导入 pjsk_profile 模块, 生成个人信息,
+并准备可离线渲染的卡片资源.
+"""
+import os
+import sys
+import types
+import random
+import shutil
+import importlib
+from pathlib import Path
+from typing import Any, Dict
+
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+PATH_PACKAGE = ROOT.joinpath("src/plugins/pjsk/plugins/pjsk_profile")
+
+# 卡片资源路径相对于仓库根目录
+os.chdir(ROOT)
+
+
+def load_module(name: str) -> types.ModuleType:
+    """
+    导入 pjsk_profile 的模块, 不执行插件的 __init__.
+    Args:
+        name (str): 模块名.
+    Returns:
+        module (types.ModuleType): 模块.
+    """
+    if "pjsk_profile" not in sys.modules:
+        package = types.ModuleType("pjsk_profile")
+        package.__path__ = [str(PATH_PACKAGE)]
+        sys.modules["pjsk_profile"] = package
+    return importlib.import_module(f"pjsk_profile.{name}")
+
+
+def generate_profile(cards: int = 1500, honors: int = 1200) -> Dict[str, Any]:
+    """
+    生成按真实响应结构的大体量个人信息.
+    Args:
+        cards (int): 卡牌数量.
+        honors (int): 称号数量.
+    Returns:
+        profile (Dict[str, Any]): 个人信息.
+    """
+    rng = random.Random(0)
+    return {
+        "user": {"userId": 7485938033569569588, "name": "ミク", "rank": 312},
+        "userProfile": {
+            "userId": 7485938033569569588,
+            "word": "セカイはまだ始まってすらいない" * 2,
+            "twitterId": "miku_39",
+            "profileImageType": "leader"
+        },
+        "userDeck": {
+            "deckId": 1, "userId": 7485938033569569588, "name": "deck",
+            "leader": 1001, "subLeader": 1002,
+            "member1": 1001, "member2": 1002, "member3": 1003,
+            "member4": 1004, "member5": 1005
+        },
+        "userCards": [
+            {
+                "cardId": i, "level": rng.randint(1, 60),
+                "masterRank": rng.randint(0, 5),
+                "specialTrainingStatus": "done",
+                "defaultImage": rng.choice(["original", "special_training"])
+            }
+            for i in range(cards)
+        ],
+        "userCharacters": [
+            {"characterId": i + 1, "characterRank": rng.randint(1, 150)}
+            for i in range(26)
+        ],
+        "userChallengeLiveSoloResult": {"characterId": 21, "highScore": 2817263},
+        "userChallengeLiveSoloStages": [
+            {"characterId": i % 26 + 1, "rank": i}
+            for i in range(26 * 8)
+        ],
+        "userMusicDifficultyClearCount": [
+            {
+                "musicDifficultyType": kind, "liveClear": rng.randint(0, 500),
+                "fullCombo": rng.randint(0, 500), "allPerfect": rng.randint(0, 500)
+            }
+            for kind in ["easy", "normal", "hard", "expert", "master", "append"]
+        ],
+        "userCustomProfileCards": [{} for _ in range(8)],
+        "userProfileHonors": [
+            {
+                "seq": i, "profileHonorType": "normal", "honorId": i,
+                "honorLevel": 1, "bondsHonorViewType": "none", "bondsHonorWordId": 0
+            }
+            for i in range(3)
+        ],
+        "userHonors": [
+            {"honorId": i, "level": rng.randint(1, 10)} for i in range(honors)
+        ],
+        "userBondsHonors": [
+            {"bondsHonorId": i, "level": rng.randint(1, 10)} for i in range(honors // 4)
+        ],
+        "userStoryFavorites": [{} for _ in range(50)],
+        "userConfig": {"friendRequestScope": "all"},
+        "userMultiLiveTopScoreCount": {"mvp": 1234, "superStar": 567},
+        "totalPower": {
+            "totalPower": 330000, "basicCardTotalPower": 300000,
+            "areaItemBonus": 20000, "characterRankBonus": 5000, "honorBonus": 5000
+        },
+        "isMysekaiOwnerAcceptVisit": True,
+        "userHonorMissions": [
+            {"honorMissionType": f"mission_{i}", "progress": i}
+            for i in range(honors // 4)
+        ]
+    }
+
+
+def randomize(data: dict, rng: random.Random) -> dict:
+    """
+    随机化个人信息中的数字字段.
+    Args:
+        data (dict): 个人信息.
+        rng (random.Random): 随机数生成器.
+    Returns:
+        data (dict): 个人信息.
+    """
+    def number() -> int:
+        return rng.randint(0, 10 ** rng.randint(1, 7))
+
+    data["user"]["userId"] = rng.randint(0, 10 ** 19)
+    data["user"]["rank"] = number()
+    for item in data["userMusicDifficultyClearCount"]:
+        item["liveClear"], item["fullCombo"], item["allPerfect"] = number(), number(), number()
+    for item in data["userCharacters"]:
+        item["characterRank"] = rng.randint(0, 200)
+    data["userMultiLiveTopScoreCount"] = {"mvp": number(), "superStar": number()}
+    data["userChallengeLiveSoloResult"] = {
+        "characterId": rng.randint(1, 26), "highScore": number()
+    }
+    return data
+
+
+def prepare_assets(directory: Path, profile: Dict[str, Any]) -> Dict[str, str]:
+    """
+    准备离线渲染用的资源目录与缩略图缓存.
+    仓库中缺少的字体以已有字体代替, 卡组缩略图以资源中的角色图标代替.
+    Args:
+        directory (Path): 临时目录.
+        profile (Dict[str, Any]): 个人信息.
+    Returns:
+        paths (Dict[str, str]): 渲染器的 assets 与 cache_dir 参数.
+    """
+    card = load_module("card")
+    assets = directory.joinpath("assets")
+    cache_dir = directory.joinpath("thumbnail")
+    shutil.copytree(PATH_PACKAGE.joinpath("assets"), assets)
+    cache_dir.mkdir()
+
+    fallback = assets.joinpath(card.PJSKProfileRenderer.FONT_RODIN)
+    for name, _ in card.PJSKProfileRenderer.FONTS:
+        if not assets.joinpath(name).exists():
+            print(f"missing font {name}, using {fallback.name} instead")
+            shutil.copy(fallback, assets.joinpath(name))
+
+    metadata = card.profile_renderer.metadata
+    rng = random.Random(0)
+    deck = profile["userDeck"]
+    for key in ("member1", "member2", "member3", "member4", "member5"):
+        bundle = metadata[str(deck[key])]
+        for suffix in ("normal", "after_training"):
+            chara = assets.joinpath(f"chara/chr_ts_{rng.randint(1, 26)}.png")
+            with Image.open(chara) as thumbnail:
+                thumbnail.convert("RGBA").resize((128, 128)).save(
+                    cache_dir.joinpath(f"{bundle}_{suffix}.png")
+                )
+    return {"assets": str(assets), "cache_dir": str(cache_dir)}
@@ -10,15 +10,23 @@ class QRCodeAbu:
     BOX_SIZE = 10
     BORDER = 0
     IMAGE_PATH = 'src/plugins/imaybeabu/plugins/qrcode/abu.png'
+    COMPRESS_LEVEL = 3
 
     @staticmethod
     def excute(data):
         qr_array = QRCodeAbu.generate_qr_code(data)
         result = QRCodeAbu.replace_qr_with_image(qr_array)
         result = QRCodeAbu.rgb_to_rgba(result)
-        result_pil = Image.fromarray(cv2.cvtColor(result, cv2.COLOR_BGRA2RGBA))
+        result = cv2.cvtColor(result, cv2.COLOR_BGRA2RGBA)
+        result_pil = QRCodeAbu.rgba_to_palette(result)
+        if result_pil is None:
+            result_pil = Image.fromarray(result)
         output_buffer = BytesIO()
-        result_pil.save(output_buffer, format='PNG')
+        result_pil.save(
+            output_buffer,
+            format='PNG',
+            compress_level=QRCodeAbu.COMPRESS_LEVEL
+        )
         return output_buffer.getvalue()
 
     # 生成二维码
@@ -66,6 +74,31 @@ class QRCodeAbu:
 
         return rgba_image
 
+    # 无损转换为调色板图片
+    @staticmethod
+    def rgba_to_palette(image):
+        # 二维码由素材图片的颜色与透明背景组成, 颜色不超过255种时可无损转换
+        alpha = image[..., 3]
+        if not np.all((alpha == 0) | (alpha == 255)):
+            return None
+        colors, indices = np.unique(
+            image[..., :3].reshape(-1, 3),
+            axis=0,
+            return_inverse=True
+        )
+        if len(colors) > 255:
+            return None
+
+        # 透明像素使用调色板的最后一项
+        transparent = len(colors)
+        indices = indices.reshape(alpha.shape).astype(np.uint8)
+        indices[alpha == 0] = transparent
+        palette_img = Image.frombytes(
+            'P', (alpha.shape[1], alpha.shape[0]), indices.tobytes())
+        palette_img.putpalette(colors.astype(np.uint8).tobytes() + bytes(3))
+        palette_img.info['transparency'] = transparent
+        return palette_img
+
 
 if __name__ == '__main__':
     data = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
@@ -1,16 +1,15 @@
 import os
 import asyncio
-from copy import deepcopy
-from ast import literal_eval
-from typing import TypedDict, List, Dict, Union, Optional
+from typing import Any, List, Dict, Union, Optional
 
-import ujson as json
-from nonebot import logger, on_type, get_adapter
+from nonebot import logger, on_type, get_adapter, get_driver
 from nonebot.adapters.discord import (
     Bot,
     Adapter,
     MessageSegment,
     GuildMessageCreateEvent,
+    GuildMessageDeleteEvent,
+    GuildMessageDeleteBulkEvent,
     GuildMessageReactionAddEvent,
     MessageComponentInteractionEvent,
     ApplicationCommandInteractionEvent
@@ -32,7 +31,15 @@ from nonebot.adapters.discord.commands import (
     on_slash_command,
 )
 from nonebot.adapters.discord.api.model import Snowflake
-from nonebot.adapters.discord.message import CustomEmojiSegment
+
+from .pool import ReactTaskPool
+from .tracker import LastAuthorTracker
+from .executor import ReactionExecutor
+from .coalescer import ReactionCoalescer
+from .sessions import ReactSessionRegistry
+from .database.base import ReactEmoji
+from .database.base import ReactDatabaseBase as DatabaseBase
+from .database.journal import ReactDatabaseJournal as DatabaseJournal
 
 
 DB_ENABLED = False
@@ -41,6 +48,26 @@ DB_PASSWORD: Optional[str] = None
 DB_HOST: Optional[str] = None
 REACT_DB_URI: Optional[str] = None
 
+# 反应任务存储, 未启用 MongoDB 数据库时使用按群组分片的快照加追加日志
+POOL_REACT_TASKS_SHARDS = "resources/imaybeabu/react_tasks"
+POOL_REACT_TASKS_STATIC = "resources/imaybeabu/pool_react_tasks_static.json"
+POOL_REACT_TASKS_JOURNAL = "resources/imaybeabu/pool_react_tasks.journal"
+POOL_REACT_TASKS_IDLE_TIMEOUT = 3600  # 群组空闲多少秒后卸载
+
+# 增加与删除反应会话的超时秒数
+REACT_SESSION_TIMEOUT = 30
+
+# 连续消息合并等待的秒数, 为0时每条消息立即反应
+REACT_BURST_DELAY = float(os.getenv("REACT_BURST_DELAY", "1.0"))
+
+# 定期记录反应请求统计的间隔秒数, 为0时不记录
+REACT_STATS_INTERVAL = float(os.getenv("REACT_STATS_INTERVAL", "3600"))
+database: DatabaseBase = DatabaseJournal(
+    POOL_REACT_TASKS_SHARDS,
+    path_legacy_snapshot=POOL_REACT_TASKS_STATIC,
+    path_legacy_journal=POOL_REACT_TASKS_JOURNAL
+)
+
 if bool(os.getenv("REACT_ENABLE_DB_MONGO")):
     # 从环境变量中获取 MongoDB 连接信息
     DB_ENABLED = True
@@ -55,8 +82,8 @@ if bool(os.getenv("REACT_ENABLE_DB_MONGO")):
 
     # 尝试连接 MongoDB 数据库
     if DB_USERNAME and DB_PASSWORD and DB_HOST:
-        from pymongo import MongoClient
-        database = MongoClient(REACT_DB_URI)["IMaybeAbu"]
+        from .database.mongo import ReactDatabase as DatabaseMongo
+        database = DatabaseMongo(REACT_DB_URI)
 
     # not REACT_DB_USERNAME and REACT_DB_PASSWORD and REACT_DB_HOST
     # 如果连接信息不完整, 则记录警告并不启用数据库支持
@@ -69,140 +96,101 @@ if bool(os.getenv("REACT_ENABLE_DB_MONGO")):
             "将**不会**启用 MongoDB 数据库支持."
         )
 
-create_reaction = API_HANDLERS["create_reaction"]
-delete_own_reaction = API_HANDLERS["delete_own_reaction"]
 get_guild_member = API_HANDLERS["get_guild_member"]
 get_channel_messages = API_HANDLERS["get_channel_messages"]
 
 
-class AddReactSessionStatus(TypedDict):
-    """
-    增加反应会话状态字典类型.
-    Attributes:
-        user_id (Snowflake): 用户ID.
-        emoji (Optional[CustomEmojiSegment | str]): 表情符号消息或字符串表示的表情符号.
-        trigger_react_received (asyncio.Event): 一旦 wait 被触发，表示用户已添加反应.
-    """
-    user_id: Snowflake
-    emoji: Optional[CustomEmojiSegment | str]
-    trigger_react_received: asyncio.Event
+pool_react_tasks = ReactTaskPool(database, POOL_REACT_TASKS_IDLE_TIMEOUT)
 
+# 频道最近消息作者, 由网关消息事件维护, 用于判断上一条消息是否来自同一用户
+pool_last_authors = LastAuthorTracker()
 
-class DeleteReactSessionStatus(TypedDict):
-    """
-    删除反应会话状态字典类型.
-    Attributes:
-        user_id (Snowflake): 用户ID.        
-        trigger_react_received (asyncio.Event): 一旦 wait 被触发，表示用户已添加反应.
-    """
-    user_id: Snowflake
-    trigger_react_received: asyncio.Event
+# 反应请求执行器, 按频道限流桶并发发送反应请求
+reaction_executor = ReactionExecutor()
 
+# 反应合并器, 用户连续发送消息时只为最后一条消息添加反应
+reaction_coalescer = ReactionCoalescer(reaction_executor, REACT_BURST_DELAY)
 
-pool_react_tasks: Dict[
-    Snowflake,  # 群组ID
-    Dict[
-        Snowflake,  # 用户ID
-        List[Union[str, CustomEmojiSegment]]  # 反应列表
-    ]
-] = {}
-
-pool_add_react_sessions: Dict[
-    Snowflake,  # 群组ID
-    Dict[
-        Snowflake,  # 操作者ID
-        Dict[
-            Snowflake,  # 消息ID
-            AddReactSessionStatus
-        ]
-    ]
-] = {}
-
-pool_delete_react_sessions: Dict[
-    Snowflake,  # 群组ID
-    Dict[
-        Snowflake,  # 操作者ID
-        Dict[
-            Snowflake,  # 消息ID
-            DeleteReactSessionStatus
-        ]
-    ]
-] = {}
+# 增加与删除反应的会话, 按会话消息ID索引, 超时由后台任务统一处理
+pool_react_sessions = ReactSessionRegistry(REACT_SESSION_TIMEOUT)
 
 
-# 尝试读取反应任务池
-POOL_REACT_TASKS_STATIC = "resources/imaybeabu/pool_react_tasks_static.json"
-if True:
+# 定期记录反应请求统计的后台任务
+stats_reporter: Optional[asyncio.Task] = None
+
+
+async def report_stats() -> None:
+    """
+    定期记录所有群组汇总的反应请求统计, 以及收到429响应的群组数.
+    """
+    while True:
+        await asyncio.sleep(REACT_STATS_INTERVAL)
+        stats = reaction_executor.get_stats()
+        rate_limited_guilds = sum(
+            1 for item in reaction_executor.stats.values() if item.rate_limited
+        )
+        logger.info(
+            "[ImaybeAbu.React] "
+            f"反应请求统计: 请求 {stats['calls']} 次, "
+            f"429 {stats['rate_limited']} 次 ({rate_limited_guilds} 个群组), "
+            f"失败 {stats['failures']} 次, "
+            f"平均耗时 {stats['latency_avg']:.3f} 秒, "
+            f"最大耗时 {stats['latency_max']:.3f} 秒"
+        )
+
+
+@get_driver().on_startup
+async def setup_react_tasks() -> None:
+    """
+    启动时准备反应任务存储, 群组的反应任务在首次使用时加载, 并开始定期记录统计.
+    """
+    global stats_reporter
+    if REACT_STATS_INTERVAL > 0:
+        stats_reporter = asyncio.create_task(report_stats())
     try:
-        if DB_ENABLED and database is not None:
-            # 从 MongoDB 数据库加载反应任务池
-            collection = database["React"]
-            data = collection.find_one({}, {"_id": 0})
-            if data is None:
-                data = {}
-
-        elif os.path.exists(POOL_REACT_TASKS_STATIC):
-            with open(POOL_REACT_TASKS_STATIC, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-        # 转换键为Snowflake类型
-        data = {
-            Snowflake(guild_id): {
-                Snowflake(user_id): value
-                for user_id, value in users.items()
-            }
-            for guild_id, users in data.items()
-        }
-
-        # 如果是字典格式的表情符号, 转换为 CustomEmojiSegment
-        for guild_id in data.keys():
-            for user_id in data[guild_id].keys():
-                for i, emoji in enumerate(data[guild_id][user_id]):
-                    if isinstance(emoji, dict) and "id" in emoji:
-                        data[guild_id][user_id][i] = MessageSegment.custom_emoji(
-                            emoji_id=emoji["id"],
-                            name=emoji["name"],
-                            animated=emoji.get("animated", None)
-                        )
-
-        # 将数据加载到全局变量中
-        pool_react_tasks = data
+        await database.setup()
     except Exception as e:
-        DB_ENABLED = False
         logger.warning(
             "[ImaybeAbu.React]"
-            "无法加载反应任务池,"
-            "将使用空池."
+            "无法准备反应任务存储,"
+            "群组将在首次使用时重试加载."
             "错误信息: "
             + str(e)
         )
 
 
-def save_react_tasks() -> None:
+@Bot.on_called_api
+async def record_sent_message(
+    bot: Bot,
+    exception: Optional[Exception],
+    api: str,
+    data: Dict[str, Any],
+    result: Any
+) -> None:
     """
-    保存反应任务池到静态文件.
+    记录机器人自己发送的消息.
+    适配器默认不分发机器人自己的消息事件, 因此从API调用结果中补充记录,
+    避免将机器人消息前后的两条用户消息误认为连续消息.
     """
-    global pool_react_tasks
-    os.makedirs(os.path.dirname(POOL_REACT_TASKS_STATIC), exist_ok=True)
-
-    # 将 CustomEmojiSegment 转换为字典格式
-    data: dict = deepcopy(pool_react_tasks)
-    for guild_id in data.keys():
-        for user_id in data[guild_id].keys():
-            for i, emoji in enumerate(data[guild_id][user_id]):
-                if isinstance(emoji, CustomEmojiSegment):
-                    data[guild_id][user_id][i] = emoji.data
-
-    if DB_ENABLED and database is not None:
-        # json 编码
-        data = json.loads(json.dumps(data))
-
-        # 将反应任务池保存到 MongoDB 数据库
-        collection = database["React"]
-        collection.update_one({}, {"$set": data}, upsert=True)
-    else:
-        with open(POOL_REACT_TASKS_STATIC, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+    if exception is not None or not isinstance(result, MessageGet):
+        return
+    if result.flags and MessageFlag.EPHEMERAL in result.flags:
+        return
+    pool_last_authors.record(result.channel_id, result.id, result.author.id)
+    reaction_coalescer.observe(result.channel_id, result.author.id)
+
+
+@get_driver().on_shutdown
+async def close_react_tasks() -> None:
+    """
+    关闭时停止记录统计, 结束所有会话, 取消未完成的反应请求, 卸载反应任务池并释放反应任务存储.
+    """
+    if stats_reporter is not None:
+        stats_reporter.cancel()
+    await pool_react_sessions.close()
+    reaction_coalescer.close()
+    await reaction_executor.close()
+    await pool_react_tasks.close()
 
 
 # 命令响应器
@@ -257,6 +245,9 @@ react = on_slash_command(
 
 # 其他响应器
 react_service = on_type(types=GuildMessageCreateEvent)
+react_message_delete = on_type(
+    types=(GuildMessageDeleteEvent, GuildMessageDeleteBulkEvent)
+)
 react_add_sessions = on_type(types=GuildMessageReactionAddEvent)
 react_delete_sessions = on_type(types=MessageComponentInteractionEvent)
 
@@ -277,77 +268,49 @@ async def handle_react_add(event: ApplicationCommandInteractionEvent, user: Comm
     operator_id = event.member.user.id
     user_id = user.id
 
-    # 检查群组是否具有状态, 没有则创建空状态
-    global pool_add_react_sessions, pool_react_tasks
-    if pool_add_react_sessions.get(guild_id) is None:
-        pool_add_react_sessions[guild_id] = {}
-    if pool_react_tasks.get(guild_id) is None:
-        pool_react_tasks[guild_id] = {}
-
-    # 检查操作者是否具有会话状态, 没有则创建空会话
-    if pool_add_react_sessions[guild_id].get(operator_id) is None:
-        pool_add_react_sessions[guild_id][operator_id] = {}
-
     # 建立会话
     session = await react.send_followup_msg(
         "请将期望的反应添加到此消息下.",
         flags=MessageFlag.EPHEMERAL
     )
 
-    # 初始化并更新状态
-    timer = asyncio.create_task(asyncio.sleep(30))
-    trigger = asyncio.Event()
-    pool_add_react_sessions[guild_id][operator_id][session.id] = {
-        "user_id": user_id,
-        "emoji": None,
-        "trigger_react_received": trigger
-    }
-
-    # 等待用户添加反应
-    await asyncio.wait(
-        [trigger.wait(), timer],
-        return_when=asyncio.FIRST_COMPLETED
+    # 等待操作者添加反应, 会话超时时结果为空
+    emoji: Optional[ReactEmoji] = await pool_react_sessions.wait(
+        pool_react_sessions.open(session.id, "add", operator_id, user_id)
     )
 
-    # 如果操作者添加了反应, 则会触发事件将定时器取消
-    if trigger.is_set():
-        # 获取表情符号
-        emoji = pool_add_react_sessions[guild_id][operator_id][session.id]["emoji"]
-        assert emoji is not None, "用户添加反应后, 表情符号必定非空."
-
+    # 如果操作者添加了反应, 则会话以表情符号结束
+    if emoji is not None:
         # 检查用户是否具有反应任务, 没有则创建空任务
-        if pool_react_tasks[guild_id].get(user_id) is None:
-            pool_react_tasks[guild_id][user_id] = []
+        tasks = await pool_react_tasks.get(guild_id)
+        if tasks.get(user_id) is None:
+            tasks[user_id] = {}
 
         # 检查反应是否已存在于用户任务中, 如果存在则返回消息
-        elif emoji in pool_react_tasks[guild_id][user_id]:
+        elif emoji in tasks[user_id]:
             await react.edit_followup_msg(
                 session.id,
-                "反应 " + emoji +
+                "反应 " + str(emoji) +
                 " 已存在于自动为" + MessageSegment.mention_user(user_id) +
                 "添加的反应中."
             )
-            await react_add_sessions.finish()
+            await react.finish()
 
         # 添加反应到用户任务中
-        pool_react_tasks[guild_id][user_id].append(emoji)
+        tasks[user_id][emoji] = None
 
-        # 释放会话
-        pool_add_react_sessions[guild_id][operator_id].pop(session.id)
+        # 保存反应任务
+        await database.add(guild_id, user_id, emoji)
 
         # 发送成功消息
         msg_user = MessageSegment.mention_user(user_id)
         await react.edit_followup_msg(
             session.id,
-            "将自动为" + msg_user + "添加反应: " + emoji
+            "将自动为" + msg_user + "添加反应: " + str(emoji)
         )
 
-        # 保存反应任务池到文件
-        save_react_tasks()
-
-    # not trigger.is_set()
+    # emoji is None
     else:
-        pool_add_react_sessions[guild_id][operator_id].pop(session.id)
         await react.edit_followup_msg(session.id, f"请求超时, 请重试.")
 
     # 结束响应器
@@ -388,50 +351,25 @@ async def handle_react_remove(
     user_name = member.user.username if user_name is None else user_name
     assert isinstance(user_name, str), "用户名称必须是字符串."
 
-    # 检查群组是否具有状态, 没有则创建空状态
-    global pool_delete_react_sessions, pool_react_tasks
-    if pool_react_tasks.get(guild_id) is None:
-        pool_react_tasks[guild_id] = {}
-    if pool_delete_react_sessions.get(guild_id) is None:
-        pool_delete_react_sessions[guild_id] = {}
-
     # 获取任务, 若无任务则结束事件
-    tasks = pool_react_tasks[guild_id].get(user_id)
+    tasks = (await pool_react_tasks.get(guild_id)).get(user_id)
     if tasks is None:
         await react.finish("没有为" + user_name + "设置自动添加的反应.")
 
-    # 检查操作者是否具有会话状态, 没有则创建空会话
-    if pool_delete_react_sessions[guild_id].get(operator_id) is None:
-        pool_delete_react_sessions[guild_id][operator_id] = {}
-
     # 构造会话的选择菜单和按钮
     options: List[SelectOption] = [SelectOption(label="选择全部", value="all")]
     for emoji in tasks:
-        if isinstance(emoji, MessageSegment):
-            options.append(
-                SelectOption(
-                    label=f"{emoji.data['name']}",
-                    value=str(
-                        {
-                            'name': emoji.data['name'],
-                            'emoji_id': emoji.data['id']
-                        }
-                    ),
-                    emoji=ComponentEmoji(
-                        id=emoji.data["id"],
-                        name=emoji.data["name"]
-                    )
-                )
-            )
-        else:
-            assert isinstance(emoji, str), "表情符号必须是字符串或MessageSegment."
-            options.append(
-                SelectOption(
-                    label=emoji,
-                    value=emoji,
-                    emoji={"name": emoji}
-                )
+        options.append(
+            SelectOption(
+                label=emoji.name,
+                value=emoji.encode(),
+                emoji=ComponentEmoji(
+                    id=emoji.id,
+                    name=emoji.name,
+                    animated=emoji.animated
+                ) if emoji.id is not None else ComponentEmoji(name=emoji.name)
             )
+        )
 
     # 初始化并建立会话
     select = MessageSegment.component(
@@ -448,23 +386,13 @@ async def handle_react_remove(
         "请选择你要删除的表情符号." + select
     )
 
-    # 初始化并更新状态
-    timer = asyncio.create_task(asyncio.sleep(30))
-    trigger = asyncio.Event()
-    pool_delete_react_sessions[guild_id][operator_id][session.id] = {
-        "user_id": user_id,
-        "trigger_react_received": trigger
-    }
-
-    # 等待用户添加反应
-    await asyncio.wait(
-        [trigger.wait(), timer],
-        return_when=asyncio.FIRST_COMPLETED
+    # 等待操作者选择, 会话超时时结果为空
+    selected = await pool_react_sessions.wait(
+        pool_react_sessions.open(session.id, "delete", operator_id, user_id)
     )
 
     # 超时处理
-    if not trigger.is_set():
-        pool_delete_react_sessions[guild_id][operator_id].pop(session.id)
+    if selected is None:
         await react.edit_followup_msg(session.id, f"请求超时, 请重试.")
 
     # 结束响应器
@@ -488,71 +416,67 @@ async def handle_react_service(bot: Bot, event: GuildMessageCreateEvent) -> None
     message_id = event.message_id
     user_id = event.user_id
 
-    # 检查群组是否具有全局状态, 没有则创建空状态
-    global pool_react_tasks
-    if pool_react_tasks.get(guild_id) is None:
-        pool_react_tasks[guild_id] = {}
+    # 记录消息作者, 所有用户的消息都需要记录
+    # 其他用户发言时, 频道中等待合并的反应立即应用
+    pool_last_authors.record(channel_id, message_id, user_id)
+    reaction_coalescer.observe(channel_id, user_id)
+
+    # 获取群组的反应任务, 群组首次出现时加载
+    tasks = (await pool_react_tasks.get(guild_id)).get(user_id)
 
     # 检查用户是否具有反应任务, 没有则结束事件
-    if pool_react_tasks[guild_id].get(user_id) is None:
+    if tasks is None:
         await react_service.finish()
 
-    # 获取上次消息
-    last_message: MessageGet = (
-        await get_channel_messages(
+    # 用户正在连续发送消息, 并入等待中的反应并重新开始等待
+    if reaction_coalescer.extend(channel_id, user_id, message_id):
+        await react_service.finish()
+
+    # 获取上次消息, 优先使用本地记录, 重启后记录不足时回退到REST请求
+    last_message = pool_last_authors.previous(channel_id, message_id)
+    if last_message is None:
+        messages: List[MessageGet] = await get_channel_messages(
             adapter,
             bot,
             channel_id,
             before=message_id,
             limit=1,
         )
-    ).pop()
-
-    # 如果上次消息的作者ID与用户ID相同, 则删除自己的反应
-    if user_id == last_message.author.id:
-        for emoji in pool_react_tasks[guild_id][user_id]:
-            if isinstance(emoji, MessageSegment):
-                name = emoji.data["name"]
-                emoji_id = emoji.data["id"]
-
-            # 如果是字符串, 则直接使用
-            else:
-                name = emoji
-                emoji_id = None
-
-            # 删除自己的反应
-            try:
-                await delete_own_reaction(adapter, bot, channel_id, last_message.id, name, emoji_id)
-            except Exception as e:
-                # 如果删除反应失败, 则打印错误并继续
-                print(
-                    f"Failed to delete reaction {emoji} from message {last_message.id}: {e}"
-                )
-
-    # 遍历所有表情符号
-    for emoji in pool_react_tasks[guild_id][user_id]:
-        if isinstance(emoji, MessageSegment):
-            name = emoji.data["name"]
-            emoji_id = emoji.data["id"]
-
-        # 如果是字符串, 则直接使用
-        else:
-            name = emoji
-            emoji_id = None
-
-        # 创建反应
-        try:
-            await create_reaction(adapter, bot, channel_id, message_id, name, emoji_id)
-        except Exception as e:
-            # 如果添加反应失败, 则打印错误并继续
-            print(
-                f"Failed to add reaction {emoji} to message {message_id}: {e}"
-            )
+        if messages:
+            last_message = (messages[0].id, messages[0].author.id)
+            pool_last_authors.seed(channel_id, message_id, last_message)
+
+    # 如果上次消息的作者ID与用户ID相同, 则删除其上自己的反应,
+    # 等待合并结束后为连续消息的最后一条添加所有反应
+    previous_id = None
+    if last_message is not None and user_id == last_message[1]:
+        previous_id = last_message[0]
+    reaction_coalescer.push(
+        bot, guild_id, channel_id, user_id, previous_id, message_id, tasks
+    )
 
     # 结束响应器
     await react_service.finish()
 
 
+@react_message_delete.handle()
+async def handle_react_message_delete(
+    event: Union[GuildMessageDeleteEvent, GuildMessageDeleteBulkEvent]
+) -> None:
+    """
+    从最近消息作者记录中移除已删除的消息.
+    Args:
+        event (Union[GuildMessageDeleteEvent, GuildMessageDeleteBulkEvent]): 事件对象.
+    """
+    if isinstance(event, GuildMessageDeleteBulkEvent):
+        pool_last_authors.discard(event.channel_id, event.ids)
+    else:
+        pool_last_authors.discard(event.channel_id, [event.id])
+
+    # 结束响应器
+    await react_message_delete.finish()
+
+
 @react_add_sessions.handle()
 async def handle_react_add_sessions(event: GuildMessageReactionAddEvent) -> None:
     """
@@ -560,40 +484,21 @@ async def handle_react_add_sessions(event: GuildMessageReactionAddEvent) -> None
     Args:
         event (GuildMessageReactionAddEvent): 事件对象.
     """
-    # 获取群组ID, 操作者ID和消息ID
-    guild_id = event.guild_id
-    operator_id = event.user_id
-    message_id = event.message_id
-
-    # 检查群组是否具有全局状态, 没有则创建空状态
-    global pool_add_react_sessions, pool_react_tasks
-    if pool_add_react_sessions.get(guild_id) is None:
-        pool_add_react_sessions[guild_id] = {}
-
-    # 检查操作者是否具有会话状态, 没有则结束事件
-    if pool_add_react_sessions[guild_id].get(operator_id) is None:
-        await react_add_sessions.finish()
-
-    # 根据消息ID匹配用户ID
-    user_id = pool_add_react_sessions[guild_id][operator_id].get(message_id)
-    if user_id is None:
+    # 根据消息ID与操作者ID匹配会话
+    session = pool_react_sessions.get(event.message_id, "add", event.user_id)
+    if session is None:
         await react_add_sessions.finish()  # 无匹配结果, 结束事件
 
     # 创建表情符号
-    emoji: Union[str, MessageSegment]
-    if event.emoji.name and event.emoji.id is not None:
-        emoji = MessageSegment.custom_emoji(
-            name=event.emoji.name,
-            emoji_id=event.emoji.id
-        )
-    else:
-        assert event.emoji.name is not None, "自定义表情符号一定具有名称和ID."
-        emoji = event.emoji.name
+    assert event.emoji.name, "表情符号一定具有名称."
+    emoji = ReactEmoji(
+        event.emoji.name,
+        event.emoji.id,
+        event.emoji.animated is True
+    )
 
-    # 更新会话状态
-    pool_add_react_sessions[guild_id][operator_id][message_id]["emoji"] = emoji
-    pool_add_react_sessions[guild_id][operator_id][message_id]["trigger_react_received"] \
-        .set()
+    # 以表情符号结束会话
+    pool_react_sessions.resolve(session, emoji)
 
     # 结束响应器
     await react_add_sessions.finish()
@@ -606,67 +511,52 @@ async def handle_react_delete_sessions(event: MessageComponentInteractionEvent)
     Args:
         event (MessageComponentInteractionEvent): 事件对象.
     """
-    # 获取群组ID, 操作者ID和消息ID
+    # 获取群组ID
     guild_id = event.guild_id
-    operator_id = event.member.user.id
-    session_id = event.message.id
-
-    # 检查群组是否具有全局状态, 没有则创建空状态
-    global pool_delete_react_sessions, pool_react_tasks
-    if pool_delete_react_sessions.get(guild_id) is None:
-        pool_delete_react_sessions[guild_id] = {}
 
-    # 检查操作者是否具有会话状态, 没有则结束事件
-    if pool_delete_react_sessions[guild_id].get(operator_id) is None:
+    # 根据消息ID与操作者ID匹配会话, 无匹配结果则结束事件
+    session = pool_react_sessions.get(
+        event.message.id,
+        "delete",
+        event.member.user.id
+    )
+    if session is None:
         await react_delete_sessions.finish()
 
-    # 获取状态
-    status = pool_delete_react_sessions[guild_id][operator_id].get(session_id)
-    assert status is not None, "会话状态必非空."
-
-    # 获取用户ID
-    user_id = status["user_id"]
+    # 获取用户ID, 并结束会话
+    user_id = session.user_id
+    pool_react_sessions.resolve(session, event.data.values)
 
     # 构造提及用户消息
     msg_user = MessageSegment.mention_user(user_id)
 
+    # 获取群组的反应任务
+    tasks = await pool_react_tasks.get(guild_id)
+
     # 删除所有反应
     if "all" in event.data.values:
-        pool_react_tasks[guild_id].pop(user_id, None)
+        tasks.pop(user_id, None)
+        await database.clear(guild_id, user_id)
         await react_delete_sessions.send(
             "已为" + msg_user + "删除所有自动添加的反应."
         )
 
     # 删除指定反应
     else:
-        emojis: List[CustomEmojiSegment | str] = []
-        for emoji in event.data.values:
-            try:
-                emojis.append(
-                    MessageSegment.custom_emoji(**literal_eval(emoji))
-                )
-            except:
-                emojis.append(emoji)
-
+        emojis = [ReactEmoji.decode(value) for value in event.data.values]
+        user_tasks = tasks.get(user_id, {})
         for emoji in emojis:
-            pool_react_tasks[guild_id][user_id].remove(emoji)
+            user_tasks.pop(emoji, None)
 
         # 如果无剩余反应, 则删除用户任务
-        if pool_react_tasks[guild_id][user_id] == []:
-            pool_react_tasks[guild_id].pop(user_id, None)
+        if not user_tasks:
+            tasks.pop(user_id, None)
+        await database.remove(guild_id, user_id, emojis)
 
         msg_emoji = " ".join([str(emoji) for emoji in emojis])
         await react_delete_sessions.send(
             "已为" + msg_user + "删除自动添加的反应: " + msg_emoji
         )
 
-    # 释放会话
-    pool_delete_react_sessions[guild_id][operator_id][session_id]["trigger_react_received"] \
-        .set()
-    pool_delete_react_sessions[guild_id][operator_id].pop(session_id, None)
-
-    # 保存反应任务池到文件
-    save_react_tasks()
-
     # 结束会话状态
     await react_delete_sessions.finish()
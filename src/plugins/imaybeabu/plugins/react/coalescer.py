@@ -0,0 +1,162 @@
+import asyncio
+from typing import Dict, Optional, TypedDict
+
+from nonebot.adapters.discord import Bot
+from nonebot.adapters.discord.api.model import Snowflake
+
+from .database.base import EmojiSet
+from .executor import ReactionExecutor
+
+
+class ReactionBurst(TypedDict):
+    """
+    频道中一个用户连续消息的待应用反应状态.
+    Attributes:
+        bot (Bot): 机器人实例.
+        guild_id (Snowflake): 群组ID.
+        user_id (Snowflake): 用户ID.
+        previous_id (Optional[Snowflake]): 连续消息之前同一用户的消息ID, 需要删除其反应.
+        message_id (Snowflake): 连续消息中最后一条消息的ID.
+        emojis (EmojiSet): 用户的反应集合.
+        timer (Optional[asyncio.TimerHandle]): 延迟应用的定时器.
+    """
+    bot: Bot
+    guild_id: Snowflake
+    user_id: Snowflake
+    previous_id: Optional[Snowflake]
+    message_id: Snowflake
+    emojis: EmojiSet
+    timer: Optional[asyncio.TimerHandle]
+
+
+class ReactionCoalescer:
+    """
+    按频道合并连续消息的自动反应.
+    用户在频道中连续发送消息时, 每条新消息都会重新开始等待,
+    等待结束或其他用户在频道中发言后, 只删除连续消息之前一条消息上的反应,
+    并为最后一条消息添加一次反应, 中间的消息不产生任何反应请求.
+    """
+
+    def __init__(self, executor: ReactionExecutor, delay: float = 1.0) -> None:
+        """
+        初始化反应合并器.
+        Args:
+            executor (ReactionExecutor): 反应请求执行器.
+            delay (float): 最后一条消息后等待的秒数, 不大于0时不合并, 默认为1.0.
+        """
+        self.executor = executor
+        self.delay = delay
+        self._bursts: Dict[Snowflake, ReactionBurst] = {}
+
+    def observe(self, channel_id: Snowflake, user_id: Snowflake) -> None:
+        """
+        观察频道中的一条新消息, 来自其他用户时立即应用该频道待应用的反应.
+        Args:
+            channel_id (Snowflake): 频道ID.
+            user_id (Snowflake): 新消息的作者ID.
+        """
+        burst = self._bursts.get(channel_id)
+        if burst is not None and burst["user_id"] != user_id:
+            self._flush(channel_id)
+
+    def extend(
+        self,
+        channel_id: Snowflake,
+        user_id: Snowflake,
+        message_id: Snowflake
+    ) -> bool:
+        """
+        如果频道中有该用户待应用的反应, 则将新消息并入并重新开始等待.
+        Args:
+            channel_id (Snowflake): 频道ID.
+            user_id (Snowflake): 用户ID.
+            message_id (Snowflake): 新消息ID.
+        Returns:
+            extended (bool): 是否已并入.
+        """
+        burst = self._bursts.get(channel_id)
+        if burst is None or burst["user_id"] != user_id:
+            return False
+        burst["message_id"] = max(burst["message_id"], message_id)
+        self._schedule(channel_id, burst)
+        return True
+
+    def push(
+        self,
+        bot: Bot,
+        guild_id: Snowflake,
+        channel_id: Snowflake,
+        user_id: Snowflake,
+        previous_id: Optional[Snowflake],
+        message_id: Snowflake,
+        emojis: EmojiSet
+    ) -> None:
+        """
+        开始一段新的连续消息, 等待结束后应用反应.
+        Args:
+            bot (Bot): 机器人实例.
+            guild_id (Snowflake): 群组ID.
+            channel_id (Snowflake): 频道ID.
+            user_id (Snowflake): 用户ID.
+            previous_id (Optional[Snowflake]): 之前同一用户的消息ID, 没有时为 None.
+            message_id (Snowflake): 消息ID.
+            emojis (EmojiSet): 用户的反应集合, 应用时读取最新内容.
+        """
+        if channel_id in self._bursts:
+            self._flush(channel_id)
+        burst: ReactionBurst = {
+            "bot": bot,
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "previous_id": previous_id,
+            "message_id": message_id,
+            "emojis": emojis,
+            "timer": None
+        }
+        self._bursts[channel_id] = burst
+        if self.delay > 0:
+            self._schedule(channel_id, burst)
+        else:
+            self._flush(channel_id)
+
+    def close(self) -> None:
+        """
+        取消所有等待中的反应.
+        """
+        for burst in self._bursts.values():
+            if burst["timer"] is not None:
+                burst["timer"].cancel()
+        self._bursts.clear()
+
+    def _schedule(self, channel_id: Snowflake, burst: ReactionBurst) -> None:
+        """
+        重新开始等待.
+        """
+        if burst["timer"] is not None:
+            burst["timer"].cancel()
+        burst["timer"] = asyncio.get_running_loop().call_later(
+            self.delay,
+            self._flush,
+            channel_id
+        )
+
+    def _flush(self, channel_id: Snowflake) -> None:
+        """
+        将频道待应用的反应提交给执行器.
+        """
+        burst = self._bursts.pop(channel_id, None)
+        if burst is None:
+            return
+        if burst["timer"] is not None:
+            burst["timer"].cancel()
+
+        emojis = list(burst["emojis"])
+        if burst["previous_id"] is not None:
+            self.executor.submit(
+                burst["bot"], burst["guild_id"], channel_id,
+                burst["previous_id"], "delete", emojis
+            )
+        self.executor.submit(
+            burst["bot"], burst["guild_id"], channel_id,
+            burst["message_id"], "add", emojis
+        )
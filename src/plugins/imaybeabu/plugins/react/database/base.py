@@ -0,0 +1,214 @@
+from abc import ABC, abstractmethod
+from weakref import WeakValueDictionary
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from nonebot.adapters.discord.api.model import Snowflake
+
+
+class ReactEmoji:
+    """
+    按进程驻留的表情符号, 相同名称与ID的表情符号总是同一个对象,
+    因此比较与哈希都按身份进行, 可以直接存放在集合或字典中.
+    紧凑编码与Discord反应接口的格式相同: Unicode表情符号为其本身,
+    自定义表情符号为 name:id, 动态自定义表情符号为 a:name:id.
+    Attributes:
+        name (str): Unicode表情符号或自定义表情符号名称.
+        id (Optional[Snowflake]): 自定义表情符号ID, Unicode表情符号为 None.
+        animated (bool): 是否为动态自定义表情符号.
+    """
+    __slots__ = ("name", "id", "animated", "__weakref__")
+    _interned: "WeakValueDictionary[Tuple[str, Optional[int]], ReactEmoji]" = \
+        WeakValueDictionary()
+
+    name: str
+    id: Optional[Snowflake]
+    animated: bool
+
+    def __new__(
+        cls,
+        name: str,
+        id: Optional[int] = None,
+        animated: bool = False
+    ) -> "ReactEmoji":
+        """
+        获取驻留的表情符号, 不存在时创建.
+        Args:
+            name (str): Unicode表情符号或自定义表情符号名称.
+            id (Optional[int]): 自定义表情符号ID, Unicode表情符号为 None.
+            animated (bool): 是否为动态自定义表情符号, 默认为 False.
+        Returns:
+            emoji (ReactEmoji): 驻留的表情符号.
+        """
+        key = (name, id)
+        emoji = cls._interned.get(key)
+        if emoji is None:
+            emoji = super().__new__(cls)
+            emoji.name = name
+            emoji.id = None if id is None else Snowflake(id)
+            emoji.animated = animated
+            cls._interned[key] = emoji
+        return emoji
+
+    @classmethod
+    def decode(cls, data: str) -> "ReactEmoji":
+        """
+        从紧凑编码解析表情符号.
+        Args:
+            data (str): 紧凑编码.
+        Returns:
+            emoji (ReactEmoji): 驻留的表情符号.
+        """
+        parts = data.split(":")
+        if len(parts) == 1:
+            return cls(data)
+        assert len(parts) in (2, 3), "自定义表情符号编码必须是 name:id 或 a:name:id."
+        return cls(parts[-2], int(parts[-1]), len(parts) == 3)
+
+    def encode(self) -> str:
+        """
+        获取紧凑编码.
+        Returns:
+            data (str): 紧凑编码.
+        """
+        if self.id is None:
+            return self.name
+        return f"{'a:' if self.animated else ''}{self.name}:{self.id}"
+
+    def __str__(self) -> str:
+        """
+        获取可在消息中显示的格式.
+        """
+        if self.id is None:
+            return self.name
+        return f"<{'a' if self.animated else ''}:{self.name}:{self.id}>"
+
+    def __repr__(self) -> str:
+        return f"ReactEmoji({self.encode()!r})"
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (ReactEmoji, (self.name, self.id, self.animated))
+
+
+Emoji = ReactEmoji
+EmojiSet = Dict[Emoji, None]  # 按插入顺序的表情符号集合
+GuildReactTasks = Dict[
+    Snowflake,  # 用户ID
+    EmojiSet  # 反应集合
+]
+
+
+def encode_emoji(emoji: Emoji) -> str:
+    """
+    将表情符号编码为可持久化的格式.
+    Args:
+        emoji (Emoji): 表情符号.
+    Returns:
+        data (str): 紧凑编码.
+    """
+    return emoji.encode()
+
+
+def decode_emoji(data: Union[str, Dict[str, Any]]) -> Emoji:
+    """
+    将持久化的表情符号解码为表情符号, 兼容旧版的自定义表情符号数据字典.
+    Args:
+        data (Union[str, Dict[str, Any]]): 紧凑编码或旧版自定义表情符号的数据字典.
+    Returns:
+        emoji (Emoji): 表情符号.
+    """
+    if isinstance(data, dict) and "id" in data:
+        return ReactEmoji(
+            data["name"],
+            int(data["id"]),
+            bool(data.get("animated", False))
+        )
+    assert isinstance(data, str), "表情符号必须是字符串或自定义表情符号字典."
+    return ReactEmoji.decode(data)
+
+
+def decode_emojis(data: Iterable[Union[str, Dict[str, Any]]]) -> EmojiSet:
+    """
+    将持久化的反应列表解码为表情符号集合.
+    Args:
+        data (Iterable[Union[str, Dict[str, Any]]]): 持久化的反应列表.
+    Returns:
+        emojis (EmojiSet): 按原顺序的表情符号集合.
+    """
+    return dict.fromkeys(decode_emoji(emoji) for emoji in data)
+
+
+class ReactDatabaseBase(ABC):
+    """
+    抽象基类, 定义了反应任务存储的基本接口.
+    反应任务按群组分片, 每个群组在首次使用时加载, 空闲时卸载.
+    每次修改只写入发生变化的群组用户, 不重写整个反应任务池.
+    """
+
+    async def setup(self) -> None:
+        """
+        在启动时准备存储, 耗时不应随群组数量增长. 默认无需准备.
+        """
+        pass
+
+    @abstractmethod
+    async def load(self, guild_id: int) -> GuildReactTasks:
+        """
+        加载一个群组的反应任务.
+        Args:
+            guild_id (int): 群组ID.
+        Returns:
+            tasks (GuildReactTasks): 用户ID与反应列表的映射.
+        """
+        pass
+
+    async def unload(self, guild_id: int) -> None:
+        """
+        卸载一个群组, 释放其占用的资源. 默认无需释放.
+        卸载后仍可修改该群组, 存储应在需要时重新加载.
+        Args:
+            guild_id (int): 群组ID.
+        """
+        pass
+
+    @abstractmethod
+    async def add(self, guild_id: int, user_id: int, emoji: Emoji) -> None:
+        """
+        为用户添加一个反应, 已存在时不重复添加.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            emoji (Emoji): 表情符号.
+        """
+        pass
+
+    @abstractmethod
+    async def remove(
+        self,
+        guild_id: int,
+        user_id: int,
+        emojis: Iterable[Emoji]
+    ) -> None:
+        """
+        为用户移除若干反应, 无剩余反应时移除用户.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            emojis (Iterable[Emoji]): 表情符号.
+        """
+        pass
+
+    @abstractmethod
+    async def clear(self, guild_id: int, user_id: int) -> None:
+        """
+        移除用户的所有反应.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+        """
+        pass
+
+    async def close(self) -> None:
+        """
+        在关闭时释放连接. 默认无需释放.
+        """
+        pass
@@ -0,0 +1,391 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import ujson as json
+from nonebot import logger
+from nonebot.adapters.discord.api.model import Snowflake
+
+from .base import Emoji, GuildReactTasks, encode_emoji, decode_emoji, decode_emojis
+from .base import ReactDatabaseBase as DatabaseBase
+
+
+def normalize_emoji(data: Any) -> str:
+    """
+    将持久化的表情符号统一为紧凑编码.
+    Args:
+        data (Any): 紧凑编码或旧版自定义表情符号的数据字典.
+    Returns:
+        data (str): 紧凑编码.
+    """
+    return data if isinstance(data, str) else encode_emoji(decode_emoji(data))
+
+
+class ReactJournalShard:
+    """
+    单个群组的快照与日志. 文件操作只在存储的专用线程中调用.
+    Attributes:
+        data (Dict[str, List[str]]): 用户ID与紧凑编码反应列表的映射.
+        records (int): 上次压缩后追加的日志记录数.
+        ready (Optional[asyncio.Future]): 恢复完成的 Future.
+        compaction (Optional[asyncio.Future]): 正在进行的后台压缩.
+    """
+
+    def __init__(self, path_snapshot: str, path_journal: str) -> None:
+        """
+        初始化群组分片.
+        Args:
+            path_snapshot (str): 快照文件路径.
+            path_journal (str): 日志文件路径.
+        """
+        self.path_snapshot = path_snapshot
+        self.path_journal = path_journal
+        self.data: Dict[str, List[str]] = {}
+        self.records = 0
+        self.ready: Optional[asyncio.Future] = None
+        self.compaction: Optional[asyncio.Future] = None
+        self._journal: Optional[Any] = None
+
+    def apply(self, record: Dict[str, Any]) -> None:
+        """
+        将日志记录应用到内存状态.
+        旧版记录中的自定义表情符号数据字典会转换为紧凑编码.
+        Args:
+            record (Dict[str, Any]): 日志记录.
+        """
+        emojis = self.data.get(record["u"], [])
+        match record["op"]:
+            case "add":
+                emojis += [
+                    e for e in map(normalize_emoji, record["e"]) if e not in emojis
+                ]
+            case "remove":
+                removed = set(map(normalize_emoji, record["e"]))
+                emojis = [e for e in emojis if e not in removed]
+            case "clear":
+                emojis = []
+        if emojis:
+            self.data[record["u"]] = emojis
+        else:
+            self.data.pop(record["u"], None)
+
+    def recover(self) -> None:
+        """
+        读取快照并重放日志.
+        日志末尾因中断而不完整的记录会被忽略.
+        """
+        if os.path.exists(self.path_snapshot):
+            with open(self.path_snapshot, "r", encoding="utf-8") as f:
+                self.data = {
+                    user_id: list(dict.fromkeys(map(normalize_emoji, emojis)))
+                    for user_id, emojis in json.load(f).items()
+                }
+
+        if os.path.exists(self.path_journal):
+            with open(self.path_journal, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning(
+                            "[ImaybeAbu.React] "
+                            "忽略反应任务日志中不完整的记录."
+                        )
+                        continue
+                    self.apply(record)
+                    self.records += 1
+
+    def append(self, line: str) -> None:
+        """
+        向日志追加一行.
+        """
+        if self._journal is None:
+            os.makedirs(os.path.dirname(self.path_journal), exist_ok=True)
+            self._journal = open(self.path_journal, "a", encoding="utf-8")
+        self._journal.write(line)
+        self._journal.flush()
+
+    def compact(self, snapshot: str) -> None:
+        """
+        原子替换快照并清空日志.
+        """
+        os.makedirs(os.path.dirname(self.path_snapshot), exist_ok=True)
+        path_temp = self.path_snapshot + ".tmp"
+        with open(path_temp, "w", encoding="utf-8") as f:
+            f.write(snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path_temp, self.path_snapshot)
+
+        self.close()
+        open(self.path_journal, "w", encoding="utf-8").close()
+
+    def close(self) -> None:
+        """
+        关闭日志文件.
+        """
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class ReactDatabaseJournal(DatabaseBase):
+    """
+    按群组分片的快照加日志反应任务存储.
+    每个群组对应目录下的 <群组ID>.json 快照与 <群组ID>.journal 日志,
+    群组在首次加载或修改时读取快照并按顺序重放日志, 卸载时压缩并关闭文件.
+    每次修改只向对应群组的日志追加一行紧凑记录, 日志记录数超过阈值时在后台压缩:
+    将群组状态写入临时文件后原子替换快照, 再清空日志.
+    所有文件操作都在同一专用线程中按提交顺序执行,
+    因此压缩前提交的记录必定包含在快照中, 之后提交的记录必定写入新日志.
+    日志记录均为幂等的集合操作, 即使压缩在替换快照后中断, 重放旧日志也得到相同状态.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        compact_threshold: int = 1000,
+        path_legacy_snapshot: Optional[str] = None,
+        path_legacy_journal: Optional[str] = None
+    ) -> None:
+        """
+        初始化日志存储.
+        Args:
+            directory (str): 群组分片所在目录.
+            compact_threshold (int): 触发压缩的单个群组日志记录数, 默认为1000.
+            path_legacy_snapshot (Optional[str]): 旧版不分片的快照文件路径.
+            path_legacy_journal (Optional[str]): 旧版不分片的日志文件路径.
+        """
+        self.directory = directory
+        self.compact_threshold = compact_threshold
+        self.path_legacy_snapshot = path_legacy_snapshot
+        self.path_legacy_journal = path_legacy_journal
+        self._shards: Dict[str, ReactJournalShard] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="react-journal"
+        )
+
+    async def setup(self) -> None:
+        """
+        存在旧版不分片的文件时将其拆分为群组分片, 否则无需读取任何文件.
+        """
+        legacy = [
+            path for path in (self.path_legacy_snapshot, self.path_legacy_journal)
+            if path is not None
+        ]
+        if any(os.path.exists(path) for path in legacy):
+            await self._run(self._migrate_legacy)
+
+    async def load(self, guild_id: int) -> GuildReactTasks:
+        """
+        读取群组的快照并重放日志.
+        Args:
+            guild_id (int): 群组ID.
+        Returns:
+            tasks (GuildReactTasks): 用户ID与反应列表的映射.
+        """
+        shard = await self._acquire(guild_id)
+        return {
+            Snowflake(user_id): decode_emojis(emojis)
+            for user_id, emojis in shard.data.items()
+        }
+
+    async def unload(self, guild_id: int) -> None:
+        """
+        压缩群组日志并关闭文件, 释放群组的内存状态.
+        Args:
+            guild_id (int): 群组ID.
+        """
+        shard = self._shards.pop(str(guild_id), None)
+        if shard is None:
+            return
+        await self._release(shard)
+
+    async def add(self, guild_id: int, user_id: int, emoji: Emoji) -> None:
+        """
+        为用户添加一个反应, 已存在时不重复添加.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            emoji (Emoji): 表情符号.
+        """
+        await self._commit(
+            guild_id,
+            {"op": "add", "u": str(user_id), "e": [encode_emoji(emoji)]}
+        )
+
+    async def remove(
+        self,
+        guild_id: int,
+        user_id: int,
+        emojis: Iterable[Emoji]
+    ) -> None:
+        """
+        为用户移除若干反应, 无剩余反应时移除用户.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            emojis (Iterable[Emoji]): 表情符号.
+        """
+        await self._commit(
+            guild_id,
+            {"op": "remove", "u": str(user_id),
+             "e": [encode_emoji(emoji) for emoji in emojis]}
+        )
+
+    async def clear(self, guild_id: int, user_id: int) -> None:
+        """
+        移除用户的所有反应.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+        """
+        await self._commit(guild_id, {"op": "clear", "u": str(user_id)})
+
+    async def close(self) -> None:
+        """
+        压缩所有已加载群组的日志并关闭文件.
+        """
+        shards = list(self._shards.values())
+        self._shards.clear()
+        for shard in shards:
+            await self._release(shard)
+        self._executor.shutdown(wait=True)
+
+    def _create_shard(self, guild_id: str) -> ReactJournalShard:
+        """
+        创建群组分片对象, 不读取文件.
+        Args:
+            guild_id (str): 群组ID.
+        Returns:
+            shard (ReactJournalShard): 群组分片.
+        """
+        return ReactJournalShard(
+            os.path.join(self.directory, f"{guild_id}.json"),
+            os.path.join(self.directory, f"{guild_id}.journal")
+        )
+
+    async def _acquire(self, guild_id: int) -> ReactJournalShard:
+        """
+        获取群组分片, 首次使用时在专用线程中恢复, 并发的调用共享同一次恢复.
+        Args:
+            guild_id (int): 群组ID.
+        Returns:
+            shard (ReactJournalShard): 已恢复的群组分片.
+        """
+        key = str(guild_id)
+        shard = self._shards.get(key)
+        if shard is None:
+            shard = self._shards[key] = self._create_shard(key)
+            shard.ready = asyncio.ensure_future(self._run(shard.recover))
+        assert shard.ready is not None, "群组分片创建时必定开始恢复."
+        await shard.ready
+        return shard
+
+    async def _release(self, shard: ReactJournalShard) -> None:
+        """
+        等待分片恢复与后台压缩完成, 有新记录时压缩日志, 然后关闭文件.
+        Args:
+            shard (ReactJournalShard): 已从分片表中移除的群组分片.
+        """
+        assert shard.ready is not None, "群组分片创建时必定开始恢复."
+        await asyncio.wait([shard.ready])
+        if shard.compaction is not None:
+            await asyncio.wait([shard.compaction])
+        if shard.records:
+            await self._run(
+                shard.compact,
+                json.dumps(shard.data, ensure_ascii=False)
+            )
+        await self._run(shard.close)
+
+    async def _commit(self, guild_id: int, record: Dict[str, Any]) -> None:
+        """
+        应用记录并追加到群组日志, 记录数超过阈值时安排压缩.
+        Args:
+            guild_id (int): 群组ID.
+            record (Dict[str, Any]): 日志记录.
+        """
+        shard = await self._acquire(guild_id)
+        shard.apply(record)
+        shard.records += 1
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        if shard.records < self.compact_threshold:
+            await self._run(shard.append, line)
+            return
+
+        # 快照在提交时序列化, 与日志追加共用同一线程保证顺序
+        shard.records = 0
+        snapshot = json.dumps(shard.data, ensure_ascii=False)
+        await self._run(shard.append, line)
+        shard.compaction = asyncio.ensure_future(
+            self._run(shard.compact, snapshot)
+        )
+        shard.compaction.add_done_callback(self._report)
+
+    @staticmethod
+    def _report(future: asyncio.Future) -> None:
+        """
+        记录后台压缩的错误, 压缩失败时日志保留, 下次压缩时重试.
+        """
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(
+                "[ImaybeAbu.React] "
+                f"反应任务日志压缩失败: {future.exception()}"
+            )
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        在专用线程中执行函数.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _migrate_legacy(self) -> None:
+        """
+        将旧版不分片的快照与日志拆分为群组分片, 只在专用线程中调用.
+        旧版日志记录包含群组ID, 按群组重放到对应分片.
+        迁移完成后旧版文件重命名为 .migrated 后缀, 不再读取.
+        """
+        shards: Dict[str, ReactJournalShard] = {}
+        path_snapshot = self.path_legacy_snapshot
+        path_journal = self.path_legacy_journal
+
+        if path_snapshot is not None and os.path.exists(path_snapshot):
+            with open(path_snapshot, "r", encoding="utf-8") as f:
+                for guild_id, users in json.load(f).items():
+                    shards[guild_id] = self._create_shard(guild_id)
+                    for user_id, emojis in users.items():
+                        shards[guild_id].apply(
+                            {"op": "add", "u": user_id, "e": emojis}
+                        )
+
+        if path_journal is not None and os.path.exists(path_journal):
+            with open(path_journal, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning(
+                            "[ImaybeAbu.React] "
+                            "忽略反应任务日志中不完整的记录."
+                        )
+                        continue
+                    guild_id = record["g"]
+                    if guild_id not in shards:
+                        shards[guild_id] = self._create_shard(guild_id)
+                    shards[guild_id].apply(record)
+
+        for shard in shards.values():
+            if shard.data:
+                shard.compact(json.dumps(shard.data, ensure_ascii=False))
+
+        for path in (path_snapshot, path_journal):
+            if path is not None and os.path.exists(path):
+                os.replace(path, path + ".migrated")
+        logger.info(
+            "[ImaybeAbu.React] "
+            f"已将旧版反应任务池拆分为 {len(shards)} 个群组分片."
+        )
@@ -0,0 +1,155 @@
+from typing import Iterable
+
+import pymongo
+from pymongo import AsyncMongoClient, IndexModel, UpdateOne
+from nonebot.adapters.discord.api.model import Snowflake
+
+from .base import Emoji, GuildReactTasks, encode_emoji, decode_emojis
+from .base import ReactDatabaseBase as DatabaseBase
+
+DATABASE_NAME = "IMaybeAbu"
+COLLECTION_TASKS = "ReactTasks"
+COLLECTION_LEGACY = "React"
+
+
+class ReactDatabase(DatabaseBase, AsyncMongoClient):
+    """
+    MongoDB实现的反应任务存储.
+    每个群组用户对应一个文档 {guild_id, user_id, emojis},
+    添加与移除通过 $addToSet 与 $pull 只修改对应文档,
+    群组通过 guild_id 索引前缀按需加载.
+    Attributes:
+        tasks (AsyncCollection): 反应任务集合.
+    """
+
+    def __init__(self, uri: str) -> None:
+        """
+        初始化MongoDB连接, 连接在首次操作时建立.
+        Args:
+            uri (str): MongoDB连接URI.
+        """
+        AsyncMongoClient.__init__(self, uri)
+        self.tasks = self[DATABASE_NAME][COLLECTION_TASKS]
+
+    async def setup(self) -> None:
+        """
+        确保索引存在, 并在首次启动时迁移旧版单文档数据.
+        """
+        await self.tasks.create_indexes(
+            [
+                IndexModel(
+                    [
+                        ("guild_id", pymongo.ASCENDING),
+                        ("user_id", pymongo.ASCENDING)
+                    ],
+                    unique=True
+                )
+            ]
+        )
+        await self._migrate_legacy()
+
+    async def load(self, guild_id: int) -> GuildReactTasks:
+        """
+        通过异步游标加载一个群组的反应任务.
+        仍保存旧版自定义表情符号数据字典的文档会在加载时改写为紧凑编码.
+        Args:
+            guild_id (int): 群组ID.
+        Returns:
+            tasks (GuildReactTasks): 用户ID与反应集合的映射.
+        """
+        tasks: GuildReactTasks = {}
+        requests = []
+        async for document in self.tasks.find(
+            {"guild_id": int(guild_id)},
+            {"_id": 0, "user_id": 1, "emojis": 1}
+        ):
+            emojis = decode_emojis(document["emojis"])
+            tasks[Snowflake(document["user_id"])] = emojis
+            if not all(isinstance(emoji, str) for emoji in document["emojis"]):
+                requests.append(
+                    UpdateOne(
+                        {"guild_id": int(guild_id), "user_id": document["user_id"]},
+                        {"$set": {"emojis": [encode_emoji(e) for e in emojis]}}
+                    )
+                )
+        if requests:
+            await self.tasks.bulk_write(requests, ordered=False)
+        return tasks
+
+    async def add(self, guild_id: int, user_id: int, emoji: Emoji) -> None:
+        """
+        为用户添加一个反应, 已存在时不重复添加.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            emoji (Emoji): 表情符号.
+        """
+        await self.tasks.update_one(
+            {"guild_id": int(guild_id), "user_id": int(user_id)},
+            {"$addToSet": {"emojis": encode_emoji(emoji)}},
+            upsert=True
+        )
+
+    async def remove(
+        self,
+        guild_id: int,
+        user_id: int,
+        emojis: Iterable[Emoji]
+    ) -> None:
+        """
+        为用户移除若干反应, 无剩余反应时移除用户.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            emojis (Iterable[Emoji]): 表情符号.
+        """
+        query = {"guild_id": int(guild_id), "user_id": int(user_id)}
+        await self.tasks.update_one(
+            query,
+            {"$pull": {"emojis": {"$in": [encode_emoji(e) for e in emojis]}}}
+        )
+        await self.tasks.delete_one({**query, "emojis": {"$size": 0}})
+
+    async def clear(self, guild_id: int, user_id: int) -> None:
+        """
+        移除用户的所有反应.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+        """
+        await self.tasks.delete_one(
+            {"guild_id": int(guild_id), "user_id": int(user_id)}
+        )
+
+    async def close(self) -> None:
+        """
+        关闭MongoDB连接.
+        """
+        await AsyncMongoClient.close(self)
+
+    async def _migrate_legacy(self) -> None:
+        """
+        将旧版保存在单个文档中的反应任务池拆分为每个群组用户一个文档.
+        只在新集合为空时执行, 旧文档保留不变.
+        """
+        if await self.tasks.find_one({}, {"_id": 1}) is not None:
+            return
+        legacy = await self[DATABASE_NAME][COLLECTION_LEGACY].find_one(
+            {},
+            {"_id": 0}
+        )
+        if not legacy:
+            return
+
+        requests = [
+            UpdateOne(
+                {"guild_id": int(guild_id), "user_id": int(user_id)},
+                {"$addToSet": {"emojis": {"$each": emojis}}},
+                upsert=True
+            )
+            for guild_id, users in legacy.items()
+            for user_id, emojis in users.items()
+            if emojis
+        ]
+        if requests:
+            await self.tasks.bulk_write(requests, ordered=False)
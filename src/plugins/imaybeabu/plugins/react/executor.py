@@ -0,0 +1,279 @@
+import time
+import asyncio
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
+
+from nonebot import logger
+from nonebot.adapters.discord import Bot
+from nonebot.adapters.discord.api import API_HANDLERS
+from nonebot.adapters.discord.exception import RateLimitException
+from nonebot.adapters.discord.api.model import Snowflake
+
+from .database.base import Emoji
+
+create_reaction = API_HANDLERS["create_reaction"]
+delete_own_reaction = API_HANDLERS["delete_own_reaction"]
+
+ReactionOp = Tuple[
+    Literal["add", "delete"],  # 操作
+    Emoji  # 表情符号
+]
+
+
+class ReactionStats:
+    """
+    群组的反应请求统计.
+    Attributes:
+        calls (int): 已完成的请求数, 包括失败与被限流的请求.
+        rate_limited (int): 收到429响应的次数.
+        failures (int): 最终失败的反应操作数.
+        latency_total (float): 请求总耗时, 单位为秒.
+        latency_max (float): 单次请求最大耗时, 单位为秒.
+    """
+    __slots__ = ("calls", "rate_limited", "failures", "latency_total", "latency_max")
+
+    def __init__(self) -> None:
+        """
+        初始化空统计.
+        """
+        self.calls = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record(self, latency: float) -> None:
+        """
+        记录一次请求耗时.
+        Args:
+            latency (float): 请求耗时, 单位为秒.
+        """
+        self.calls += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+
+class RateLimitBucket:
+    """
+    一个限流桶内的请求并发控制.
+    收到429响应后, 桶内所有请求都等待到退避结束再发送.
+    Attributes:
+        reset_at (float): 桶可再次发送请求的单调时间.
+        users (int): 正在使用或等待该桶的请求数.
+    """
+
+    def __init__(self, concurrency: int) -> None:
+        """
+        初始化限流桶.
+        Args:
+            concurrency (int): 桶内最大并发请求数.
+        """
+        self.reset_at = 0.0
+        self.users = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self) -> None:
+        await self._semaphore.acquire()
+        delay = self.reset_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def __aexit__(self, *args: object) -> None:
+        self._semaphore.release()
+
+
+class ReactionExecutor:
+    """
+    并发且感知限流的反应请求执行器.
+    每条消息的反应操作按提交顺序排队, 由该消息唯一的工作任务执行:
+    连续的删除操作并发发送, 添加操作逐个发送以保持反应的显示顺序.
+    不同消息的队列相互独立, 因此删除上一条消息的反应与为新消息添加反应同时进行.
+    尚未发送的相反操作 (对同一消息同一表情先添加后删除, 或先删除后添加) 互相抵消.
+    Discord的反应路由以频道为主要参数, 同一频道的请求共用一个限流桶;
+    适配器的限流异常不携带响应头, 因此收到429后按指数退避暂停整个桶并重试.
+    Attributes:
+        stats (Dict[Snowflake, ReactionStats]): 群组ID与反应请求统计的映射.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        max_retries: int = 3,
+        backoff: float = 1.0
+    ) -> None:
+        """
+        初始化反应请求执行器.
+        Args:
+            concurrency (int): 每个限流桶的最大并发请求数, 默认为4.
+            max_retries (int): 被限流后的最大重试次数, 默认为3.
+            backoff (float): 首次被限流后的退避秒数, 之后每次翻倍, 默认为1.0.
+        """
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.stats: Dict[Snowflake, ReactionStats] = {}
+        self._buckets: Dict[Snowflake, RateLimitBucket] = {}
+        self._queues: Dict[Tuple[Snowflake, Snowflake], List[ReactionOp]] = {}
+        self._workers: Dict[Tuple[Snowflake, Snowflake], asyncio.Task] = {}
+
+    def submit(
+        self,
+        bot: Bot,
+        guild_id: Snowflake,
+        channel_id: Snowflake,
+        message_id: Snowflake,
+        op: Literal["add", "delete"],
+        emojis: Iterable[Emoji]
+    ) -> None:
+        """
+        提交一条消息的反应操作, 立即返回, 失败时记录警告.
+        Args:
+            bot (Bot): 机器人实例.
+            guild_id (Snowflake): 群组ID.
+            channel_id (Snowflake): 频道ID.
+            message_id (Snowflake): 消息ID.
+            op (Literal["add", "delete"]): 添加反应或删除自己的反应.
+            emojis (Iterable[Emoji]): 按顺序操作的表情符号.
+        """
+        key = (channel_id, message_id)
+        queue = self._queues.setdefault(key, [])
+        opposite = "delete" if op == "add" else "add"
+        for emoji in emojis:
+            if (opposite, emoji) in queue:
+                queue.remove((opposite, emoji))
+            elif (op, emoji) not in queue:
+                queue.append((op, emoji))
+
+        if key not in self._workers:
+            worker = asyncio.create_task(
+                self._work(bot, guild_id, channel_id, message_id)
+            )
+            self._workers[key] = worker
+
+    def get_stats(self, guild_id: Optional[Snowflake] = None) -> Dict[str, float]:
+        """
+        获取群组的反应请求统计.
+        Args:
+            guild_id (Optional[Snowflake]): 群组ID, 默认汇总所有群组.
+        Returns:
+            stats (Dict[str, float]): 请求数, 429次数, 失败数, 平均与最大耗时.
+        """
+        if guild_id is not None:
+            stats = self.stats.get(guild_id, ReactionStats())
+        else:
+            stats = ReactionStats()
+            for item in self.stats.values():
+                stats.calls += item.calls
+                stats.rate_limited += item.rate_limited
+                stats.failures += item.failures
+                stats.latency_total += item.latency_total
+                stats.latency_max = max(stats.latency_max, item.latency_max)
+        return {
+            "calls": stats.calls,
+            "rate_limited": stats.rate_limited,
+            "failures": stats.failures,
+            "latency_avg": stats.latency_total / stats.calls if stats.calls else 0.0,
+            "latency_max": stats.latency_max
+        }
+
+    async def close(self) -> None:
+        """
+        取消所有未完成的反应操作.
+        """
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        if workers:
+            await asyncio.wait(workers)
+        self._queues.clear()
+
+    async def _work(
+        self,
+        bot: Bot,
+        guild_id: Snowflake,
+        channel_id: Snowflake,
+        message_id: Snowflake
+    ) -> None:
+        """
+        按顺序执行一条消息队列中的反应操作, 队列为空时结束.
+        """
+        key = (channel_id, message_id)
+        queue = self._queues[key]
+        try:
+            while queue:
+                # 连续的删除操作互不影响顺序, 并发发送
+                if queue[0][0] == "delete":
+                    batch: List[ReactionOp] = []
+                    while queue and queue[0][0] == "delete":
+                        batch.append(queue.pop(0))
+                else:
+                    batch = [queue.pop(0)]
+                await asyncio.gather(
+                    *(
+                        self._call(bot, guild_id, channel_id, message_id, op)
+                        for op in batch
+                    )
+                )
+        finally:
+            # 与队列同步移除, 之后提交的操作会启动新的工作任务
+            self._queues.pop(key, None)
+            self._workers.pop(key, None)
+
+    async def _call(
+        self,
+        bot: Bot,
+        guild_id: Snowflake,
+        channel_id: Snowflake,
+        message_id: Snowflake,
+        op: ReactionOp
+    ) -> None:
+        """
+        在频道的限流桶内发送一个反应请求, 被限流时退避重试.
+        """
+        action, emoji = op
+        api = create_reaction if action == "add" else delete_own_reaction
+        stats = self.stats.setdefault(guild_id, ReactionStats())
+
+        bucket = self._buckets.get(channel_id)
+        if bucket is None:
+            bucket = self._buckets[channel_id] = RateLimitBucket(self.concurrency)
+        bucket.users += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                async with bucket:
+                    start = time.monotonic()
+                    try:
+                        await api(
+                            bot.adapter, bot, channel_id, message_id,
+                            emoji.name, emoji.id
+                        )
+                    except RateLimitException:
+                        stats.record(time.monotonic() - start)
+                        stats.rate_limited += 1
+                        bucket.reset_at = max(
+                            bucket.reset_at,
+                            time.monotonic() + self.backoff * 2 ** attempt
+                        )
+                        continue
+                    except Exception as e:
+                        stats.record(time.monotonic() - start)
+                        stats.failures += 1
+                        logger.warning(
+                            "[ImaybeAbu.React] "
+                            f"反应操作失败: {action} {emoji} "
+                            f"消息 {message_id}: {e}"
+                        )
+                        return
+                    stats.record(time.monotonic() - start)
+                    return
+
+            stats.failures += 1
+            logger.warning(
+                "[ImaybeAbu.React] "
+                f"反应操作多次被限流, 已放弃: {action} {emoji} "
+                f"消息 {message_id}"
+            )
+        finally:
+            # 空闲且不在退避中的限流桶不再保留
+            bucket.users -= 1
+            if bucket.users == 0 and bucket.reset_at <= time.monotonic():
+                self._buckets.pop(channel_id, None)
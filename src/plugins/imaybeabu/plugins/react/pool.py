@@ -0,0 +1,138 @@
+import time
+import asyncio
+from typing import Dict
+
+from nonebot import logger
+from nonebot.adapters.discord.api.model import Snowflake
+
+from .database.base import GuildReactTasks
+from .database.base import ReactDatabaseBase as DatabaseBase
+
+
+class ReactTaskPool:
+    """
+    按群组懒加载的反应任务池.
+    群组的反应任务在首次使用时从存储加载, 空闲超过时限后卸载,
+    内存占用只与活跃群组数量相关, 启动时无需加载任何群组.
+    空闲检查在访问时顺带进行, 不需要后台任务.
+    群组在卸载完成前再次被访问时, 等待卸载完成后再加载.
+    """
+
+    def __init__(
+        self,
+        database: DatabaseBase,
+        idle_timeout: float = 3600,
+        sweep_interval: float = 300
+    ) -> None:
+        """
+        初始化反应任务池.
+        Args:
+            database (DatabaseBase): 反应任务存储.
+            idle_timeout (float): 群组空闲多少秒后卸载, 默认为3600.
+            sweep_interval (float): 两次空闲检查的最小间隔秒数, 默认为300.
+        """
+        self.database = database
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self._guilds: Dict[Snowflake, GuildReactTasks] = {}
+        self._last_used: Dict[Snowflake, float] = {}
+        self._loading: Dict[Snowflake, asyncio.Future] = {}
+        self._unloading: Dict[Snowflake, asyncio.Future] = {}
+        self._last_sweep = time.monotonic()
+
+    async def get(self, guild_id: Snowflake) -> GuildReactTasks:
+        """
+        获取群组的反应任务, 未加载时从存储加载, 并发的首次访问共享同一次加载.
+        Args:
+            guild_id (Snowflake): 群组ID.
+        Returns:
+            tasks (GuildReactTasks): 用户ID与反应列表的映射, 修改会保留在池中.
+        """
+        # 先更新使用时间, 正在访问的群组不会被本次空闲检查卸载
+        now = time.monotonic()
+        self._last_used[guild_id] = now
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            self._sweep(now)
+
+        tasks = self._guilds.get(guild_id)
+        if tasks is not None:
+            return tasks
+
+        loading = self._loading.get(guild_id)
+        if loading is None:
+            loading = self._loading[guild_id] = asyncio.ensure_future(
+                self._load(guild_id)
+            )
+        return await asyncio.shield(loading)
+
+    async def close(self) -> None:
+        """
+        等待卸载完成并关闭存储.
+        """
+        if self._unloading:
+            await asyncio.wait(list(self._unloading.values()))
+        self._guilds.clear()
+        self._last_used.clear()
+        await self.database.close()
+
+    async def _load(self, guild_id: Snowflake) -> GuildReactTasks:
+        """
+        从存储加载群组的反应任务.
+        加载失败时返回空任务且不放入池中, 下次访问时重试.
+        Args:
+            guild_id (Snowflake): 群组ID.
+        Returns:
+            tasks (GuildReactTasks): 用户ID与反应列表的映射.
+        """
+        try:
+            # 卸载会压缩并截断群组的存储, 必须在重新加载前完成
+            unloading = self._unloading.get(guild_id)
+            if unloading is not None:
+                await asyncio.wait([unloading])
+            tasks = await self.database.load(guild_id)
+        except Exception as e:
+            logger.warning(
+                "[ImaybeAbu.React] "
+                f"无法加载群组 {guild_id} 的反应任务, "
+                "将暂时使用空任务."
+                "错误信息: "
+                + str(e)
+            )
+            return {}
+        finally:
+            self._loading.pop(guild_id, None)
+        self._guilds[guild_id] = tasks
+        return tasks
+
+    def _sweep(self, now: float) -> None:
+        """
+        卸载空闲超过时限的群组.
+        Args:
+            now (float): 当前单调时间.
+        """
+        idle = [
+            guild_id for guild_id, last_used in self._last_used.items()
+            if now - last_used >= self.idle_timeout
+        ]
+        for guild_id in idle:
+            self._last_used.pop(guild_id)
+            if self._guilds.pop(guild_id, None) is None:
+                continue
+            unloading = asyncio.ensure_future(self.database.unload(guild_id))
+            self._unloading[guild_id] = unloading
+            unloading.add_done_callback(
+                lambda future, guild_id=guild_id: self._report(guild_id, future)
+            )
+
+    def _report(self, guild_id: Snowflake, future: asyncio.Future) -> None:
+        """
+        释放已完成的卸载并记录错误.
+        """
+        if self._unloading.get(guild_id) is future:
+            del self._unloading[guild_id]
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(
+                "[ImaybeAbu.React] "
+                f"反应任务群组卸载失败: {future.exception()}"
+            )
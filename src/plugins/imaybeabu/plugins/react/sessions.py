@@ -0,0 +1,172 @@
+import time
+import heapq
+import asyncio
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from nonebot.adapters.discord.api.model import Snowflake
+
+SessionKind = Literal["add", "delete"]
+
+
+class ReactSession:
+    """
+    一个等待操作者响应的自动反应会话.
+    Attributes:
+        message_id (Snowflake): 会话消息ID.
+        kind (SessionKind): 会话类型, 增加反应或删除反应.
+        operator_id (Snowflake): 操作者ID.
+        user_id (Snowflake): 被设置自动反应的用户ID.
+        expires_at (float): 过期的单调时间.
+        result (asyncio.Future): 会话结果, 过期时为 None.
+    """
+    __slots__ = ("message_id", "kind", "operator_id", "user_id", "expires_at", "result")
+
+    def __init__(
+        self,
+        message_id: Snowflake,
+        kind: SessionKind,
+        operator_id: Snowflake,
+        user_id: Snowflake,
+        expires_at: float
+    ) -> None:
+        """
+        初始化会话.
+        Args:
+            message_id (Snowflake): 会话消息ID.
+            kind (SessionKind): 会话类型.
+            operator_id (Snowflake): 操作者ID.
+            user_id (Snowflake): 被设置自动反应的用户ID.
+            expires_at (float): 过期的单调时间.
+        """
+        self.message_id = message_id
+        self.kind = kind
+        self.operator_id = operator_id
+        self.user_id = user_id
+        self.expires_at = expires_at
+        self.result: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class ReactSessionRegistry:
+    """
+    按会话消息ID索引的自动反应会话表.
+    反应与组件事件都携带会话消息ID, 因此查找只需一次字典访问.
+    过期时间保存在最小堆中, 由唯一的后台任务按时结束会话;
+    会话结束时立即从表中移除, 堆中的旧条目在到期时丢弃, 内存占用只与近期会话数相关.
+    没有会话时后台任务退出, 下次打开会话时重新启动.
+    """
+
+    def __init__(self, timeout: float = 30) -> None:
+        """
+        初始化会话表.
+        Args:
+            timeout (float): 默认的会话超时秒数, 默认为30.
+        """
+        self.timeout = timeout
+        self._sessions: Dict[Snowflake, ReactSession] = {}
+        self._expiry: List[Tuple[float, Snowflake]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def open(
+        self,
+        message_id: Snowflake,
+        kind: SessionKind,
+        operator_id: Snowflake,
+        user_id: Snowflake,
+        timeout: Optional[float] = None
+    ) -> ReactSession:
+        """
+        打开一个会话.
+        Args:
+            message_id (Snowflake): 会话消息ID.
+            kind (SessionKind): 会话类型.
+            operator_id (Snowflake): 操作者ID.
+            user_id (Snowflake): 被设置自动反应的用户ID.
+            timeout (Optional[float]): 超时秒数, 默认使用会话表的超时.
+        Returns:
+            session (ReactSession): 会话.
+        """
+        expires_at = time.monotonic() + (self.timeout if timeout is None else timeout)
+        session = ReactSession(message_id, kind, operator_id, user_id, expires_at)
+        self._sessions[message_id] = session
+
+        # 新会话早于当前最早的过期时间时唤醒后台任务重新计时
+        if not self._expiry or expires_at < self._expiry[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._expiry, (expires_at, message_id))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._expire())
+        return session
+
+    def get(
+        self,
+        message_id: Snowflake,
+        kind: SessionKind,
+        operator_id: Snowflake
+    ) -> Optional[ReactSession]:
+        """
+        查找操作者在一条消息上的会话.
+        Args:
+            message_id (Snowflake): 会话消息ID.
+            kind (SessionKind): 会话类型.
+            operator_id (Snowflake): 操作者ID.
+        Returns:
+            session (Optional[ReactSession]): 会话, 不存在或不属于该操作者时为 None.
+        """
+        session = self._sessions.get(message_id)
+        if session is None or session.kind != kind or session.operator_id != operator_id:
+            return None
+        return session
+
+    def resolve(self, session: ReactSession, value: Any) -> None:
+        """
+        以结果结束会话.
+        Args:
+            session (ReactSession): 会话.
+            value (Any): 会话结果, 不能为 None.
+        """
+        if self._sessions.get(session.message_id) is session:
+            del self._sessions[session.message_id]
+        if not session.result.done():
+            session.result.set_result(value)
+
+    async def wait(self, session: ReactSession) -> Any:
+        """
+        等待会话结束.
+        Args:
+            session (ReactSession): 会话.
+        Returns:
+            value (Any): 会话结果, 过期时为 None.
+        """
+        return await session.result
+
+    async def close(self) -> None:
+        """
+        结束所有会话并停止后台任务.
+        """
+        for session in list(self._sessions.values()):
+            self.resolve(session, None)
+        self._expiry.clear()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.wait([self._task])
+
+    async def _expire(self) -> None:
+        """
+        后台任务, 按过期时间顺序结束会话, 堆为空时退出.
+        """
+        while self._expiry:
+            expires_at, message_id = self._expiry[0]
+            delay = expires_at - time.monotonic()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._expiry)
+            session = self._sessions.get(message_id)
+            if session is not None and session.expires_at == expires_at:
+                self.resolve(session, None)
@@ -0,0 +1,123 @@
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from nonebot.adapters.discord.api.model import Snowflake
+
+MessageAuthor = Tuple[
+    Snowflake,  # 消息ID
+    Snowflake  # 作者ID
+]
+
+
+class LastAuthorTracker:
+    """
+    按频道记录最近消息与作者的环形缓冲, 由网关消息事件维护.
+    每个频道保存最近若干条消息, 按消息ID (即发送时间) 有序,
+    事件乱序到达时按ID插入. 缓冲从首条记录起连续, 只会从最旧一端淘汰,
+    因此缓冲中一条消息的前一项就是频道中的上一条消息.
+    频道按最近使用淘汰, 内存占用有上限.
+    """
+
+    def __init__(self, size: int = 32, max_channels: int = 4096) -> None:
+        """
+        初始化最近作者记录.
+        Args:
+            size (int): 每个频道保存的消息数, 默认为32.
+            max_channels (int): 最多记录的频道数, 默认为4096.
+        """
+        self.size = size
+        self.max_channels = max_channels
+        self._channels: OrderedDict[Snowflake, List[MessageAuthor]] = OrderedDict()
+
+    def record(
+        self,
+        channel_id: Snowflake,
+        message_id: Snowflake,
+        author_id: Snowflake
+    ) -> None:
+        """
+        记录频道中的一条消息, 重复记录同一消息不会产生影响.
+        Args:
+            channel_id (Snowflake): 频道ID.
+            message_id (Snowflake): 消息ID.
+            author_id (Snowflake): 作者ID.
+        """
+        ring = self._channels.get(channel_id)
+        if ring is None:
+            ring = self._channels[channel_id] = []
+            if len(self._channels) > self.max_channels:
+                self._channels.popitem(last=False)
+        else:
+            self._channels.move_to_end(channel_id)
+
+        # 绝大多数消息按顺序到达, 直接追加
+        if not ring or message_id > ring[-1][0]:
+            ring.append((message_id, author_id))
+        else:
+            # 早于缓冲的消息无法保证连续, 不记录
+            if message_id < ring[0][0]:
+                return
+            i = bisect_left(ring, (message_id,))
+            if i < len(ring) and ring[i][0] == message_id:
+                return
+            ring.insert(i, (message_id, author_id))
+
+        if len(ring) > self.size:
+            del ring[:len(ring) - self.size]
+
+    def seed(
+        self,
+        channel_id: Snowflake,
+        message_id: Snowflake,
+        previous: MessageAuthor
+    ) -> None:
+        """
+        在缓冲最旧一端补充一条已知的上一条消息, 例如重启后通过REST请求获得的消息.
+        只有 message_id 是缓冲中最旧的一条且缓冲未满时才补充, 以保持缓冲连续.
+        Args:
+            channel_id (Snowflake): 频道ID.
+            message_id (Snowflake): 已记录的消息ID.
+            previous (MessageAuthor): 该消息在频道中的上一条消息ID与作者ID.
+        """
+        ring = self._channels.get(channel_id)
+        if not ring or ring[0][0] != message_id or len(ring) >= self.size:
+            return
+        if previous[0] >= message_id:
+            return
+        ring.insert(0, previous)
+
+    def discard(self, channel_id: Snowflake, message_ids: Iterable[Snowflake]) -> None:
+        """
+        移除频道中已删除的消息.
+        Args:
+            channel_id (Snowflake): 频道ID.
+            message_ids (Iterable[Snowflake]): 消息ID.
+        """
+        ring = self._channels.get(channel_id)
+        if ring is None:
+            return
+        deleted = set(message_ids)
+        ring[:] = [entry for entry in ring if entry[0] not in deleted]
+
+    def previous(
+        self,
+        channel_id: Snowflake,
+        message_id: Snowflake
+    ) -> Optional[MessageAuthor]:
+        """
+        获取频道中一条已记录消息的上一条消息.
+        Args:
+            channel_id (Snowflake): 频道ID.
+            message_id (Snowflake): 消息ID.
+        Returns:
+            previous (Optional[MessageAuthor]): 上一条消息ID与作者ID,
+                消息未记录或是缓冲中最旧的一条 (例如重启后频道的首条消息) 时为 None.
+        """
+        ring = self._channels.get(channel_id)
+        if not ring:
+            return None
+        i = bisect_left(ring, (message_id,))
+        if i == 0 or i == len(ring) or ring[i][0] != message_id:
+            return None
+        return ring[i - 1]
@@ -1,21 +1,84 @@
+import os
+from typing import Optional
+
+from nonebot import logger, get_driver
+
 from .guess import PJSKGuess
 from .guess_gray import PJSKGuessGray
 from .guess_hard import PJSKGuessHard
 from .guess_music import PJSKGuessMusic
 from .guess_music_reverse import PJSKGuessMusicReverse
+from .guess_total import PJSKGuessTotal
+from .guess_stats import PJSKGuessStats
 from .models import PJSKGuessMetadata as Metadata
 from .models import PJSKGuessStatusManager as StatusManager
-from .database.mongo import PJSKGuessDatabase as Database
+from .database.base import PJSKGuessDatabaseBase as DatabaseBase
+from .database.mongo import PJSKGuessDatabase as DatabaseMongo
+from .database.sqlite import PJSKGuessDatabaseSQLite as DatabaseSQLite
 
 PATH_METADATA = "src/plugins/pjsk/plugins/pjsk_guess/metadata.json"
-MONGODB_URI = ""
+
+# 从环境变量中获取数据库配置
+# PJSK_GUESS_DATABASE 可选 mongo, sqlite, 未设置时若具有 MongoDB URI 则使用 mongo
+MONGODB_URI = os.getenv("PJSK_GUESS_MONGODB_URI", "")
+SQLITE_PATH = os.getenv("PJSK_GUESS_SQLITE_PATH", "resources/pjsk/guess.sqlite3")
+DATABASE_BACKEND = os.getenv(
+    "PJSK_GUESS_DATABASE",
+    "mongo" if MONGODB_URI else ""
+).lower()
+
+database: Optional[DatabaseBase] = None
+match DATABASE_BACKEND:
+    case "mongo" if MONGODB_URI:
+        database = DatabaseMongo(MONGODB_URI)
+    case "sqlite":
+        database = DatabaseSQLite(SQLITE_PATH)
+    case "":
+        pass
+    case _:
+        logger.warning(
+            "[PJSK.Guess] "
+            f"无法启用猜曲数据库 {DATABASE_BACKEND},"
+            "请检查数据库类型及连接信息,"
+            "将**不会**记录猜曲成绩."
+        )
 
 status_manager = StatusManager()
 metadata = Metadata(PATH_METADATA)
-database = Database(MONGODB_URI) if MONGODB_URI else None
 
 pjsk_guess = PJSKGuess(status_manager, metadata, database)
 pjsk_guess_gray = PJSKGuessGray(status_manager, metadata, database)
 pjsk_guess_hard = PJSKGuessHard(status_manager, metadata, database)
 pjsk_guess_music = PJSKGuessMusic(status_manager, metadata, database)
 pjsk_guess_music_reverse = PJSKGuessMusicReverse(status_manager, metadata, database)
+pjsk_guess_modes = (
+    pjsk_guess,
+    pjsk_guess_gray,
+    pjsk_guess_hard,
+    pjsk_guess_music,
+    pjsk_guess_music_reverse
+)
+
+pjsk_guess_total: Optional[PJSKGuessTotal] = None
+pjsk_guess_stats: Optional[PJSKGuessStats] = None
+if database is not None:
+    pjsk_guess_total = PJSKGuessTotal(database, pjsk_guess_modes)
+    pjsk_guess_stats = PJSKGuessStats(database, pjsk_guess_modes)
+
+
+@get_driver().on_startup
+async def setup_database() -> None:
+    """
+    启动时准备猜曲数据库, 确保各模式分数键的排行索引存在.
+    """
+    if database is not None:
+        await database.setup([mode.SCORE_NAME for mode in pjsk_guess_modes])
+
+
+@get_driver().on_shutdown
+async def close_database() -> None:
+    """
+    关闭时释放猜曲数据库连接.
+    """
+    if database is not None:
+        await database.close()
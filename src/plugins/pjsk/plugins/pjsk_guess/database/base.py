@@ -1,11 +1,62 @@
 ﻿from abc import ABC, abstractmethod
-from typing import Any
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .member import PJSKGuessMemberCache
+
+# 周期排行榜, 周按 ISO 周计算, 以 UTC+8 零点为分界
+PERIODS = ("week", "month")
+PERIOD_TIMEZONE = timezone(timedelta(hours=8))
+
+# 总排行的分数键, 每次猜中按所属模式的权重累加, 未列出的分数键权重为1
+TOTAL_KEY = "score_total"
+SCORE_WEIGHTS = {
+    "score_guess_jacket": 1,
+    "score_guess_jacket_gray": 2,
+    "score_guess_jacket_hard": 3,
+    "score_guess_music": 1,
+    "score_guess_music_reverse": 2,
+}
+
+def get_default_stats() -> Dict[str, Any]:
+    """
+    获取没有任何记录时的统计数据.
+    字段依次为猜中次数, 尝试次数, 当前连续猜中, 最佳连续猜中与最快用时(秒).
+    Returns:
+        stats (Dict[str, Any]): 统计数据, 最快用时为None.
+    """
+    return {"score": 0, "attempts": 0, "streak": 0, "best_streak": 0, "fastest": None}
+
+
+def get_period_bucket(period: str, now: Optional[datetime] = None) -> str:
+    """
+    获取时间所在的周期桶名称.
+    Args:
+        period (str): 周期, 可选 week, month.
+        now (Optional[datetime]): 时间, 默认为当前时间.
+    Returns:
+        bucket (str): 周期桶名称, 例如 2026-W42, 2026-10.
+    """
+    now = datetime.now(PERIOD_TIMEZONE) if now is None \
+        else now.astimezone(PERIOD_TIMEZONE)
+    match period:
+        case "week":
+            year, week, _ = now.isocalendar()
+            return f"{year}-W{week:02d}"
+        case "month":
+            return f"{now.year}-{now.month:02d}"
+        case _:
+            raise ValueError(f"未知的排行周期: {period}")
 
 
 class PJSKGuessDatabaseBase(ABC):
     """
     抽象基类, 定义了猜曲数据库的基本接口.
+    Attributes:
+        members (PJSKGuessMemberCache): 服务器成员名称缓存.
     """
+    members: PJSKGuessMemberCache
+
     @abstractmethod
     def __init__(self) -> None:
         """
@@ -15,14 +66,67 @@ class PJSKGuessDatabaseBase(ABC):
         """
         pass
 
+    async def setup(self, keys: Iterable[str]) -> None:
+        """
+        在启动时准备数据库, 例如建立索引. 默认无需准备.
+        Args:
+            keys (Iterable[str]): 排行榜分数对应的键.
+        """
+        pass
+
+    async def close(self) -> None:
+        """
+        在关闭时释放数据库连接. 默认无需释放.
+        """
+        pass
+
     @abstractmethod
-    async def update(self, guild_id: int, user_id: int, key: str) -> None:
+    async def update(
+        self,
+        guild_id: int,
+        user_id: int,
+        key: str,
+        elapsed: Optional[float] = None
+    ) -> None:
         """
-        更新猜曲数据.
+        更新猜中的猜曲数据.
+        分数键加一, 总排行分数键 TOTAL_KEY 按 SCORE_WEIGHTS 中的权重增加,
+        该模式的尝试次数加一, 连续猜中次数加一并更新最佳连续与最快用时.
+        以上数据与每个周期当前桶的分数在同一次写入中更新,
+        过期的周期桶由实现自动清理.
         Args:
             guild_id (int): 群组ID.
             user_id (int): 用户ID.
             key (str): 要更新分数对应的键.
+            elapsed (Optional[float]): 自猜曲开始的用时, 单位为秒, 未知时为None.
+        """
+        pass
+
+    @abstractmethod
+    async def record_miss(self, guild_id: int, user_id: int, key: str) -> None:
+        """
+        记录猜错, 该模式的尝试次数加一并清零连续猜中次数, 只需一次写入.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            key (str): 分数对应的键.
+        """
+        pass
+
+    @abstractmethod
+    async def get_user_stats(
+        self,
+        guild_id: int,
+        user_id: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        获取用户在各模式的统计数据, 只读取该用户的一条记录.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+        Returns:
+            stats (Dict[str, Dict[str, Any]]): 分数键与统计数据的映射,
+                统计数据的字段与 get_default_stats 一致, 不含总排行分数键.
         """
         pass
 
@@ -31,7 +135,9 @@ class PJSKGuessDatabaseBase(ABC):
         self,
         guild_id: int,
         key: str,
-        limit: int = 20
+        limit: int = 20,
+        period: Optional[str] = None,
+        fields: Iterable[str] = ()
     ) -> list[dict[str, Any]]:
         """
         获取猜曲排行榜.
@@ -39,12 +145,34 @@ class PJSKGuessDatabaseBase(ABC):
             guild_id (int): 群组ID.
             limit (int): 排行榜限制数量, 默认为20.
             key (str): 排行榜分数对应的键.
+            period (Optional[str]): 周期, 默认为None即总排行.
+            fields (Iterable[str]): 随排行一同返回的其他分数键, 缺失时为0.
         Returns:
             List[Dict]: 排行榜数据列表, 每个字典包含用户ID和分数.
         """
         pass
 
     @abstractmethod
+    async def get_user_rank(
+        self,
+        guild_id: int,
+        user_id: int,
+        key: str,
+        period: Optional[str] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        获取用户的排名和分数.
+        排名与排行榜数据的排序一致: 分数降序, 同分时用户ID升序.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            key (str): 排行榜分数对应的键.
+            period (Optional[str]): 周期, 默认为None即总排行.
+        Returns:
+            rank (Optional[Tuple[int, int]]): 用户排名与分数, 用户无分数时为None.
+        """
+        pass
+
     async def generate_ranking(
         self,
         guild_id: int,
@@ -60,4 +188,62 @@ class PJSKGuessDatabaseBase(ABC):
         Returns:
             ranking (str): 格式化的排行榜信息字符串.
         """
-        pass
+        # 并发获取成员名称
+        user_names = await self.members.resolve(
+            guild_id,
+            [item["user_id"] for item in data]
+        )
+
+        # 构建排行榜信息
+        info_ranking = f"{'排 名': <4}{'次 数':>8}{'ID':>8}\n"
+        for i, item in enumerate(data):
+            user_name = user_names[item["user_id"]]
+            info_ranking += (
+                f"{str(i + 1):>4}"
+                "  "
+                f"{str(item[key]) + ' 次':>8}"
+                "      "
+                f"{user_name}\n"
+            )
+
+        # 删除最后的换行符并返回
+        return info_ranking.strip("\n")
+
+    async def generate_total_ranking(
+        self,
+        guild_id: int,
+        data: list[dict[str, Any]],
+        labels: Dict[str, str]
+    ) -> str:
+        """
+        生成总排行榜信息字符串, 每名用户附带各模式的分数.
+        Args:
+            guild_id (int): 群组ID.
+            data (List[Dict]): 包含各模式分数的总排行榜数据列表.
+            labels (Dict[str, str]): 模式分数键与名称的映射.
+        Returns:
+            ranking (str): 格式化的排行榜信息字符串.
+        """
+        user_names = await self.members.resolve(
+            guild_id,
+            [item["user_id"] for item in data]
+        )
+
+        info_ranking = f"{'排 名': <4}{'总 分':>8}{'ID':>8}\n"
+        for i, item in enumerate(data):
+            user_name = user_names[item["user_id"]]
+            breakdown = " / ".join(
+                f"{label} {item[key]}"
+                for key, label in labels.items()
+                if item[key]
+            )
+            info_ranking += (
+                f"{str(i + 1):>4}"
+                "  "
+                f"{str(item[TOTAL_KEY]) + ' 分':>8}"
+                "      "
+                f"{user_name}\n"
+                f"{'':>14}{breakdown}\n"
+            )
+
+        return info_ranking.strip("\n")
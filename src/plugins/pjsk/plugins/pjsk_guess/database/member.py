@@ -0,0 +1,182 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from nonebot import logger, get_adapter, get_bot
+from nonebot.adapters.discord.api import GuildMember, API_HANDLERS
+
+get_guild_member = API_HANDLERS["get_guild_member"]
+
+
+async def fetch_member_name(guild_id: int, user_id: int) -> str:
+    """
+    通过 Discord REST 接口获取服务器成员名称.
+    Args:
+        guild_id (int): 服务器ID.
+        user_id (int): 用户ID.
+    Returns:
+        name (str): 成员名称.
+    """
+    bot = get_bot()
+    adapter = get_adapter("Discord")
+    member: GuildMember = await get_guild_member(adapter, bot, guild_id, user_id)
+    return PJSKGuessMemberCache.get_member_name(member)
+
+
+class PJSKGuessMemberCache:
+    """
+    带有过期时间的服务器成员名称缓存.
+    由网关的成员事件和消息事件写入, 未命中时以有限并发向 Discord 请求.
+    Attributes:
+        ttl (float): 缓存有效期, 单位为秒.
+        maxsize (int): 最大缓存条目数, 超出时淘汰最早写入的条目.
+        fetch (Callable): 未命中时获取成员名称的协程函数.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600,
+        maxsize: int = 100000,
+        concurrency: int = 5,
+        fetch: Optional[Callable[[int, int], Awaitable[str]]] = None
+    ) -> None:
+        """
+        初始化成员名称缓存.
+        Args:
+            ttl (float): 缓存有效期, 单位为秒, 默认为3600.
+            maxsize (int): 最大缓存条目数, 默认为100000.
+            concurrency (int): 未命中时的最大并发请求数, 默认为5.
+            fetch (Optional[Callable]): 获取成员名称的协程函数, 默认使用 Discord REST 接口.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.fetch = fetch if fetch is not None else fetch_member_name
+        self._concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._entries: Dict[Tuple[int, int], Tuple[float, str]] = {}
+        self._pending: Dict[Tuple[int, int], asyncio.Task] = {}
+
+    @staticmethod
+    def get_member_name(member: Any) -> str:
+        """
+        从成员对象中获取显示名称, 依次使用昵称, 全局名称和用户名.
+        Args:
+            member (Any): 具有 nick 和 user 属性的成员对象.
+        Returns:
+            name (str): 成员名称.
+        """
+        if member.nick:
+            return member.nick
+        if member.user.global_name:
+            return member.user.global_name
+        return member.user.username
+
+    def put(self, guild_id: int, user_id: int, name: str) -> None:
+        """
+        写入成员名称.
+        Args:
+            guild_id (int): 服务器ID.
+            user_id (int): 用户ID.
+            name (str): 成员名称.
+        """
+        key = (guild_id, user_id)
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl, name)
+        while len(self._entries) > self.maxsize:
+            self._entries.pop(next(iter(self._entries)))
+
+    def discard(self, guild_id: int, user_id: int) -> None:
+        """
+        移除成员名称.
+        Args:
+            guild_id (int): 服务器ID.
+            user_id (int): 用户ID.
+        """
+        self._entries.pop((guild_id, user_id), None)
+
+    def get(self, guild_id: int, user_id: int) -> Optional[str]:
+        """
+        获取未过期的成员名称.
+        Args:
+            guild_id (int): 服务器ID.
+            user_id (int): 用户ID.
+        Returns:
+            name (Optional[str]): 成员名称, 未命中或已过期时为None.
+        """
+        key = (guild_id, user_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return entry[1]
+
+    async def resolve(
+        self,
+        guild_id: int,
+        user_ids: Iterable[int]
+    ) -> Dict[int, str]:
+        """
+        批量获取成员名称, 未命中的成员以有限并发同时请求.
+        Args:
+            guild_id (int): 服务器ID.
+            user_ids (Iterable[int]): 用户ID列表.
+        Returns:
+            names (Dict[int, str]): 用户ID与成员名称的映射.
+        """
+        names: Dict[int, str] = {}
+        misses = []
+        for user_id in user_ids:
+            name = self.get(guild_id, user_id)
+            if name is None:
+                misses.append(user_id)
+            else:
+                names[user_id] = name
+
+        results = await asyncio.gather(
+            *(self._resolve_miss(guild_id, user_id) for user_id in misses)
+        )
+        names.update(zip(misses, results))
+        return names
+
+    async def _resolve_miss(self, guild_id: int, user_id: int) -> str:
+        """
+        获取未命中的成员名称, 同一成员的并发请求合并为一次.
+        Args:
+            guild_id (int): 服务器ID.
+            user_id (int): 用户ID.
+        Returns:
+            name (str): 成员名称, 获取失败时为用户ID.
+        """
+        key = (guild_id, user_id)
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(guild_id, user_id))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, guild_id: int, user_id: int) -> str:
+        """
+        在并发限制内请求成员名称并写入缓存.
+        Args:
+            guild_id (int): 服务器ID.
+            user_id (int): 用户ID.
+        Returns:
+            name (str): 成员名称, 获取失败时为用户ID.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        async with self._semaphore:
+            try:
+                name = await self.fetch(guild_id, user_id)
+            except Exception as e:
+                # 成员可能已离开服务器, 不写入缓存
+                logger.warning(
+                    "[PJSK.Guess] "
+                    f"无法获取成员 {user_id} 的名称: {e}"
+                )
+                return str(user_id)
+        self.put(guild_id, user_id, name)
+        return name
@@ -0,0 +1,306 @@
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .base import PERIODS, SCORE_WEIGHTS, TOTAL_KEY
+from .base import get_default_stats, get_period_bucket
+from .base import PJSKGuessDatabaseBase as DatabaseBase
+from .member import PJSKGuessMemberCache as MemberCache
+
+
+class PJSKGuessLeaderboard:
+    """
+    内存排行榜, 支持对数时间的分数更新与排名查询.
+    以树状数组统计各分数的人数, 同分用户按用户ID升序存放,
+    排序规则与数据库排行一致: 分数降序, 同分时用户ID升序.
+    """
+
+    def __init__(self) -> None:
+        """
+        初始化空排行榜.
+        """
+        self._scores: Dict[int, int] = {}
+        self._buckets: Dict[int, List[int]] = {}
+        self._distinct: List[int] = []
+        self._tree: List[int] = [0] * 65
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def score(self, user_id: int) -> Optional[int]:
+        """
+        获取用户分数.
+        Args:
+            user_id (int): 用户ID.
+        Returns:
+            score (Optional[int]): 用户分数, 用户不在排行榜中时为None.
+        """
+        return self._scores.get(user_id)
+
+    def increment(self, user_id: int, amount: int = 1) -> int:
+        """
+        增加用户分数.
+        Args:
+            user_id (int): 用户ID.
+            amount (int): 增加的分数, 默认为1.
+        Returns:
+            score (int): 更新后的用户分数.
+        """
+        score = self._scores.get(user_id)
+        if score is not None:
+            self._remove(user_id, score)
+            score += amount
+        else:
+            score = amount
+        self._insert(user_id, score)
+        return score
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """
+        获取用户排名.
+        Args:
+            user_id (int): 用户ID.
+        Returns:
+            rank (Optional[int]): 用户排名, 从1开始, 用户不在排行榜中时为None.
+        """
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        higher = len(self._scores) - self._prefix(score)
+        return higher + bisect_left(self._buckets[score], user_id) + 1
+
+    def top(self, limit: int) -> List[Tuple[int, int]]:
+        """
+        获取排行榜前若干名.
+        Args:
+            limit (int): 数量限制.
+        Returns:
+            items (List[Tuple[int, int]]): 用户ID与分数的列表.
+        """
+        items: List[Tuple[int, int]] = []
+        for score in reversed(self._distinct):
+            for user_id in self._buckets[score]:
+                if len(items) >= limit:
+                    return items
+                items.append((user_id, score))
+        return items
+
+    def _insert(self, user_id: int, score: int) -> None:
+        """
+        插入用户分数.
+        """
+        self._scores[user_id] = score
+        bucket = self._buckets.get(score)
+        if bucket is None:
+            bucket = self._buckets[score] = []
+            insort(self._distinct, score)
+        insort(bucket, user_id)
+        self._add(score, 1)
+
+    def _remove(self, user_id: int, score: int) -> None:
+        """
+        移除用户分数.
+        """
+        del self._scores[user_id]
+        bucket = self._buckets[score]
+        del bucket[bisect_left(bucket, user_id)]
+        if not bucket:
+            del self._buckets[score]
+            del self._distinct[bisect_left(self._distinct, score)]
+        self._add(score, -1)
+
+    def _add(self, score: int, delta: int) -> None:
+        """
+        更新树状数组中指定分数的人数, 容量不足时倍增并按分数桶重建.
+        调用前分数桶必须已经更新.
+        """
+        if score >= len(self._tree):
+            size = len(self._tree) - 1
+            while score > size:
+                size *= 2
+            self._tree = [0] * (size + 1)
+            for value, bucket in self._buckets.items():
+                self._add_raw(value, len(bucket))
+            return
+        self._add_raw(score, delta)
+
+    def _add_raw(self, score: int, delta: int) -> None:
+        index = score
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def _prefix(self, score: int) -> int:
+        """
+        统计分数不高于指定分数的人数.
+        """
+        total = 0
+        index = min(score, len(self._tree) - 1)
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+
+class PJSKGuessDatabaseMemory(DatabaseBase):
+    """
+    内存实现的PJSK猜曲数据库.
+    继承自PJSKGuessDatabaseBase, 每个群组的每个分数键对应一个内存排行榜.
+    周期排行榜只保留当前桶, 桶过期时整体丢弃.
+    数据不会持久化, 适用于无需外部数据库的场景.
+    """
+
+    def __init__(self) -> None:
+        """
+        初始化内存数据库.
+        """
+        self.members = MemberCache()
+        self._leaderboards: Dict[
+            Tuple[int, str, Optional[str]],
+            Tuple[str, PJSKGuessLeaderboard]
+        ] = {}
+        self._stats: Dict[Tuple[int, int], Dict[str, Dict[str, Any]]] = {}
+
+    def leaderboard(
+        self,
+        guild_id: int,
+        key: str,
+        period: Optional[str] = None
+    ) -> PJSKGuessLeaderboard:
+        """
+        获取群组指定分数键的排行榜, 不存在或周期桶已过期时创建.
+        Args:
+            guild_id (int): 群组ID.
+            key (str): 排行榜分数对应的键.
+            period (Optional[str]): 周期, 默认为None即总排行.
+        Returns:
+            leaderboard (PJSKGuessLeaderboard): 排行榜.
+        """
+        bucket = "" if period is None else get_period_bucket(period)
+        entry = self._leaderboards.get((guild_id, key, period))
+        if entry is None or entry[0] != bucket:
+            entry = (bucket, PJSKGuessLeaderboard())
+            self._leaderboards[(guild_id, key, period)] = entry
+        return entry[1]
+
+    async def update(
+        self,
+        guild_id: int,
+        user_id: int,
+        key: str,
+        elapsed: Optional[float] = None
+    ) -> None:
+        """
+        更新状态.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            key (str): 要更新分数对应的键.
+            elapsed (Optional[float]): 自猜曲开始的用时, 单位为秒, 未知时为None.
+        """
+        weight = SCORE_WEIGHTS.get(key, 1)
+        for period in (None, *PERIODS):
+            self.leaderboard(guild_id, key, period).increment(user_id)
+            self.leaderboard(guild_id, TOTAL_KEY, period).increment(user_id, weight)
+
+        stats = self._stats.setdefault((guild_id, user_id), {})
+        stats = stats.setdefault(key, get_default_stats())
+        stats["attempts"] += 1
+        stats["streak"] += 1
+        stats["best_streak"] = max(stats["best_streak"], stats["streak"])
+        if elapsed is not None:
+            fastest = stats["fastest"]
+            stats["fastest"] = elapsed if fastest is None else min(fastest, elapsed)
+
+    async def record_miss(self, guild_id: int, user_id: int, key: str) -> None:
+        """
+        记录猜错.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            key (str): 分数对应的键.
+        """
+        stats = self._stats.setdefault((guild_id, user_id), {})
+        stats = stats.setdefault(key, get_default_stats())
+        stats["attempts"] += 1
+        stats["streak"] = 0
+
+    async def get_user_stats(
+        self,
+        guild_id: int,
+        user_id: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        获取用户在各模式的统计数据.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+        Returns:
+            stats (Dict[str, Dict[str, Any]]): 分数键与统计数据的映射.
+        """
+        stats = self._stats.get((guild_id, user_id), {})
+        result = {}
+        for key, item in stats.items():
+            score = self.leaderboard(guild_id, key).score(user_id)
+            result[key] = {**item, "score": score or 0}
+        return result
+
+    async def get_ranking_data(
+        self,
+        guild_id: int,
+        key: str,
+        limit: int = 20,
+        period: Optional[str] = None,
+        fields: Iterable[str] = ()
+    ) -> list[dict[str, Any]]:
+        """
+        获取猜曲排行榜数据.
+        Args:
+            guild_id (int): 群组ID.
+            key (str): 排行榜分数对应的键.
+            limit (int): 排行榜限制数量, 默认为20.
+            period (Optional[str]): 周期, 默认为None即总排行.
+            fields (Iterable[str]): 随排行一同返回的其他分数键, 缺失时为0.
+        Returns:
+            data (List[Dict[str, Any]]): 群组排行字典列表.
+        """
+        leaderboard = self.leaderboard(guild_id, key, period)
+        others = {
+            field: self.leaderboard(guild_id, field, period)
+            for field in fields
+        }
+        return [
+            {
+                "user_id": user_id,
+                key: score,
+                **{
+                    field: other.score(user_id) or 0
+                    for field, other in others.items()
+                }
+            }
+            for user_id, score in leaderboard.top(limit)
+        ]
+
+    async def get_user_rank(
+        self,
+        guild_id: int,
+        user_id: int,
+        key: str,
+        period: Optional[str] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        获取用户的排名和分数.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            key (str): 排行榜分数对应的键.
+            period (Optional[str]): 周期, 默认为None即总排行.
+        Returns:
+            rank (Optional[Tuple[int, int]]): 用户排名与分数, 用户无分数时为None.
+        """
+        leaderboard = self.leaderboard(guild_id, key, period)
+        rank = leaderboard.rank(user_id)
+        if rank is None:
+            return None
+        score = leaderboard.score(user_id)
+        assert score is not None, "用户具有排名时必定具有分数."
+        return rank, score
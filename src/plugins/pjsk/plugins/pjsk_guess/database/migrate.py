@@ -0,0 +1,170 @@
+"""
+猜曲成绩迁移工具.
+将旧版按群组分集合存放的成绩 (PJSK-Guess.<guild_id>, 文档为 {user_id, score_*})
+分批迁移到单集合 (PJSK-Guess.scores, 文档为 {guild_id, user_id, score_*}).
+
+合并成绩时在同一次更新中把来源集合记入新文档的 migrated_from, 已记录来源的用户不会重复累加;
+已迁移的旧文档会被标记, 迁移完成的旧集合会被重命名为 migrated.<guild_id>,
+因此在任意步骤之间中断后都可以安全地重新执行.
+迁移结束后按各模式权重重新计算总排行分数, 该步骤同样可以重复执行.
+
+用法:
+    python src/plugins/pjsk/plugins/pjsk_guess/database/migrate.py <MongoDB URI> [--batch-size 1000]
+"""
+import asyncio
+import argparse
+
+import pymongo
+from pymongo import AsyncMongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+
+# 与 mongo.py 保持一致, 本工具作为独立脚本运行, 不导入插件包
+DATABASE_NAME = "PJSK-Guess"
+COLLECTION_SCORES = "scores"
+PREFIX_MIGRATED = "migrated."
+KEY_MIGRATED = "migrated"
+KEY_MIGRATED_FROM = "migrated_from"
+CODE_DUPLICATE_KEY = 11000
+
+# 与 base.py 保持一致
+TOTAL_KEY = "score_total"
+SCORE_WEIGHTS = {
+    "score_guess_jacket": 1,
+    "score_guess_jacket_gray": 2,
+    "score_guess_jacket_hard": 3,
+    "score_guess_music": 1,
+    "score_guess_music_reverse": 2,
+}
+
+
+async def migrate_collection(database, name: str, batch_size: int) -> int:
+    """
+    迁移单个群组集合.
+    Args:
+        database (AsyncDatabase): 猜曲数据库.
+        name (str): 旧集合名称, 即群组ID.
+        batch_size (int): 每批迁移的文档数量.
+    Returns:
+        count (int): 迁移的文档数量.
+    """
+    guild_id = int(name)
+    source = database[name]
+    target = database[COLLECTION_SCORES]
+    # 幂等合并依赖唯一索引拒绝重复插入, 插件可能尚未启动建立索引
+    await target.create_index(
+        [("guild_id", pymongo.ASCENDING), ("user_id", pymongo.ASCENDING)],
+        unique=True
+    )
+
+    count = 0
+    last_id = None
+    while True:
+        # 按 _id 顺序分批读取, 每批均可使用 _id 索引
+        query: dict = {KEY_MIGRATED: {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        documents = await source.find(query).sort("_id", 1) \
+                                .limit(batch_size).to_list()
+        if not documents:
+            break
+        last_id = documents[-1]["_id"]
+
+        # 合并到新集合, 新集合中已有的成绩累加, 已记录该来源的用户跳过
+        requests = []
+        for document in documents:
+            scores = {
+                key: value
+                for key, value in document.items()
+                if key.startswith("score_")
+            }
+            if "user_id" not in document or not scores:
+                continue
+            requests.append(
+                UpdateOne(
+                    {
+                        "guild_id": guild_id,
+                        "user_id": document["user_id"],
+                        KEY_MIGRATED_FROM: {"$ne": name}
+                    },
+                    {"$inc": scores, "$addToSet": {KEY_MIGRATED_FROM: name}},
+                    upsert=True
+                )
+            )
+        if requests:
+            try:
+                await target.bulk_write(requests, ordered=False)
+            except BulkWriteError as e:
+                # 已记录来源的用户不匹配过滤条件, 转为插入后与唯一索引冲突, 即已合并过
+                errors = e.details.get("writeErrors", [])
+                if any(error["code"] != CODE_DUPLICATE_KEY for error in errors) \
+                        or e.details.get("writeConcernErrors"):
+                    raise
+
+        # 标记已迁移的旧文档
+        await source.update_many(
+            {"_id": {"$in": [document["_id"] for document in documents]}},
+            {"$set": {KEY_MIGRATED: True}}
+        )
+        count += len(requests)
+
+    await source.rename(PREFIX_MIGRATED + name)
+    return count
+
+
+async def backfill_total(database) -> int:
+    """
+    按各模式分数与权重重新计算总排行分数.
+    周期分数不做回填, 从下一个周期桶开始计入总排行.
+    Args:
+        database (AsyncDatabase): 猜曲数据库.
+    Returns:
+        count (int): 更新的文档数量.
+    """
+    result = await database[COLLECTION_SCORES].update_many(
+        {"$or": [{key: {"$exists": True}} for key in SCORE_WEIGHTS]},
+        [
+            {
+                "$set": {
+                    TOTAL_KEY: {
+                        "$add": [
+                            {"$multiply": [{"$ifNull": [f"${key}", 0]}, weight]}
+                            for key, weight in SCORE_WEIGHTS.items()
+                        ]
+                    }
+                }
+            }
+        ]
+    )
+    return result.modified_count
+
+
+async def migrate(uri: str, batch_size: int = 1000) -> None:
+    """
+    迁移所有旧版群组集合.
+    Args:
+        uri (str): MongoDB连接URI.
+        batch_size (int): 每批迁移的文档数量, 默认为1000.
+    """
+    client = AsyncMongoClient(uri)
+    try:
+        database = client[DATABASE_NAME]
+        names = [
+            name
+            for name in await database.list_collection_names()
+            if name.isdigit()
+        ]
+        for name in names:
+            count = await migrate_collection(database, name, batch_size)
+            print(f"{name}: 已迁移 {count} 个用户")
+        count = await backfill_total(database)
+        print(f"{TOTAL_KEY}: 已更新 {count} 个用户")
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="迁移猜曲成绩到单集合")
+    parser.add_argument("uri", help="MongoDB连接URI")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(migrate(args.uri, args.batch_size))
@@ -1,13 +1,15 @@
-﻿from typing import Any
+﻿from typing import Any, Dict, Iterable, Optional, Tuple
 
 import pymongo
-from pymongo import AsyncMongoClient
-from nonebot import get_adapter, get_bot
-from nonebot.adapters.discord.api import GuildMember, API_HANDLERS
+from pymongo import AsyncMongoClient, IndexModel
 
+from .base import PERIODS, SCORE_WEIGHTS, TOTAL_KEY
+from .base import get_default_stats, get_period_bucket
 from .base import PJSKGuessDatabaseBase as DatabaseBase
+from .member import PJSKGuessMemberCache as MemberCache
 
-get_guild_member = API_HANDLERS["get_guild_member"]
+DATABASE_NAME = "PJSK-Guess"
+COLLECTION_SCORES = "scores"
 
 
 class PJSKGuessDatabase(DatabaseBase, AsyncMongoClient):
@@ -15,6 +17,12 @@ class PJSKGuessDatabase(DatabaseBase, AsyncMongoClient):
     MongoDB实现的PJSK猜曲数据库.
     继承自PJSKGuessDatabaseBase, 实现了MongoDB特定的连接和操作方法.
     用于更新和获取猜曲成绩数据.
+    所有群组的成绩存放于同一集合, 每个文档以 guild_id 和 user_id 唯一确定.
+    周期分数存放于 periods.<周期> 子文档, 子文档只保留当前桶,
+    桶过期后在用户下一次得分时被同一次写入覆盖, 历史数据不会累积.
+    用户统计存放于 stats.<分数键> 子文档, 与分数在同一次写入中更新.
+    Attributes:
+        scores (AsyncCollection): 成绩集合.
     """
 
     def __init__(self, uri: str) -> None:
@@ -24,32 +32,172 @@ class PJSKGuessDatabase(DatabaseBase, AsyncMongoClient):
             uri (str): MongoDB连接URI.
         """
         AsyncMongoClient.__init__(self, uri)
+        self.members = MemberCache()
+        self.scores = self[DATABASE_NAME][COLLECTION_SCORES]
+
+    async def setup(self, keys: Iterable[str]) -> None:
+        """
+        确保成绩集合具有所需索引.
+        包括 guild_id 与 user_id 的唯一索引, 以及每个分数键在总排行和各周期排行中的索引.
+        总排行分数键 TOTAL_KEY 的索引总会建立.
+        Args:
+            keys (Iterable[str]): 排行榜分数对应的键.
+        """
+        indexes = [
+            IndexModel(
+                [("guild_id", pymongo.ASCENDING), ("user_id", pymongo.ASCENDING)],
+                unique=True
+            )
+        ]
+        for key in dict.fromkeys([*keys, TOTAL_KEY]):
+            indexes.append(
+                IndexModel(
+                    [
+                        ("guild_id", pymongo.ASCENDING),
+                        (key, pymongo.DESCENDING),
+                        ("user_id", pymongo.ASCENDING)
+                    ]
+                )
+            )
+            indexes += [
+                IndexModel(
+                    [
+                        ("guild_id", pymongo.ASCENDING),
+                        (f"periods.{period}.bucket", pymongo.ASCENDING),
+                        (f"periods.{period}.{key}", pymongo.DESCENDING),
+                        ("user_id", pymongo.ASCENDING)
+                    ]
+                )
+                for period in PERIODS
+            ]
+        await self.scores.create_indexes(indexes)
+
+    async def close(self) -> None:
+        """
+        关闭MongoDB连接.
+        """
+        await AsyncMongoClient.close(self)
 
     async def update(
         self,
         guild_id: int,
         user_id: int,
-        key: str
+        key: str,
+        elapsed: Optional[float] = None
     ):
         """
         更新状态.
+        以一次管道更新同时增加总分数和各周期当前桶的分数, 桶过期时先重置.
+        总排行分数与模式分数在同一次更新中按权重增加.
+        用户统计在同一阶段中以更新前的值计算, 保证连续猜中与最佳连续一致.
         Args:
             user_id (int): 用户ID.            
             guild_id (str): 服务器ID.
             key (str): 要更新分数对应的键.
+            elapsed (Optional[float]): 自猜曲开始的用时, 单位为秒, 未知时为None.
         """
-        collection = self["PJSK-Guess"][str(guild_id)]
-        await collection.update_one(
-            {"user_id": user_id},
-            {"$inc": {key: 1}},
+        buckets = {period: get_period_bucket(period) for period in PERIODS}
+        amounts = {key: 1, TOTAL_KEY: SCORE_WEIGHTS.get(key, 1)}
+        stats = f"stats.{key}"
+        streak = {"$add": [{"$ifNull": [f"${stats}.streak", 0]}, 1]}
+        await self.scores.update_one(
+            {"guild_id": guild_id, "user_id": user_id},
+            [
+                {
+                    "$set": {
+                        **{
+                            field: {"$add": [{"$ifNull": [f"${field}", 0]}, amount]}
+                            for field, amount in amounts.items()
+                        },
+                        **{
+                            f"periods.{period}": {
+                                "$cond": [
+                                    {"$eq": [f"$periods.{period}.bucket", bucket]},
+                                    f"$periods.{period}",
+                                    {"bucket": bucket}
+                                ]
+                            }
+                            for period, bucket in buckets.items()
+                        },
+                        f"{stats}.attempts": {
+                            "$add": [{"$ifNull": [f"${stats}.attempts", 0]}, 1]
+                        },
+                        f"{stats}.streak": streak,
+                        f"{stats}.best_streak": {
+                            "$max": [{"$ifNull": [f"${stats}.best_streak", 0]}, streak]
+                        },
+                        # $min 忽略空值, 用时未知时保留原值
+                        f"{stats}.fastest": {"$min": [f"${stats}.fastest", elapsed]}
+                    }
+                },
+                {
+                    "$set": {
+                        f"periods.{period}.{field}": {
+                            "$add": [
+                                {"$ifNull": [f"$periods.{period}.{field}", 0]},
+                                amount
+                            ]
+                        }
+                        for period in buckets
+                        for field, amount in amounts.items()
+                    }
+                }
+            ],
             upsert=True
         )
 
+    async def record_miss(self, guild_id: int, user_id: int, key: str) -> None:
+        """
+        记录猜错.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            key (str): 分数对应的键.
+        """
+        await self.scores.update_one(
+            {"guild_id": guild_id, "user_id": user_id},
+            {
+                "$inc": {f"stats.{key}.attempts": 1},
+                "$set": {f"stats.{key}.streak": 0}
+            },
+            upsert=True
+        )
+
+    async def get_user_stats(
+        self,
+        guild_id: int,
+        user_id: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        获取用户在各模式的统计数据, 只读取该用户的文档.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+        Returns:
+            stats (Dict[str, Dict[str, Any]]): 分数键与统计数据的映射.
+        """
+        document = await self.scores.find_one(
+            {"guild_id": guild_id, "user_id": user_id},
+            {"_id": 0, "guild_id": 0, "user_id": 0, "periods": 0}
+        )
+        if document is None:
+            return {}
+
+        stats: Dict[str, Dict[str, Any]] = {}
+        for key, item in document.get("stats", {}).items():
+            stats[key] = {**get_default_stats(), **item}
+        for key, score in document.items():
+            if key.startswith("score_") and key != TOTAL_KEY:
+                stats.setdefault(key, get_default_stats())["score"] = score
+        return stats
+
     async def get_ranking_data(
         self,
         guild_id: int,
         key: str,
-        limit: int = 20
+        limit: int = 20,
+        period: Optional[str] = None,
+        fields: Iterable[str] = ()
     ) -> list[dict[str, Any]]:
         """
         获取猜曲排行榜数据.
@@ -57,47 +205,121 @@ class PJSKGuessDatabase(DatabaseBase, AsyncMongoClient):
             guild_id (int): 群组ID.
             limit (int): 排行榜限制数量, 默认为20.
             key (str): 排行榜分数对应的键.
+            period (Optional[str]): 周期, 默认为None即总排行.
+            fields (Iterable[str]): 随排行一同返回的其他分数键, 缺失时为0.
         Returns:
             data (List[Dict[str, Any]]): 群组前20名排行字典列表.
         """
-        collection = self["PJSK-Guess"][str(guild_id)]
-        cursor = collection.find({key: {"$exists": True}}) \
-                           .sort(key, pymongo.DESCENDING) \
-                           .limit(limit)
-        data = cursor.to_list()
-        return await data
+        condition, field = self._locate(guild_id, key, period)
+        # 其他分数键与排行位于同一文档, 随投影一次取回
+        others = {
+            other: self._locate(guild_id, other, period)[1]
+            for other in fields
+        }
+        cursor = self.scores.find(
+            {**condition, field: {"$exists": True}},
+            {
+                "_id": 0,
+                "user_id": 1,
+                field: 1,
+                **dict.fromkeys(others.values(), 1)
+            }
+        ).sort(
+            [(field, pymongo.DESCENDING), ("user_id", pymongo.ASCENDING)]
+        ).limit(limit)
+        documents = await cursor.to_list()
+        return [
+            {
+                "user_id": document["user_id"],
+                key: self._extract(document, field),
+                **{
+                    other: self._extract(document, path, 0)
+                    for other, path in others.items()
+                }
+            }
+            for document in documents
+        ]
 
-    async def generate_ranking(
+    async def get_user_rank(
         self,
         guild_id: int,
-        data: list[dict[str, Any]],
-        key: str
-    ) -> str:
+        user_id: int,
+        key: str,
+        period: Optional[str] = None
+    ) -> Optional[Tuple[int, int]]:
         """
-        生成猜谱面成绩排行.
+        获取用户的排名和分数.
+        通过索引统计排在用户之前的文档数量, 无需扫描整个集合.
         Args:
             guild_id (int): 群组ID.
-            data (List[Dict[str, Any]]): 群组前20名排行字典列表.
+            user_id (int): 用户ID.
             key (str): 排行榜分数对应的键.
+            period (Optional[str]): 周期, 默认为None即总排行.
         Returns:
-            ranking (str): 群组前20名排行信息.
-        """
-        # 获取句柄参数
-        bot = get_bot()
-        adapter = get_adapter("Discord")
-
-        # 构建排行榜信息
-        info_ranking = f"{'排 名': <4}{'次 数':>8}{'ID':>8}\n"
-        for i, item in enumerate(data):
-            user: GuildMember = await get_guild_member(adapter, bot, guild_id, item["user_id"])
-            user_name = user.nick if user.nick else user.user.global_name
-            info_ranking += (
-                f"{str(i + 1):>4}"
-                "  "
-                f"{str(item[key]) + ' 次':>8}"
-                "      "
-                f"{user_name}\n"
-            )
+            rank (Optional[Tuple[int, int]]): 用户排名与分数, 用户无分数时为None.
+        """
+        condition, field = self._locate(guild_id, key, period)
+        document = await self.scores.find_one(
+            {**condition, "user_id": user_id, field: {"$exists": True}},
+            {"_id": 0, field: 1}
+        )
+        if document is None:
+            return None
+
+        score = self._extract(document, field)
+        count = await self.scores.count_documents(
+            {
+                "$or": [
+                    {**condition, field: {"$gt": score}},
+                    {**condition, field: score, "user_id": {"$lt": user_id}}
+                ]
+            }
+        )
+        return count + 1, score
+
+    @staticmethod
+    def _locate(
+        guild_id: int,
+        key: str,
+        period: Optional[str]
+    ) -> Tuple[dict[str, Any], str]:
+        """
+        获取排行的过滤条件与分数字段路径.
+        Args:
+            guild_id (int): 群组ID.
+            key (str): 排行榜分数对应的键.
+            period (Optional[str]): 周期, 为None时为总排行.
+        Returns:
+            condition (Dict[str, Any]): 群组与周期桶的过滤条件.
+            field (str): 分数字段路径.
+        """
+        if period is None:
+            return {"guild_id": guild_id}, key
+        return (
+            {
+                "guild_id": guild_id,
+                f"periods.{period}.bucket": get_period_bucket(period)
+            },
+            f"periods.{period}.{key}"
+        )
 
-        # 删除最后的换行符并返回
-        return info_ranking.strip("\n")
+    @staticmethod
+    def _extract(
+        document: dict[str, Any],
+        field: str,
+        default: Any = None
+    ) -> Any:
+        """
+        按字段路径读取嵌套文档中的值.
+        Args:
+            document (Dict[str, Any]): 文档.
+            field (str): 字段路径.
+            default (Any): 字段不存在时的默认值.
+        Returns:
+            value (Any): 字段值.
+        """
+        for part in field.split("."):
+            if part not in document:
+                return default
+            document = document[part]
+        return document
@@ -0,0 +1,499 @@
+import os
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .base import PERIODS, SCORE_WEIGHTS, TOTAL_KEY
+from .base import get_default_stats, get_period_bucket
+from .base import PJSKGuessDatabaseBase as DatabaseBase
+from .member import PJSKGuessMemberCache as MemberCache
+
+
+class PJSKGuessDatabaseSQLite(DatabaseBase):
+    """
+    SQLite实现的PJSK猜曲数据库.
+    继承自PJSKGuessDatabaseBase, 适用于无需外部数据库的部署.
+    数据库以 WAL 模式运行, 所有读写都在专用线程中执行, 不阻塞事件循环.
+    同一事件循环迭代内的成绩更新合并为一次批量写入.
+    周期分数存放于 period_scores 表, 与总分数在同一事务中写入,
+    周期桶切换时过期的桶在该事务中一并删除.
+    用户统计存放于 stats 表, 猜中与猜错按发生顺序在同一事务中写入.
+    """
+    SQL_SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS scores ("
+        "    guild_id INTEGER NOT NULL,"
+        "    user_id INTEGER NOT NULL,"
+        "    key TEXT NOT NULL,"
+        "    score INTEGER NOT NULL,"
+        "    PRIMARY KEY (guild_id, key, user_id)"
+        ") WITHOUT ROWID;"
+        "CREATE INDEX IF NOT EXISTS scores_ranking "
+        "    ON scores (guild_id, key, score DESC, user_id);"
+        "CREATE TABLE IF NOT EXISTS period_scores ("
+        "    guild_id INTEGER NOT NULL,"
+        "    user_id INTEGER NOT NULL,"
+        "    key TEXT NOT NULL,"
+        "    period TEXT NOT NULL,"
+        "    bucket TEXT NOT NULL,"
+        "    score INTEGER NOT NULL,"
+        "    PRIMARY KEY (guild_id, key, period, bucket, user_id)"
+        ") WITHOUT ROWID;"
+        "CREATE INDEX IF NOT EXISTS period_scores_ranking "
+        "    ON period_scores (guild_id, key, period, bucket, score DESC, user_id);"
+        "CREATE TABLE IF NOT EXISTS stats ("
+        "    guild_id INTEGER NOT NULL,"
+        "    user_id INTEGER NOT NULL,"
+        "    key TEXT NOT NULL,"
+        "    attempts INTEGER NOT NULL,"
+        "    streak INTEGER NOT NULL,"
+        "    best_streak INTEGER NOT NULL,"
+        "    fastest REAL,"
+        "    PRIMARY KEY (guild_id, user_id, key)"
+        ") WITHOUT ROWID;"
+        "CREATE INDEX IF NOT EXISTS scores_user "
+        "    ON scores (guild_id, user_id);"
+    )
+    SQL_UPSERT = (
+        "INSERT INTO scores (guild_id, user_id, key, score) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (guild_id, key, user_id) "
+        "DO UPDATE SET score = score + excluded.score"
+    )
+    SQL_UPSERT_PERIOD = (
+        "INSERT INTO period_scores (guild_id, user_id, key, period, bucket, score) "
+        "VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (guild_id, key, period, bucket, user_id) "
+        "DO UPDATE SET score = score + excluded.score"
+    )
+    SQL_EXPIRE_PERIOD = (
+        "DELETE FROM period_scores WHERE period = ? AND bucket <> ?"
+    )
+    # 猜中时 correct 为1, 连续猜中加一; 猜错时为0, 连续猜中清零
+    SQL_UPSERT_STATS = (
+        "INSERT INTO stats "
+        "(guild_id, user_id, key, attempts, streak, best_streak, fastest) "
+        "VALUES (:guild_id, :user_id, :key, 1, :correct, :correct, :elapsed) "
+        "ON CONFLICT (guild_id, user_id, key) DO UPDATE SET "
+        "attempts = attempts + 1, "
+        "streak = CASE WHEN :correct THEN streak + 1 ELSE 0 END, "
+        "best_streak = MAX(best_streak, CASE WHEN :correct THEN streak + 1 ELSE 0 END), "
+        "fastest = COALESCE(MIN(fastest, excluded.fastest), fastest, excluded.fastest)"
+    )
+    SQL_USER_STATS = (
+        "SELECT key, score, 0, 0, 0, NULL FROM scores "
+        "WHERE guild_id = ? AND user_id = ? AND key <> ? "
+        "UNION ALL "
+        "SELECT key, 0, attempts, streak, best_streak, fastest FROM stats "
+        "WHERE guild_id = ? AND user_id = ?"
+    )
+    SQL_RANKING = (
+        "SELECT user_id, score FROM scores "
+        "WHERE guild_id = ? AND key = ? "
+        "ORDER BY score DESC, user_id ASC LIMIT ?"
+    )
+    SQL_RANKING_PERIOD = (
+        "SELECT user_id, score FROM period_scores "
+        "WHERE guild_id = ? AND key = ? AND period = ? AND bucket = ? "
+        "ORDER BY score DESC, user_id ASC LIMIT ?"
+    )
+    SQL_FIELDS = (
+        "SELECT user_id, key, score FROM scores "
+        "WHERE guild_id = ? AND user_id IN ({users}) AND key IN ({keys})"
+    )
+    SQL_FIELDS_PERIOD = (
+        "SELECT user_id, key, score FROM period_scores "
+        "WHERE guild_id = ? AND period = ? AND bucket = ? "
+        "AND user_id IN ({users}) AND key IN ({keys})"
+    )
+    SQL_SCORE = (
+        "SELECT score FROM scores "
+        "WHERE guild_id = ? AND key = ? AND user_id = ?"
+    )
+    SQL_SCORE_PERIOD = (
+        "SELECT score FROM period_scores "
+        "WHERE guild_id = ? AND key = ? AND period = ? AND bucket = ? AND user_id = ?"
+    )
+    SQL_COUNT_AHEAD = (
+        "SELECT "
+        "(SELECT COUNT(*) FROM scores "
+        " WHERE guild_id = ? AND key = ? AND score > ?) + "
+        "(SELECT COUNT(*) FROM scores "
+        " WHERE guild_id = ? AND key = ? AND score = ? AND user_id < ?)"
+    )
+    SQL_COUNT_AHEAD_PERIOD = (
+        "SELECT "
+        "(SELECT COUNT(*) FROM period_scores "
+        " WHERE guild_id = ? AND key = ? AND period = ? AND bucket = ? AND score > ?) + "
+        "(SELECT COUNT(*) FROM period_scores "
+        " WHERE guild_id = ? AND key = ? AND period = ? AND bucket = ? "
+        " AND score = ? AND user_id < ?)"
+    )
+
+    def __init__(self, path: str) -> None:
+        """
+        初始化SQLite数据库, 连接在专用线程中首次使用时建立.
+        Args:
+            path (str): 数据库文件路径.
+        """
+        self.members = MemberCache()
+        self.path = path
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="pjsk-guess-sqlite"
+        )
+        self._connection: Optional[sqlite3.Connection] = None
+        self._buckets: Dict[str, str] = {}
+        self._pending: Optional[Dict[Tuple[int, int, str], int]] = None
+        self._pending_stats: List[Dict[str, Any]] = []
+        self._pending_done: Optional[asyncio.Future] = None
+        self._pending_task: Optional[asyncio.Task] = None
+
+    async def setup(self, keys: Iterable[str]) -> None:
+        """
+        在启动时建立连接并确保表结构与索引存在.
+        所有分数键共用同一排行索引.
+        Args:
+            keys (Iterable[str]): 排行榜分数对应的键.
+        """
+        await self._run(self._connect)
+
+    async def close(self) -> None:
+        """
+        写入未提交的更新并关闭数据库连接.
+        """
+        if self._pending_task is not None:
+            await self._pending_task
+        await self._run(self._disconnect)
+        self._executor.shutdown(wait=True)
+
+    async def update(
+        self,
+        guild_id: int,
+        user_id: int,
+        key: str,
+        elapsed: Optional[float] = None
+    ) -> None:
+        """
+        更新状态.
+        更新先进入当前批次, 在下一次事件循环迭代中与其他更新一同写入.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            key (str): 要更新分数对应的键.
+            elapsed (Optional[float]): 自猜曲开始的用时, 单位为秒, 未知时为None.
+        """
+        pending, done = self._batch()
+
+        # 总排行分数与模式分数同表存放, 作为另一个分数键一同写入
+        for item, amount in (
+            ((guild_id, user_id, key), 1),
+            ((guild_id, user_id, TOTAL_KEY), SCORE_WEIGHTS.get(key, 1))
+        ):
+            pending[item] = pending.get(item, 0) + amount
+        self._pending_stats.append(
+            {
+                "guild_id": guild_id,
+                "user_id": user_id,
+                "key": key,
+                "correct": 1,
+                "elapsed": elapsed
+            }
+        )
+        await asyncio.shield(done)
+
+    async def record_miss(self, guild_id: int, user_id: int, key: str) -> None:
+        """
+        记录猜错, 与成绩更新进入同一批次.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            key (str): 分数对应的键.
+        """
+        _, done = self._batch()
+        self._pending_stats.append(
+            {
+                "guild_id": guild_id,
+                "user_id": user_id,
+                "key": key,
+                "correct": 0,
+                "elapsed": None
+            }
+        )
+        await asyncio.shield(done)
+
+    async def get_user_stats(
+        self,
+        guild_id: int,
+        user_id: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        获取用户在各模式的统计数据, 以一次查询读取该用户的全部行.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+        Returns:
+            stats (Dict[str, Dict[str, Any]]): 分数键与统计数据的映射.
+        """
+        rows = await self._run(
+            self._fetchall,
+            self.SQL_USER_STATS,
+            (guild_id, user_id, TOTAL_KEY, guild_id, user_id)
+        )
+        stats: Dict[str, Dict[str, Any]] = {}
+        for key, score, attempts, streak, best_streak, fastest in rows:
+            item = stats.setdefault(key, get_default_stats())
+            item["score"] += score
+            item["attempts"] += attempts
+            item["streak"] += streak
+            item["best_streak"] += best_streak
+            if fastest is not None:
+                item["fastest"] = fastest
+        return stats
+
+    async def get_ranking_data(
+        self,
+        guild_id: int,
+        key: str,
+        limit: int = 20,
+        period: Optional[str] = None,
+        fields: Iterable[str] = ()
+    ) -> list[dict[str, Any]]:
+        """
+        获取猜曲排行榜数据.
+        Args:
+            guild_id (int): 群组ID.
+            key (str): 排行榜分数对应的键.
+            limit (int): 排行榜限制数量, 默认为20.
+            period (Optional[str]): 周期, 默认为None即总排行.
+            fields (Iterable[str]): 随排行一同返回的其他分数键, 缺失时为0.
+        Returns:
+            data (List[Dict[str, Any]]): 群组排行字典列表.
+        """
+        return await self._run(
+            self._get_ranking_data,
+            guild_id,
+            key,
+            limit,
+            period,
+            None if period is None else get_period_bucket(period),
+            list(fields)
+        )
+
+    async def get_user_rank(
+        self,
+        guild_id: int,
+        user_id: int,
+        key: str,
+        period: Optional[str] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        获取用户的排名和分数.
+        通过排行索引统计排在用户之前的行数.
+        Args:
+            guild_id (int): 群组ID.
+            user_id (int): 用户ID.
+            key (str): 排行榜分数对应的键.
+            period (Optional[str]): 周期, 默认为None即总排行.
+        Returns:
+            rank (Optional[Tuple[int, int]]): 用户排名与分数, 用户无分数时为None.
+        """
+        return await self._run(
+            self._get_user_rank,
+            guild_id,
+            user_id,
+            key,
+            period,
+            None if period is None else get_period_bucket(period)
+        )
+
+    def _batch(self) -> Tuple[Dict[Tuple[int, int, str], int], asyncio.Future]:
+        """
+        获取当前批次, 不存在时创建并安排在下一次事件循环迭代中提交.
+        Returns:
+            pending (Dict): 当前批次的分数增量.
+            done (asyncio.Future): 批次写入完成句柄.
+        """
+        if self._pending is None:
+            self._pending = {}
+            self._pending_done = asyncio.get_running_loop().create_future()
+            self._pending_task = asyncio.create_task(self._commit())
+        assert self._pending_done is not None, "批次存在时必定具有完成句柄."
+        return self._pending, self._pending_done
+
+    async def _commit(self) -> None:
+        """
+        将当前批次的更新一次性写入数据库.
+        """
+        # 让出一次事件循环, 收集同一迭代内的其他更新
+        await asyncio.sleep(0)
+
+        pending, done = self._pending, self._pending_done
+        pending_stats = self._pending_stats
+        self._pending = self._pending_done = self._pending_task = None
+        self._pending_stats = []
+        assert pending is not None and done is not None, "提交时必定具有批次."
+
+        buckets = {period: get_period_bucket(period) for period in PERIODS}
+        try:
+            await self._run(self._write, pending, pending_stats, buckets)
+        except Exception as e:
+            done.set_exception(e)
+        else:
+            done.set_result(None)
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        在专用线程中执行函数.
+        Args:
+            func (Callable): 函数.
+            *args (Any): 函数参数.
+        Returns:
+            result (Any): 函数返回值.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        建立连接并初始化表结构, 只在专用线程中调用.
+        Returns:
+            connection (sqlite3.Connection): 数据库连接.
+        """
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path,
+                check_same_thread=False,
+                cached_statements=64
+            )
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.executescript(self.SQL_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _disconnect(self) -> None:
+        """
+        关闭连接, 只在专用线程中调用.
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _write(
+        self,
+        pending: Dict[Tuple[int, int, str], int],
+        pending_stats: List[Dict[str, Any]],
+        buckets: Dict[str, str]
+    ) -> None:
+        """
+        在一个事务中写入总分数, 周期分数与用户统计, 并删除过期的周期桶.
+        只在专用线程中调用.
+        Args:
+            pending (Dict): 群组ID, 用户ID, 分数键与增量的映射.
+            pending_stats (List[Dict]): 按发生顺序排列的猜中与猜错记录.
+            buckets (Dict[str, str]): 周期与当前桶的映射.
+        """
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                self.SQL_UPSERT,
+                [
+                    (guild_id, user_id, key, count)
+                    for (guild_id, user_id, key), count in pending.items()
+                ]
+            )
+            connection.executemany(
+                self.SQL_UPSERT_PERIOD,
+                [
+                    (guild_id, user_id, key, period, bucket, count)
+                    for (guild_id, user_id, key), count in pending.items()
+                    for period, bucket in buckets.items()
+                ]
+            )
+            connection.executemany(self.SQL_UPSERT_STATS, pending_stats)
+            for period, bucket in buckets.items():
+                if self._buckets.get(period) != bucket:
+                    connection.execute(self.SQL_EXPIRE_PERIOD, (period, bucket))
+        self._buckets.update(buckets)
+
+    def _fetchall(self, sql: str, parameters: Tuple) -> List[Tuple]:
+        """
+        执行查询并返回所有行, 只在专用线程中调用.
+        """
+        return self._connect().execute(sql, parameters).fetchall()
+
+    def _get_ranking_data(
+        self,
+        guild_id: int,
+        key: str,
+        limit: int,
+        period: Optional[str],
+        bucket: Optional[str],
+        fields: List[str]
+    ) -> list[dict[str, Any]]:
+        """
+        查询排行数据, 其他分数键以一次查询补齐, 只在专用线程中调用.
+        """
+        if period is None:
+            sql_ranking, sql_fields = self.SQL_RANKING, self.SQL_FIELDS
+            scope: Tuple = (guild_id,)
+        else:
+            sql_ranking, sql_fields = self.SQL_RANKING_PERIOD, self.SQL_FIELDS_PERIOD
+            scope = (guild_id, period, bucket)
+
+        connection = self._connect()
+        rows = connection.execute(
+            sql_ranking,
+            (scope[0], key, *scope[1:], limit)
+        ).fetchall()
+        data = [
+            {"user_id": user_id, key: score, **dict.fromkeys(fields, 0)}
+            for user_id, score in rows
+        ]
+        if not data or not fields:
+            return data
+
+        items = {item["user_id"]: item for item in data}
+        sql = sql_fields.format(
+            users=", ".join("?" * len(items)),
+            keys=", ".join("?" * len(fields))
+        )
+        for user_id, field, score in connection.execute(
+            sql,
+            (*scope, *items, *fields)
+        ):
+            items[user_id][field] = score
+        return data
+
+    def _get_user_rank(
+        self,
+        guild_id: int,
+        user_id: int,
+        key: str,
+        period: Optional[str],
+        bucket: Optional[str]
+    ) -> Optional[Tuple[int, int]]:
+        """
+        查询用户的排名和分数, 只在专用线程中调用.
+        """
+        if period is None:
+            sql_score, sql_count = self.SQL_SCORE, self.SQL_COUNT_AHEAD
+            scope: Tuple = (guild_id, key)
+        else:
+            sql_score, sql_count = self.SQL_SCORE_PERIOD, self.SQL_COUNT_AHEAD_PERIOD
+            scope = (guild_id, key, period, bucket)
+
+        connection = self._connect()
+        row = connection.execute(sql_score, (*scope, user_id)).fetchone()
+        if row is None:
+            return None
+
+        score = row[0]
+        count = connection.execute(
+            sql_count,
+            (*scope, score, *scope, score, user_id)
+        ).fetchone()[0]
+        return count + 1, score
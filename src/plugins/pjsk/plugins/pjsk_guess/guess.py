@@ -1,4 +1,5 @@
 ﻿import os
+import time
 import random
 import asyncio
 import requests
@@ -9,14 +10,20 @@ import PIL.Image
 from nonebot import on_type
 from nonebot.matcher import Matcher
 from nonebot.rule import startswith, fullmatch
-from nonebot.adapters.discord import MessageSegment, GuildMessageCreateEvent
+from nonebot.adapters.discord import (
+    MessageSegment,
+    GuildMessageCreateEvent,
+    GuildMemberAddEvent,
+    GuildMemberUpdateEvent,
+    GuildMemberRemoveEvent
+)
 from nonebot.adapters.discord.api import File, MessageReference
 
 from .utils import convert_text
 from .models import PJSKGuessBase
 from .models import PJSKGuessStatusManager as StatusManager
 from .models import PJSKGuessMetadata as Metadata
-from .database.mongo import PJSKGuessDatabase as Database
+from .database.base import PJSKGuessDatabaseBase as Database
 
 
 class PJSKGuess(PJSKGuessBase):
@@ -45,14 +52,22 @@ class PJSKGuess(PJSKGuessBase):
     # 元数据
     METADATA: Metadata
 
-    # 分数键名
+    # 分数键名与模式名称
     SCORE_NAME = "score_guess_jacket"
+    SCORE_LABEL = "曲绘"
+
+    # 周期排行, 在排行命令的"排行"前加入周期字样, 例如"猜曲周排行"
+    RANKING_PERIODS = {"周": "week", "週": "week", "月": "month"}
+    INFO_RANKING_PERIODS = {"week": "本周排行", "month": "本月排行"}
 
     # 事件响应器
     match_user_begin: Type[Matcher]
     match_user_guess: Type[Matcher]
     match_user_end: Type[Matcher]
     match_user_get_ranking: Optional[Type[Matcher]]
+    match_member_message: Optional[Type[Matcher]]
+    match_member_update: Optional[Type[Matcher]]
+    match_member_remove: Optional[Type[Matcher]]
 
     def __init__(
         self,
@@ -177,6 +192,9 @@ class PJSKGuess(PJSKGuessBase):
             message_reference + self.INFO_BEGIN + jacket_cropped
         )
 
+        # 题目发出后开始计时
+        status["start_time"] = time.monotonic()
+
         # 设置频道状态为正在猜曲
         try:
             await asyncio.wait_for(handle.wait(), timeout=60)
@@ -236,7 +254,10 @@ class PJSKGuess(PJSKGuessBase):
                 + status["resource"]
             )
 
-            # 清理频道猜曲状态
+            # 计算猜中用时并清理频道猜曲状态
+            start_time = status["start_time"]
+            elapsed = None if start_time is None \
+                else time.monotonic() - start_time
             self.status_manager.clear(channel_id)
 
             # 获取信息
@@ -252,7 +273,8 @@ class PJSKGuess(PJSKGuessBase):
                 await self.database.update(
                     user_id=user_id,
                     guild_id=guild_id,
-                    key=status["score_name"]
+                    key=status["score_name"],
+                    elapsed=elapsed
                 )
 
             # 结束猜曲
@@ -260,6 +282,14 @@ class PJSKGuess(PJSKGuessBase):
 
         # status["music_names"] NOT in music_names
         else:
+            # 记录用户猜错
+            if self.database is not None:
+                await self.database.record_miss(
+                    user_id=event.user_id,
+                    guild_id=event.guild_id,
+                    key=status["score_name"]
+                )
+
             # 发送用户猜测错误信息并结束猜曲
             music_names_edited = \
                 self.METADATA.generate_message(music_names[0])
@@ -319,6 +349,35 @@ class PJSKGuess(PJSKGuessBase):
                 + self.INFO_NOT_GUESSING
             )
 
+    @classmethod
+    def get_ranking_commands(cls, *commands: str) -> Tuple[str, ...]:
+        """
+        生成包含周期排行的排行命令.
+        Args:
+            *commands (str): 总排行命令, 须以"排行"结尾.
+        Returns:
+            commands (Tuple[str, ...]): 总排行与各周期排行命令.
+        """
+        return commands + tuple(
+            command[:-len("排行")] + prefix + "排行"
+            for command in commands
+            for prefix in cls.RANKING_PERIODS
+        )
+
+    @classmethod
+    def get_ranking_period(cls, command: str) -> Optional[str]:
+        """
+        从排行命令中解析周期.
+        Args:
+            command (str): 排行命令.
+        Returns:
+            period (Optional[str]): 周期, 总排行时为None.
+        """
+        for prefix, period in cls.RANKING_PERIODS.items():
+            if command.endswith(prefix + "排行"):
+                return period
+        return None
+
     async def handle_user_get_ranking(
         self,
         event: GuildMessageCreateEvent
@@ -339,32 +398,94 @@ class PJSKGuess(PJSKGuessBase):
 
         # 获取排行榜数据
         guild_id = event.guild_id
-        data = await self.database.get_ranking_data(guild_id=guild_id, key=self.SCORE_NAME)
+        period = self.get_ranking_period(event.content.strip())
+        data = await self.database.get_ranking_data(
+            guild_id=guild_id,
+            key=self.SCORE_NAME,
+            period=period
+        )
 
         # 构建排行榜信息
         info_ranking = await self.database.generate_ranking(guild_id, data, key=self.SCORE_NAME)
 
-        # TODO: 用户不在排行榜时获取猜中次数
         # 构建用户信息
-        user_id = event.user_id
-        for i, data in enumerate(data):
-            if user_id == data["user_id"]:
-                info_user = (
-                    f'\n\n您的排名:{i + 1:>8} 位\n'
-                    f'猜中次数:{data[self.SCORE_NAME]:>8} 次'
-                )
-                break
+        rank = await self.database.get_user_rank(
+            guild_id=guild_id,
+            user_id=event.user_id,
+            key=self.SCORE_NAME,
+            period=period
+        )
+        if rank is not None:
+            user_rank, user_score = rank
+            info_user = (
+                f'\n\n您的排名:{user_rank:>8} 位\n'
+                f'猜中次数:{user_score:>8} 次'
+            )
         else:
             info_user = f"\n\n您的排名: 暂无排名"
 
+        # 周期排行附加标题
+        info_title = ""
+        if period is not None:
+            info_title = self.INFO_RANKING_PERIODS[period] + "\n"
+
         await self.match_user_get_ranking.finish(
             message_reference +
+            info_title +
             "```python\n" +
             info_ranking +
             info_user +
             "\n```"
         )
 
+    async def handle_member_message(
+        self,
+        event: GuildMessageCreateEvent
+    ) -> None:
+        """
+        从消息事件中更新成员名称缓存.
+        Args:
+            event (GuildMessageCreateEvent): 事件对象.
+        """
+        assert self.database is not None, "非预期的调用, 请检查配置数据库配置."
+
+        # 机器人和 Webhook 消息不具有成员信息
+        if not event.member:
+            return
+
+        if event.member.nick:
+            user_name = event.member.nick
+        elif event.author.global_name:
+            user_name = event.author.global_name
+        else:
+            user_name = event.author.username
+        self.database.members.put(event.guild_id, event.user_id, user_name)
+
+    async def handle_member_update(
+        self,
+        event: GuildMemberAddEvent | GuildMemberUpdateEvent
+    ) -> None:
+        """
+        从成员加入和更新事件中更新成员名称缓存.
+        Args:
+            event (GuildMemberAddEvent | GuildMemberUpdateEvent): 事件对象.
+        """
+        assert self.database is not None, "非预期的调用, 请检查配置数据库配置."
+        self.database.members.put(
+            event.guild_id,
+            event.user.id,
+            self.database.members.get_member_name(event)
+        )
+
+    async def handle_member_remove(self, event: GuildMemberRemoveEvent) -> None:
+        """
+        从成员离开事件中移除成员名称缓存.
+        Args:
+            event (GuildMemberRemoveEvent): 事件对象.
+        """
+        assert self.database is not None, "非预期的调用, 请检查配置数据库配置."
+        self.database.members.discard(event.guild_id, event.user.id)
+
     def _register_matchers(self) -> None:
         """
         注册事件响应器, 在构造函数中调用.
@@ -390,6 +511,20 @@ class PJSKGuess(PJSKGuessBase):
         if self.database is not None:
             self.match_user_get_ranking = on_type(
                 GuildMessageCreateEvent,
-                rule=fullmatch(("猜曲排行")),
+                rule=fullmatch(self.get_ranking_commands("猜曲排行")),
                 handlers=[self.handle_user_get_ranking]
             )
+
+            # 成员名称缓存由网关事件写入, 各模式共用同一数据库, 仅注册一次
+            self.match_member_message = on_type(
+                GuildMessageCreateEvent,
+                handlers=[self.handle_member_message]
+            )
+            self.match_member_update = on_type(
+                (GuildMemberAddEvent, GuildMemberUpdateEvent),
+                handlers=[self.handle_member_update]
+            )
+            self.match_member_remove = on_type(
+                GuildMemberRemoveEvent,
+                handlers=[self.handle_member_remove]
+            )
@@ -9,7 +9,7 @@ from nonebot.adapters.discord import GuildMessageCreateEvent
 from .guess import PJSKGuess
 from .models import PJSKGuessStatusManager as StatusManager
 from .models import PJSKGuessMetadata as Metadata
-from .database.mongo import PJSKGuessDatabase as Database
+from .database.base import PJSKGuessDatabaseBase as Database
 
 
 class PJSKGuessGray(PJSKGuess):
@@ -26,6 +26,7 @@ class PJSKGuessGray(PJSKGuess):
     )
 
     SCORE_NAME = "score_guess_jacket_gray"
+    SCORE_LABEL = "阴间"
 
     def __init__(
         self,
@@ -75,6 +76,6 @@ class PJSKGuessGray(PJSKGuess):
         if self.database is not None:
             self.match_user_get_ranking = on_type(
                 GuildMessageCreateEvent,
-                rule=fullmatch(("阴间猜曲排行", "陰間猜曲排行")),
+                rule=fullmatch(self.get_ranking_commands("阴间猜曲排行", "陰間猜曲排行")),
                 handlers=[self.handle_user_get_ranking]
             )
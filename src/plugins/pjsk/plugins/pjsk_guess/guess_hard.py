@@ -9,7 +9,7 @@ from nonebot.adapters.discord import GuildMessageCreateEvent
 from .guess import PJSKGuess
 from .models import PJSKGuessStatusManager as StatusManager
 from .models import PJSKGuessMetadata as Metadata
-from .database.mongo import PJSKGuessDatabase as Database
+from .database.base import PJSKGuessDatabaseBase as Database
 
 
 class PJSKGuessHard(PJSKGuess):
@@ -26,6 +26,7 @@ class PJSKGuessHard(PJSKGuess):
     )
 
     SCORE_NAME = "score_guess_jacket_hard"
+    SCORE_LABEL = "非人类"
 
     def __init__(
         self,
@@ -74,6 +75,6 @@ class PJSKGuessHard(PJSKGuess):
         if self.database is not None:
             self.match_user_get_ranking = on_type(
                 GuildMessageCreateEvent,
-                rule=fullmatch(("非人类猜曲排行", "非人類猜曲排行")),
+                rule=fullmatch(self.get_ranking_commands("非人类猜曲排行", "非人類猜曲排行")),
                 handlers=[self.handle_user_get_ranking]
             )
@@ -1,4 +1,5 @@
 ﻿import os
+import time
 import random
 import asyncio
 import aiohttp
@@ -16,7 +17,7 @@ from nonebot.adapters.discord import MessageSegment, GuildMessageCreateEvent
 from .guess import PJSKGuess
 from .models import PJSKGuessStatusManager as StatusManager
 from .models import PJSKGuessMetadata as Metadata
-from .database.mongo import PJSKGuessDatabase as Database
+from .database.base import PJSKGuessDatabaseBase as Database
 
 
 class PJSKGuessMusic(PJSKGuess):
@@ -40,8 +41,9 @@ class PJSKGuessMusic(PJSKGuess):
     URL_SEIKAI_VIEWER_MUSIC = URL_SEIKAI_VIEWER + "/long"
     URL_SEIKAI_VIEWER_JACKET = URL_SEIKAI_VIEWER + "/jacket"
 
-    # 分数键名
+    # 分数键名与模式名称
     SCORE_NAME = "score_guess_music"
+    SCORE_LABEL = "听歌"
 
     def __init__(
         self,
@@ -185,6 +187,9 @@ class PJSKGuessMusic(PJSKGuess):
             message_reference + self.INFO_BEGIN + music_cropped
         )
 
+        # 题目发出后开始计时
+        status["start_time"] = time.monotonic()
+
         # 设置频道状态为正在猜曲
         try:
             await asyncio.wait_for(handle.wait(), timeout=60)
@@ -212,7 +217,7 @@ class PJSKGuessMusic(PJSKGuess):
         if self.database is not None:
             self.match_user_get_ranking = on_type(
                 GuildMessageCreateEvent,
-                rule=fullmatch(("听歌猜曲排行", "聽歌猜曲排行")),
+                rule=fullmatch(self.get_ranking_commands("听歌猜曲排行", "聽歌猜曲排行")),
                 handlers=[self.handle_user_get_ranking]
             )
 
@@ -21,8 +21,9 @@ class PJSKGuessMusicReverse(PJSKGuessMusic):
         "Jacket guess, answer by \"-\" + song name, send \"endpjskguess\" to end"
     )
 
-    # 分数键名
+    # 分数键名与模式名称
     SCORE_NAME = "score_guess_music_reverse"
+    SCORE_LABEL = "倒放"
 
     def process_resource(
         self,
@@ -56,6 +57,6 @@ class PJSKGuessMusicReverse(PJSKGuessMusic):
         if self.database is not None:
             self.match_user_get_ranking = on_type(
                 GuildMessageCreateEvent,
-                rule=fullmatch(("倒放猜曲排行")),
+                rule=fullmatch(self.get_ranking_commands("倒放猜曲排行")),
                 handlers=[self.handle_user_get_ranking]
             )
@@ -0,0 +1,82 @@
+from typing import Type, Sequence
+
+from nonebot.adapters.discord import ApplicationCommandInteractionEvent
+from nonebot.adapters.discord.commands import on_slash_command
+from nonebot.adapters.discord.commands.matcher import SlashCommandMatcher
+
+from .guess import PJSKGuess
+from .database.base import PJSKGuessDatabaseBase as Database
+
+
+class PJSKGuessStats:
+    """
+    PJSK猜曲个人统计, 展示用户在各模式的猜中次数, 尝试次数, 连续猜中与最快用时.
+    统计由数据库在每次猜中或猜错时以一次写入维护, 查询只读取用户的一条记录.
+    """
+    INFO_EMPTY = "暂无猜曲记录"
+
+    def __init__(self, database: Database, modes: Sequence[PJSKGuess]) -> None:
+        """
+        初始化PJSK猜曲个人统计.
+        Args:
+            database (Database): 数据库实例.
+            modes (Sequence[PJSKGuess]): 展示统计的猜曲模式.
+        """
+        self.database = database
+        self.labels = {mode.SCORE_NAME: mode.SCORE_LABEL for mode in modes}
+        self._register_matchers()
+
+    async def handle_user_get_stats(
+        self,
+        event: ApplicationCommandInteractionEvent
+    ) -> None:
+        """
+        处理获取个人统计事件.
+        Args:
+            event (ApplicationCommandInteractionEvent): 事件对象.
+        """
+        # 发送延迟响应
+        await self.match_user_get_stats.send_deferred_response()
+
+        assert event.guild_id and event.member and event.member.user, \
+            "个人统计命令只能在服务器中使用."
+        stats = await self.database.get_user_stats(
+            event.guild_id,
+            event.member.user.id
+        )
+
+        # 按模式顺序构建统计信息
+        info_stats = ""
+        for key, label in self.labels.items():
+            item = stats.get(key)
+            if item is None:
+                continue
+            fastest = "-" if item["fastest"] is None \
+                else f"{item['fastest']:.2f} 秒"
+            info_stats += (
+                f"{label}\n"
+                f"  猜中:{item['score']:>6} 次    尝试:{item['attempts']:>6} 次\n"
+                f"  连续:{item['streak']:>6} 次    最佳:{item['best_streak']:>6} 次\n"
+                f"  最快:{fastest:>8}\n"
+            )
+
+        await self.match_user_get_stats.finish(
+            "```python\n" +
+            (info_stats.strip("\n") or self.INFO_EMPTY) +
+            "\n```"
+        )
+
+    def _register_matchers(self) -> None:
+        """
+        注册事件响应器, 在构造函数中调用.
+        """
+        self.match_user_get_stats: Type[SlashCommandMatcher] = on_slash_command(
+            name="pjskstats",
+            description="查看个人猜曲统计",
+            description_localizations={
+                "zh-CN": "查看个人猜曲统计",
+                "zh-TW": "查看個人猜曲統計"
+            },
+            dm_permission=False,
+            handlers=[self.handle_user_get_stats]
+        )
@@ -0,0 +1,102 @@
+from typing import Type, Sequence
+
+from nonebot import on_type
+from nonebot.matcher import Matcher
+from nonebot.rule import fullmatch
+from nonebot.adapters.discord import MessageSegment, GuildMessageCreateEvent
+from nonebot.adapters.discord.api import MessageReference
+
+from .guess import PJSKGuess
+from .database.base import TOTAL_KEY
+from .database.base import PJSKGuessDatabaseBase as Database
+
+
+class PJSKGuessTotal:
+    """
+    PJSK猜曲总排行, 按各模式权重累计的总分排名.
+    总分由数据库在每次猜中时同步维护, 排行与各模式分数通过一次查询获取.
+    """
+
+    def __init__(self, database: Database, modes: Sequence[PJSKGuess]) -> None:
+        """
+        初始化PJSK猜曲总排行.
+        Args:
+            database (Database): 数据库实例.
+            modes (Sequence[PJSKGuess]): 参与总排行的猜曲模式.
+        """
+        self.database = database
+        self.labels = {mode.SCORE_NAME: mode.SCORE_LABEL for mode in modes}
+        self._register_matchers()
+
+    async def handle_user_get_ranking(
+        self,
+        event: GuildMessageCreateEvent
+    ) -> None:
+        """
+        处理获取猜曲总排行榜事件.
+        Args:
+            event (GuildMessageCreateEvent): 事件对象.
+        """
+        # 获取消息引用
+        message_id = event.message_id
+        message_reference = MessageReference(message_id=message_id)
+        message_reference = MessageSegment.reference(message_reference)
+
+        # 获取排行榜数据, 同时取回各模式分数
+        guild_id = event.guild_id
+        period = PJSKGuess.get_ranking_period(event.content.strip())
+        data = await self.database.get_ranking_data(
+            guild_id=guild_id,
+            key=TOTAL_KEY,
+            period=period,
+            fields=self.labels
+        )
+
+        # 构建排行榜信息
+        info_ranking = await self.database.generate_total_ranking(
+            guild_id,
+            data,
+            self.labels
+        )
+
+        # 构建用户信息
+        rank = await self.database.get_user_rank(
+            guild_id=guild_id,
+            user_id=event.user_id,
+            key=TOTAL_KEY,
+            period=period
+        )
+        if rank is not None:
+            user_rank, user_score = rank
+            info_user = (
+                f'\n\n您的排名:{user_rank:>8} 位\n'
+                f'猜曲总分:{user_score:>8} 分'
+            )
+        else:
+            info_user = f"\n\n您的排名: 暂无排名"
+
+        # 周期排行附加标题
+        info_title = ""
+        if period is not None:
+            info_title = PJSKGuess.INFO_RANKING_PERIODS[period] + "\n"
+
+        await self.match_user_get_ranking.finish(
+            message_reference +
+            info_title +
+            "```python\n" +
+            info_ranking +
+            info_user +
+            "\n```"
+        )
+
+    def _register_matchers(self) -> None:
+        """
+        注册事件响应器, 在构造函数中调用.
+        """
+        self.match_user_get_ranking: Type[Matcher] = on_type(
+            GuildMessageCreateEvent,
+            rule=fullmatch(
+                PJSKGuess.get_ranking_commands("总猜曲排行", "總猜曲排行")
+            ),
+            handlers=[self.handle_user_get_ranking]
+        )
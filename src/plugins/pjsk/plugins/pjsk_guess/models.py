@@ -17,12 +17,14 @@ class PJSKGuessStatus(TypedDict):
         music_names (Optional[List[str]]): 猜曲名称列表.
         user_guess_event (Optional[asyncio.Event]): 用户猜测正确事件.
         score_name (Optional[str]): 分数名称, 用于记录猜曲成绩.
+        start_time (Optional[float]): 题目发出的时间, 以 time.monotonic 计, 用于计算猜中用时.
     """
     is_guessing: bool
     resource: Any
     music_names: Optional[List[str]]
     user_guess_event: Optional[asyncio.Event]
     score_name: Optional[str]
+    start_time: Optional[float]
 
 
 class PJSKGuessStatusManager:
@@ -71,7 +73,8 @@ class PJSKGuessStatusManager:
             "resource": None,
             "music_names": None,
             "user_guess_event": None,
-            "score_name": None
+            "score_name": None,
+            "start_time": None
         }
 
 
@@ -167,8 +170,9 @@ class PJSKGuessBase(ABC):
     # 数据库句柄
     database: Optional[PJSKGuessDatabaseBase]
 
-    # 分数键名
+    # 分数键名与模式名称
     SCORE_NAME: str
+    SCORE_LABEL: str
 
     @abstractmethod
     def __init__(
@@ -1,16 +1,159 @@
-﻿from nonebot.adapters.discord import MessageSegment
-from nonebot.adapters.discord.api import File, StringOption
+﻿import os
+import re
+import asyncio
+from typing import Dict, List, Optional
+
+from nonebot import get_driver, logger
+from nonebot.adapters.discord import Message, MessageSegment
+from nonebot.adapters.discord.api import File, OptionChoice, StringOption
 from nonebot.adapters.discord.commands import CommandOption, on_slash_command
 
-from .models import PJSKProfileCN, PJSKProfileTW, PJSKProfileJP
-from .card import PJSKProfileCard
+from .models import PJSKProfileCN, PJSKProfileTW, PJSKProfileJP, PJSKProfileCardContent
+from .card import profile_renderer
+from .encoder import CardEncoder
+from .cache import PJSKProfileCache
+from .client import PJSKProfileClient
+from .worker import PJSKProfileCardWorker
 
 base_url = ""
 
+PROFILE_CACHE_TTL = float(os.getenv("PJSK_PROFILE_CACHE_TTL", "300"))
+PROFILE_CACHE_STALE_TTL = float(os.getenv("PJSK_PROFILE_CACHE_STALE_TTL", "3600"))
+PROFILE_CACHE_MAX_BYTES = int(os.getenv("PJSK_PROFILE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+PROFILE_CARD_FORMAT = os.getenv("PJSK_PROFILE_CARD_FORMAT", "PNG")
+PROFILE_CARD_COMPRESS_LEVEL = int(os.getenv("PJSK_PROFILE_CARD_COMPRESS_LEVEL", "3"))
+PROFILE_CARD_MIN_PSNR = os.getenv("PJSK_PROFILE_CARD_MIN_PSNR")
+PROFILE_RENDER_WORKERS = int(os.getenv("PJSK_PROFILE_RENDER_WORKERS", "2"))
+PROFILE_RENDER_CACHE_MAX_BYTES = int(
+    os.getenv("PJSK_PROFILE_RENDER_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
+PROFILE_COMPARE_MAX_USERS = int(os.getenv("PJSK_PROFILE_COMPARE_MAX_USERS", "4"))
+# 定期记录缓存与渲染统计的间隔秒数, 为0时不记录
+PROFILE_STATS_INTERVAL = float(os.getenv("PJSK_PROFILE_STATS_INTERVAL", "3600"))
+
 profile_tw = PJSKProfileTW(base_url)
 profile_jp = PJSKProfileJP(base_url)
 profile_cn = PJSKProfileCN(base_url)
 
+profile_cache = PJSKProfileCache(
+    PROFILE_CACHE_TTL,
+    PROFILE_CACHE_STALE_TTL,
+    PROFILE_CACHE_MAX_BYTES
+)
+profile_client = PJSKProfileClient(
+    [profile_cn, profile_tw, profile_jp],
+    cache=profile_cache
+)
+profile_renderer.encoder = CardEncoder(
+    PROFILE_CARD_FORMAT,
+    PROFILE_CARD_COMPRESS_LEVEL,
+    min_psnr=float(PROFILE_CARD_MIN_PSNR) if PROFILE_CARD_MIN_PSNR else None
+)
+profile_card_worker = PJSKProfileCardWorker(
+    PROFILE_RENDER_WORKERS,
+    PROFILE_RENDER_CACHE_MAX_BYTES
+)
+
+
+async def build_card(profile: Optional[PJSKProfileCardContent]) -> MessageSegment:
+    """
+    在渲染进程中生成个人信息卡片消息.
+    Args:
+        profile (Optional[PJSKProfileCardContent]): 个人信息, 获取失败时为 None.
+    Returns:
+        message (MessageSegment): 卡片附件, 获取失败时为提示文本.
+    """
+    if profile is None:
+        return MessageSegment.text("获取失败喵")
+    card = await profile_card_worker.render(profile)
+    card = File(content=card, filename=f"card.{profile_renderer.encoder.extension}")
+    return MessageSegment.attachment(card)
+
+
+async def build_compare(
+    user_ids: List[str],
+    profiles: List[Optional[PJSKProfileCardContent]]
+) -> Message:
+    """
+    在一次渲染进程调用中生成多个用户的对比图消息.
+    Args:
+        user_ids (List[str]): 用户ID.
+        profiles (List[Optional[PJSKProfileCardContent]]): 对应的个人信息, 获取失败时为 None.
+    Returns:
+        message (Message): 对比图附件, 附带获取失败的用户ID, 全部失败时为提示文本.
+    """
+    found = [profile for profile in profiles if profile is not None]
+    failed = [
+        user_id for user_id, profile in zip(user_ids, profiles)
+        if profile is None
+    ]
+    if not found:
+        return Message(MessageSegment.text("获取失败喵"))
+
+    message = Message()
+    if failed:
+        message += MessageSegment.text(f"获取失败喵: {', '.join(failed)}")
+    card = await profile_card_worker.render_compare(found)
+    card = File(content=card, filename=f"compare.{profile_renderer.encoder.extension}")
+    message += MessageSegment.attachment(card)
+    return message
+
+
+def format_stats(stats: Dict[str, float]) -> str:
+    """
+    将统计数据格式化为日志文本.
+    Args:
+        stats (Dict[str, float]): 统计数据.
+    Returns:
+        text (str): 以逗号分隔的键值对.
+    """
+    return ", ".join(
+        f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+        for key, value in stats.items()
+    )
+
+
+async def report_stats() -> None:
+    """
+    定期记录个人信息缓存与卡片渲染缓存的统计.
+    """
+    while True:
+        await asyncio.sleep(PROFILE_STATS_INTERVAL)
+        logger.info(
+            "[PJSK.Profile] "
+            f"个人信息缓存: {format_stats(profile_cache.get_stats())}"
+        )
+        logger.info(
+            "[PJSK.Profile] "
+            f"卡片渲染缓存: {format_stats(profile_card_worker.get_stats())}"
+        )
+
+
+stats_reporter: Optional[asyncio.Task] = None
+
+
+@get_driver().on_startup
+async def warm_up_renderer() -> None:
+    """
+    启动时启动渲染进程, 各渲染进程预加载卡片模板与字体, 并开始定期记录统计.
+    """
+    global stats_reporter
+    await profile_card_worker.start()
+    if PROFILE_STATS_INTERVAL > 0:
+        stats_reporter = asyncio.create_task(report_stats())
+
+
+@get_driver().on_shutdown
+async def close_profile_client() -> None:
+    """
+    关闭时停止记录统计, 释放个人信息客户端的连接并停止渲染进程.
+    """
+    if stats_reporter is not None:
+        stats_reporter.cancel()
+    await profile_client.close()
+    await profile_card_worker.close()
+
+
 cnpjskprofile = on_slash_command(
     name="cnpjskprofile",
     name_localizations={
@@ -46,14 +189,8 @@ async def handle_cnpjskprofile(
         user_id (CommandOption[str]): 用户ID.
     """
     await cnpjskprofile.send_deferred_response()
-    profile = profile_cn.get_profile(user_id)
-    if profile is not None:
-        card = PJSKProfileCard(profile)
-        card = File(content=card.getvalue(), filename="card.png")
-        card = MessageSegment.attachment(card)
-        await cnpjskprofile.finish(card)
-    else:
-        await cnpjskprofile.finish("获取失败喵")
+    profile = await profile_client.get_profile("cn", user_id)
+    await cnpjskprofile.finish(await build_card(profile))
 
 twpjskprofile = on_slash_command(
     name="twpjskprofile",
@@ -84,14 +221,8 @@ async def handle_twpjskprofile(
     user_id: CommandOption[str]
 ) -> None:
     await twpjskprofile.send_deferred_response()
-    profile = profile_tw.get_profile(user_id)
-    if profile is not None:
-        card = PJSKProfileCard(profile)
-        card = File(content=card.getvalue(), filename="card.png")
-        card = MessageSegment.attachment(card)
-        await twpjskprofile.finish(card)
-    else:
-        await twpjskprofile.finish("获取失败喵")
+    profile = await profile_client.get_profile("tw", user_id)
+    await twpjskprofile.finish(await build_card(profile))
 
 jppjskprofile = on_slash_command(
     name="jppjskprofile",
@@ -122,11 +253,108 @@ async def handle_jppjskprofile(
     user_id: CommandOption[str]
 ) -> None:
     await jppjskprofile.send_deferred_response()
-    profile = profile_jp.get_profile(user_id)
-    if profile is not None:
-        card = PJSKProfileCard(profile)
-        card = File(content=card.getvalue(), filename="card.png")
-        card = MessageSegment.attachment(card)
-        await jppjskprofile.finish(card)
+    profile = await profile_client.get_profile("jp", user_id)
+    await jppjskprofile.finish(await build_card(profile))
+
+pjskprofile = on_slash_command(
+    name="pjskprofile",
+    name_localizations={
+        "zh-CN": "个人信息",
+        "zh-TW": "個人資訊"
+    },
+    description="pjsk 个人信息, 自动查找区服",
+    description_localizations={
+        "zh-CN": "pjsk 个人信息, 自动查找区服",
+        "zh-TW": "pjsk 個人資訊, 自動查找區服"
+    },
+    options=[
+        StringOption(
+            name="user_id",
+            description="用户ID",
+            description_localizations={
+                "zh-CN": "用户ID",
+                "zh-TW": "使用者ID"
+            },
+            required=True
+        )
+    ]
+)
+
+@pjskprofile.handle()
+async def handle_pjskprofile(
+    user_id: CommandOption[str]
+) -> None:
+    """
+    同时查询所有区服, 使用最先获取成功的个人信息.
+    Args:
+        user_id (CommandOption[str]): 用户ID.
+    """
+    await pjskprofile.send_deferred_response()
+    result = await profile_client.get_profile_auto(user_id)
+    await pjskprofile.finish(await build_card(result[1] if result is not None else None))
+
+
+pjskcompare = on_slash_command(
+    name="pjskcompare",
+    name_localizations={
+        "zh-CN": "对比个人信息",
+        "zh-TW": "對比個人資訊"
+    },
+    description=f"pjsk 对比最多{PROFILE_COMPARE_MAX_USERS}个用户的个人信息",
+    description_localizations={
+        "zh-CN": f"pjsk 对比最多{PROFILE_COMPARE_MAX_USERS}个用户的个人信息",
+        "zh-TW": f"pjsk 對比最多{PROFILE_COMPARE_MAX_USERS}個使用者的個人資訊"
+    },
+    options=[
+        StringOption(
+            name="user_ids",
+            description="用户ID, 以空格或逗号分隔",
+            description_localizations={
+                "zh-CN": "用户ID, 以空格或逗号分隔",
+                "zh-TW": "使用者ID, 以空格或逗號分隔"
+            },
+            required=True
+        ),
+        StringOption(
+            name="region",
+            description="区服, 默认自动查找",
+            description_localizations={
+                "zh-CN": "区服, 默认自动查找",
+                "zh-TW": "區服, 預設自動查找"
+            },
+            required=False,
+            choices=[
+                OptionChoice(name="cn", value="cn"),
+                OptionChoice(name="tw", value="tw"),
+                OptionChoice(name="jp", value="jp")
+            ]
+        )
+    ]
+)
+
+@pjskcompare.handle()
+async def handle_pjskcompare(
+    user_ids: CommandOption[str],
+    region: CommandOption[Optional[str]]
+) -> None:
+    """
+    并发获取所有用户的个人信息, 在一次渲染中生成对比图.
+    Args:
+        user_ids (CommandOption[str]): 以空格或逗号分隔的用户ID.
+        region (CommandOption[Optional[str]]): 区服, 未指定时自动查找.
+    """
+    ids = list(dict.fromkeys(re.findall(r"[^\s,，]+", user_ids)))
+    if not ids or len(ids) > PROFILE_COMPARE_MAX_USERS:
+        await pjskcompare.finish(f"请输入1到{PROFILE_COMPARE_MAX_USERS}个用户ID喵")
+
+    await pjskcompare.send_deferred_response()
+    if region is not None:
+        profiles = await asyncio.gather(
+            *(profile_client.get_profile(region, user_id) for user_id in ids)
+        )
     else:
-        await jppjskprofile.finish("获取失败喵")
+        results = await asyncio.gather(
+            *(profile_client.get_profile_auto(user_id) for user_id in ids)
+        )
+        profiles = [result[1] if result is not None else None for result in results]
+    await pjskcompare.finish(await build_compare(ids, profiles))
@@ -0,0 +1,192 @@
+import os
+import mmap
+import asyncio
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+import ujson as json
+from nonebot import logger
+from PIL import Image
+
+AtlasEntry = Tuple[
+    int,  # 像素数据在图集文件中的偏移
+    int,  # 宽度
+    int  # 高度
+]
+
+
+class ThumbnailAtlas:
+    """
+    角色缩略图图集.
+    所有缩略图以解码后的 RGBA 像素顺序追加到同一个文件, 另以索引文件记录偏移与尺寸.
+    图集文件以只读方式内存映射, 读取缩略图无需打开文件或解码 PNG,
+    渲染进程之间共享同一份页缓存. 只有主进程通过 prefetch 写入图集,
+    其他进程发现缺失时重新加载索引.
+    """
+
+    def __init__(
+        self,
+        path_atlas: str,
+        path_index: str,
+        legacy_dir: str,
+        url: str,
+        concurrency: int = 8
+    ) -> None:
+        """
+        初始化图集, 文件在首次使用时加载.
+        Args:
+            path_atlas (str): 图集文件.
+            path_index (str): 索引文件.
+            legacy_dir (str): 旧版逐个保存的缩略图目录, 其中的文件在预取时导入图集.
+            url (str): 缩略图下载地址.
+            concurrency (int): 最大并发下载数, 默认为8.
+        """
+        self.path_atlas = path_atlas
+        self.path_index = path_index
+        self.legacy_dir = legacy_dir
+        self.url = url
+        self.concurrency = concurrency
+        self._index: Dict[str, AtlasEntry] = {}
+        self._index_mtime = 0.0
+        self._mmap: Optional[mmap.mmap] = None
+        self._loaded = False
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def __contains__(self, name: str) -> bool:
+        if not self._loaded:
+            self.load()
+        return name in self._index
+
+    def load(self) -> None:
+        """
+        加载索引并映射图集文件.
+        """
+        self._loaded = True
+        try:
+            mtime = os.path.getmtime(self.path_index)
+        except OSError:
+            return
+        if mtime == self._index_mtime:
+            return
+        with open(self.path_index, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self._index = {name: tuple(entry) for name, entry in index.items()}
+        self._index_mtime = mtime
+        self._map()
+
+    def get(self, name: str) -> Optional[Image.Image]:
+        """
+        读取缩略图, 像素直接引用映射的图集文件.
+        Args:
+            name (str): 缩略图文件名.
+        Returns:
+            thumbnail (Optional[Image.Image]): 缩略图, 不在图集中时为 None.
+        """
+        if name not in self:
+            # 其他进程可能已写入图集
+            self.load()
+            if name not in self._index:
+                return None
+        offset, width, height = self._index[name]
+        data = memoryview(self._mmap)[offset:offset + width * height * 4]
+        return Image.frombuffer("RGBA", (width, height), data, "raw", "RGBA", 0, 1)
+
+    def add(self, name: str, image: Image.Image) -> None:
+        """
+        向图集追加一张缩略图.
+        先写入像素数据再原子地替换索引, 中途失败只会留下未被索引的数据.
+        Args:
+            name (str): 缩略图文件名.
+            image (Image.Image): 缩略图.
+        """
+        if name in self:
+            return
+        image = image.convert("RGBA")
+        os.makedirs(os.path.dirname(self.path_atlas) or ".", exist_ok=True)
+        with open(self.path_atlas, "ab") as f:
+            offset = f.tell()
+            f.write(image.tobytes())
+        self._index[name] = (offset, image.width, image.height)
+
+        path_temp = f"{self.path_index}.tmp"
+        with open(path_temp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(path_temp, self.path_index)
+        self._index_mtime = os.path.getmtime(self.path_index)
+        self._map()
+
+    async def prefetch(self, names: Iterable[str]) -> None:
+        """
+        并发获取图集中缺失的缩略图并逐个加入图集.
+        优先导入旧版目录中的文件, 否则从 sekaiviewer 下载. 同一缩略图的并发请求只获取一次.
+        Args:
+            names (Iterable[str]): 缩略图文件名.
+        """
+        tasks: List[asyncio.Task] = []
+        for name in dict.fromkeys(names):
+            if name in self:
+                continue
+            task = self._pending.get(name)
+            if task is None:
+                task = asyncio.create_task(self._fetch(name))
+                self._pending[name] = task
+            tasks.append(task)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def close(self) -> None:
+        """
+        取消进行中的下载并关闭会话.
+        """
+        tasks = list(self._pending.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+        if self._session is not None:
+            await self._session.close()
+
+    async def _fetch(self, name: str) -> None:
+        """
+        获取一张缩略图并加入图集, 失败时记录警告.
+        """
+        try:
+            path_legacy = f"{self.legacy_dir}/{name}"
+            if os.path.exists(path_legacy):
+                with Image.open(path_legacy) as image:
+                    self.add(name, image)
+                return
+
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession(
+                    timeout=aiohttp.ClientTimeout(total=10)
+                )
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+            async with self._semaphore:
+                async with self._session.get(f"{self.url}/{name}") as response:
+                    response.raise_for_status()
+                    content = await response.read()
+            with Image.open(BytesIO(content)) as image:
+                self.add(name, image)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            logger.warning(
+                "[PJSK.Profile] "
+                f"获取角色缩略图失败: {name}, {e!r}"
+            )
+        finally:
+            self._pending.pop(name, None)
+
+    def _map(self) -> None:
+        """
+        重新映射图集文件.
+        """
+        # 旧映射可能仍被已读取的缩略图引用, 交由垃圾回收释放
+        self._mmap = None
+        if not os.path.exists(self.path_atlas) or os.path.getsize(self.path_atlas) == 0:
+            return
+        with open(self.path_atlas, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
@@ -0,0 +1,239 @@
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from nonebot import logger
+
+CacheKey = Tuple[
+    str,  # 区服名称
+    str  # 用户ID
+]
+CacheLoader = Callable[[], Awaitable[Optional[Tuple[Any, int]]]]
+
+
+class CacheEntry:
+    """
+    一条缓存的个人信息.
+    Attributes:
+        value (Any): 个人信息.
+        size (int): 估算的内存占用, 单位为字节.
+        fetched_at (float): 获取时的单调时间.
+    """
+    __slots__ = ("value", "size", "fetched_at")
+
+    def __init__(self, value: Any, size: int, fetched_at: float) -> None:
+        """
+        初始化缓存条目.
+        Args:
+            value (Any): 个人信息.
+            size (int): 估算的内存占用, 单位为字节.
+            fetched_at (float): 获取时的单调时间.
+        """
+        self.value = value
+        self.size = size
+        self.fetched_at = fetched_at
+
+
+class PendingLoad:
+    """
+    一个正在进行的上游请求与等待它的请求数.
+    Attributes:
+        task (asyncio.Task): 上游请求任务.
+        waiters (int): 等待该任务的请求数.
+    """
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        """
+        初始化正在进行的上游请求.
+        Args:
+            task (asyncio.Task): 上游请求任务.
+        """
+        self.task = task
+        self.waiters = 0
+
+
+class PJSKProfileCache:
+    """
+    以 (区服, 用户ID) 为键的个人信息缓存.
+    未超过有效期的条目直接返回; 超过有效期但仍在过期宽限内的条目也立即返回,
+    同时在后台重新获取. 同一键的并发请求只发送一次上游请求,
+    所有等待者都取消时上游请求随之取消. 总占用超过上限时按最近使用淘汰.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300,
+        stale_ttl: float = 3600,
+        max_bytes: int = 32 * 1024 * 1024
+    ) -> None:
+        """
+        初始化个人信息缓存.
+        Args:
+            ttl (float): 条目有效期秒数, 默认为300.
+            stale_ttl (float): 有效期后仍可返回旧条目的秒数, 默认为3600.
+            max_bytes (int): 条目总占用上限, 单位为字节, 默认为32MiB.
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+        self.upstream_failures = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self._pending: Dict[CacheKey, PendingLoad] = {}
+        self._refreshing: Set[asyncio.Task] = set()
+
+    async def get(self, key: CacheKey, loader: CacheLoader) -> Any:
+        """
+        获取个人信息, 缓存未命中时通过 loader 获取.
+        Args:
+            key (CacheKey): 区服名称与用户ID.
+            loader (CacheLoader): 上游请求, 返回个人信息与估算占用, 获取失败时返回 None.
+        Returns:
+            value (Any): 个人信息, 获取失败时为 None.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._refresh(key, loader)
+                return entry.value
+            self._discard(key)
+
+        self.misses += 1
+        return await self._wait(key, loader)
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        获取缓存统计.
+        Returns:
+            stats (Dict[str, float]): 命中数, 过期命中数, 未命中数, 命中率,
+                上游请求数与失败数, 上游平均与最大耗时, 条目数与总占用.
+        """
+        requests = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.stale_hits) / requests if requests else 0.0,
+            "upstream_calls": self.upstream_calls,
+            "upstream_failures": self.upstream_failures,
+            "latency_avg": (
+                self.latency_total / self.upstream_calls if self.upstream_calls else 0.0
+            ),
+            "latency_max": self.latency_max,
+            "entries": len(self._entries),
+            "bytes": self.size
+        }
+
+    async def close(self) -> None:
+        """
+        取消所有进行中的上游请求.
+        """
+        tasks = [pending.task for pending in self._pending.values()]
+        tasks.extend(self._refreshing)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+        self._pending.clear()
+
+    async def _wait(self, key: CacheKey, loader: CacheLoader) -> Any:
+        """
+        等待键的上游请求, 没有进行中的请求时发起一个.
+        """
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = PendingLoad(
+                asyncio.create_task(self._load(key, loader))
+            )
+        pending.waiters += 1
+        try:
+            return await asyncio.shield(pending.task)
+        finally:
+            pending.waiters -= 1
+            # 最后一个等待者被取消时不再需要结果
+            if pending.waiters == 0 and not pending.task.done():
+                pending.task.cancel()
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+
+    def _refresh(self, key: CacheKey, loader: CacheLoader) -> None:
+        """
+        在后台重新获取一个过期条目, 已有进行中的请求时不重复发起.
+        """
+        if key in self._pending:
+            return
+        task = asyncio.create_task(self._refresh_task(key, loader))
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    async def _refresh_task(self, key: CacheKey, loader: CacheLoader) -> None:
+        """
+        后台重新获取的任务, 失败时保留旧条目.
+        """
+        try:
+            await self._wait(key, loader)
+        except Exception as e:
+            logger.warning(
+                "[PJSK.Profile] "
+                f"后台刷新个人信息失败: {key[0]} {key[1]}, {e!r}"
+            )
+
+    async def _load(self, key: CacheKey, loader: CacheLoader) -> Any:
+        """
+        发送上游请求并写入缓存.
+        """
+        start = time.monotonic()
+        self.upstream_calls += 1
+        try:
+            result = await loader()
+        except Exception:
+            self.upstream_failures += 1
+            raise
+        finally:
+            latency = time.monotonic() - start
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            pending = self._pending.get(key)
+            if pending is not None and pending.task is asyncio.current_task():
+                del self._pending[key]
+
+        if result is None:
+            self.upstream_failures += 1
+            return None
+        value, size = result
+        self._store(key, CacheEntry(value, size, time.monotonic()))
+        return value
+
+    def _store(self, key: CacheKey, entry: CacheEntry) -> None:
+        """
+        写入条目, 超过占用上限时淘汰最久未使用的条目.
+        """
+        self._discard(key)
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+
+    def _discard(self, key: CacheKey) -> None:
+        """
+        移除条目.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
@@ -2,33 +2,296 @@
 import requests
 import ujson as json
 from io import BytesIO
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
+from nonebot import logger
 from PIL import Image, ImageDraw, ImageFont
 
-from .models import PJSKProfileContentBase
+from .atlas import ThumbnailAtlas
+from .encoder import CardEncoder
+from .glyphs import GlyphAtlas
+from .models import PJSKProfileCardContent
 
 assets = "src/plugins/pjsk/plugins/pjsk_profile/assets"
 
 
-class PJSKProfileCard(BytesIO):
+class PJSKProfileRenderer:
+    """
+    个人信息卡片渲染器.
+    卡片模板, 字体与挑战 Live 角色图标只加载一次, 每次渲染复制已解码的模板绘制.
+    数字字段通过预先栅格化的字形绘制, 结果与 draw.text 逐像素相同.
+    角色缩略图从内存映射的图集读取, 缩放后的队长头像按缩略图缓存.
+    """
     PATH_CACHE_DIR = "resources/pjsk/thumbnail/chara"
     PATH_METADATA = "src/plugins/pjsk/plugins/pjsk_profile/metadata.json"
     URL_SEIKAI_VIEWER = "https://storage.sekai.best/sekai-jp-assets/thumbnail/chara"
 
-    if not os.path.exists(PATH_CACHE_DIR):
-        os.makedirs(PATH_CACHE_DIR, exist_ok=True)
-
-    with open(PATH_METADATA, "r", encoding="utf-8") as f:
-        metadata = json.load(f)
+    FONT_BOLD = "SourceHanSansCN-Bold.otf"
+    FONT_MEDIUM = "SourceHanSansCN-Medium.otf"
+    FONT_RODIN = "FOT-RodinNTLGPro-DB.ttf"
+    FONTS = [
+        (FONT_BOLD, 45),
+        (FONT_RODIN, 20),
+        (FONT_RODIN, 34),
+        (FONT_RODIN, 22),
+        (FONT_MEDIUM, 24),
+        (FONT_RODIN, 24),
+        (FONT_RODIN, 29)
+    ]
+    COMPARE_COLUMNS = 2
+    COMPARE_REDUCE = 2
+    AVATAR_SIZE = (151, 151)
+    MAX_AVATARS = 256
+    GLYPH_CHARS = "0123456789-id:回"
+    GLYPH_FONTS = [
+        (FONT_RODIN, 20),
+        (FONT_RODIN, 34),
+        (FONT_RODIN, 24),
+        (FONT_RODIN, 29)
+    ]
+
+    def __init__(
+        self,
+        assets: str = assets,
+        cache_dir: str = PATH_CACHE_DIR,
+        path_metadata: str = PATH_METADATA,
+        use_glyphs: bool = True,
+        encoder: Optional[CardEncoder] = None
+    ) -> None:
+        """
+        初始化渲染器, 资源在首次使用时加载.
+        Args:
+            assets (str): 卡片资源目录.
+            cache_dir (str): 角色缩略图缓存目录, 图集文件保存在同级.
+            path_metadata (str): 卡牌ID与资源名称映射文件.
+            use_glyphs (bool): 是否以预先栅格化的字形绘制数字字段, 默认为 True.
+            encoder (Optional[CardEncoder]): 输出编码, 默认为 PNG.
+        """
+        self.assets = assets
+        self.cache_dir = cache_dir
+        self.use_glyphs = use_glyphs
+        self.encoder = encoder or CardEncoder()
+        self.atlas = ThumbnailAtlas(
+            f"{cache_dir}.atlas",
+            f"{cache_dir}.index.json",
+            cache_dir,
+            self.URL_SEIKAI_VIEWER
+        )
+        with open(path_metadata, "r", encoding="utf-8") as f:
+            self.metadata: Dict[str, str] = json.load(f)
+
+        self._template: Optional[Image.Image] = None
+        self._fonts: Dict[Tuple[str, int], ImageFont.FreeTypeFont] = {}
+        self._glyphs: Dict[Tuple[str, int], GlyphAtlas] = {}
+        self._charas: Dict[int, Image.Image] = {}
+        self._avatars: OrderedDict[str, Image.Image] = OrderedDict()
+
+    @property
+    def template(self) -> Image.Image:
+        """
+        已解码的卡片模板, 渲染时需复制后使用.
+        """
+        if self._template is None:
+            template = Image.open(f"{self.assets}/card.png")
+            template.load()
+            self._template = template
+        return self._template
+
+    def font(self, name: str, size: int) -> ImageFont.FreeTypeFont:
+        """
+        获取字体.
+        Args:
+            name (str): 字体文件名.
+            size (int): 字号.
+        Returns:
+            font (ImageFont.FreeTypeFont): 字体.
+        """
+        font = self._fonts.get((name, size))
+        if font is None:
+            font = ImageFont.truetype(f"{self.assets}/{name}", size)
+            self._fonts[(name, size)] = font
+        return font
+
+    def glyphs(self, name: str, size: int) -> GlyphAtlas:
+        """
+        获取数字字段的字形.
+        Args:
+            name (str): 字体文件名.
+            size (int): 字号.
+        Returns:
+            glyphs (GlyphAtlas): 字形, 不使用字形时所有文本回退到 draw.text.
+        """
+        glyphs = self._glyphs.get((name, size))
+        if glyphs is None:
+            chars = self.GLYPH_CHARS if self.use_glyphs else ""
+            glyphs = GlyphAtlas(self.font(name, size), chars)
+            self._glyphs[(name, size)] = glyphs
+        return glyphs
+
+    def chara(self, character_id: int) -> Image.Image:
+        """
+        获取挑战 Live 角色图标.
+        Args:
+            character_id (int): 角色ID.
+        Returns:
+            chara (Image.Image): 缩放至70×70的角色图标.
+        """
+        chara = self._charas.get(character_id)
+        if chara is None:
+            chara = Image.open(f"{self.assets}/chara/chr_ts_{character_id}.png")
+            chara = chara.resize((70, 70))
+            self._charas[character_id] = chara
+        return chara
+
+    def thumbnail_names(self, profile: PJSKProfileCardContent) -> List[str]:
+        """
+        获取卡组成员的缩略图文件名.
+        Args:
+            profile (PJSKProfileCardContent): 个人信息.
+        Returns:
+            names (List[str]): 按卡组顺序的缩略图文件名.
+        """
+        names = []
+        for member, default_image in zip(
+            [
+                profile.userDeck.member1,
+                profile.userDeck.member2,
+                profile.userDeck.member3,
+                profile.userDeck.member4,
+                profile.userDeck.member5
+            ],
+            [
+                user_card.defaultImage
+                for user_card in profile.userCards
+            ]
+        ):
+            asset_bundle_name = self.metadata.get(str(member))
+            if default_image == "original":
+                names.append(f"{asset_bundle_name}_normal.png")
+            elif default_image == "special_training":
+                names.append(f"{asset_bundle_name}_after_training.png")
+            else:
+                raise ValueError(
+                    f"Unknown default image type: {default_image}")
+        return names
+
+    def thumbnail(self, file_name: str) -> Image.Image:
+        """
+        获取角色缩略图.
+        缩略图应已由 atlas.prefetch 加入图集; 不在图集中时读取旧版缓存文件,
+        仍不存在则同步下载, 这两种情况都不写入图集.
+        Args:
+            file_name (str): 缩略图文件名.
+        Returns:
+            thumbnail (Image.Image): 角色缩略图.
+        """
+        card_img = self.atlas.get(file_name)
+        if card_img is not None:
+            return card_img
+        file_dir = f"{self.cache_dir}/{file_name}"
+        if os.path.exists(file_dir):
+            return Image.open(file_dir)
+        url = f"{self.URL_SEIKAI_VIEWER}/{file_name}"
+        src = requests.get(url, timeout=10)
+        return Image.open(BytesIO(src.content))
+
+    def avatar(self, file_name: str, card_img: Image.Image) -> Image.Image:
+        """
+        获取缩放后的队长头像.
+        Args:
+            file_name (str): 缩略图文件名.
+            card_img (Image.Image): 缩略图.
+        Returns:
+            avatar (Image.Image): 缩放至151×151的头像.
+        """
+        avatar = self._avatars.get(file_name)
+        if avatar is None:
+            avatar = card_img.resize(self.AVATAR_SIZE)
+            self._avatars[file_name] = avatar
+            if len(self._avatars) > self.MAX_AVATARS:
+                self._avatars.popitem(last=False)
+        else:
+            self._avatars.move_to_end(file_name)
+        return avatar
+
+    def warm_up(self) -> None:
+        """
+        预先加载卡片模板, 全部字体与角色图标.
+        """
+        try:
+            self.template
+            for name, size in self.FONTS:
+                self.font(name, size)
+            for name, size in self.GLYPH_FONTS:
+                self.glyphs(name, size)
+            for character_id in range(1, 27):
+                self.chara(character_id)
+            self.atlas.load()
+        except OSError as e:
+            logger.warning(
+                "[PJSK.Profile] "
+                f"预加载卡片资源失败: {e}"
+            )
 
-    def __init__(self, profile: PJSKProfileContentBase):
-        # 读取卡片资源
-        img = Image.open(f"{assets}/card.png")
+    def render_bytes(self, profile: PJSKProfileCardContent) -> bytes:
+        """
+        渲染个人信息卡片并以输出编码编码.
+        Args:
+            profile (PJSKProfileCardContent): 个人信息.
+        Returns:
+            content (bytes): 编码后的图片.
+        """
+        return self.encoder.encode(self.render(profile))
+
+    def render_compare_bytes(self, profiles: List[PJSKProfileCardContent]) -> bytes:
+        """
+        渲染多个用户的对比图并以输出编码编码.
+        Args:
+            profiles (List[PJSKProfileCardContent]): 个人信息.
+        Returns:
+            content (bytes): 编码后的图片.
+        """
+        return self.encoder.encode(self.render_compare(profiles))
+
+    def render_compare(self, profiles: List[PJSKProfileCardContent]) -> Image.Image:
+        """
+        渲染多个用户的对比图, 各卡片缩小后按网格排列, 只有一个用户时返回原尺寸卡片.
+        Args:
+            profiles (List[PJSKProfileCardContent]): 个人信息.
+        Returns:
+            img (Image.Image): 对比图.
+        """
+        assert profiles, "至少需要一个用户的个人信息"
+        if len(profiles) == 1:
+            return self.render(profiles[0])
+
+        cards = [
+            self.render(profile).reduce(self.COMPARE_REDUCE)
+            for profile in profiles
+        ]
+        columns = min(len(cards), self.COMPARE_COLUMNS)
+        rows = (len(cards) + columns - 1) // columns
+        width, height = cards[0].size
+        img = Image.new("RGBA", (width * columns, height * rows), (255, 255, 255, 255))
+        for i, card_img in enumerate(cards):
+            img.paste(card_img, (width * (i % columns), height * (i // columns)))
+        return img
+
+    def render(self, profile: PJSKProfileCardContent) -> Image.Image:
+        """
+        渲染个人信息卡片.
+        Args:
+            profile (PJSKProfileCardContent): 个人信息.
+        Returns:
+            img (Image.Image): 卡片图片.
+        """
+        # 复制卡片模板
+        img = self.template.copy()
         draw = ImageDraw.Draw(img)
 
         # 绘制用户名
-        font_style = ImageFont.truetype(
-            f"{assets}/SourceHanSansCN-Bold.otf", 45)
+        font_style = self.font(self.FONT_BOLD, 45)
         draw.text(
             (295, 45),
             profile.user.name,
@@ -37,28 +300,25 @@ class PJSKProfileCard(BytesIO):
         )
 
         # 绘制用户ID
-        font_style = ImageFont.truetype(
-            f"{assets}/FOT-RodinNTLGPro-DB.ttf", 20)
-        draw.text(
+        font_style = self.glyphs(self.FONT_RODIN, 20)
+        font_style.text(
+            draw,
             (298, 116),
             'id:' + str(profile.user.userId),
-            fill=(0, 0, 0),
-            font=font_style
+            fill=(0, 0, 0)
         )
 
         # 绘制用户等级
-        font_style = ImageFont.truetype(
-            f"{assets}/FOT-RodinNTLGPro-DB.ttf", 34)
-        draw.text(
+        font_style = self.glyphs(self.FONT_RODIN, 34)
+        font_style.text(
+            draw,
             (415, 157),
             str(profile.user.rank),
-            fill=(255, 255, 255),
-            font=font_style
+            fill=(255, 255, 255)
         )
 
         # 绘制用户经验值
-        font_style = ImageFont.truetype(
-            f"{assets}/FOT-RodinNTLGPro-DB.ttf", 22)
+        font_style = self.font(self.FONT_RODIN, 22)
         draw.text(
             (182, 318),
             str(profile.userProfile.twitterId),
@@ -67,8 +327,7 @@ class PJSKProfileCard(BytesIO):
         )
 
         # 绘制用户签名
-        font_style = ImageFont.truetype(
-            f"{assets}/SourceHanSansCN-Medium.otf", 24)
+        font_style = self.font(self.FONT_MEDIUM, 24)
         size = font_style.getlength(profile.userProfile.word)
         if size > 480:
             draw.text(
@@ -97,7 +356,7 @@ class PJSKProfileCard(BytesIO):
 
         # 绘制队伍组合
         member_leader = profile.userDeck.leader
-        for idx, member, default_image in zip(
+        for idx, member, file_name in zip(
             range(5),
             [
                 profile.userDeck.member1,
@@ -106,33 +365,9 @@ class PJSKProfileCard(BytesIO):
                 profile.userDeck.member4,
                 profile.userDeck.member5
             ],
-            [
-                user_card.defaultImage
-                for user_card in profile.userCards
-            ]
+            self.thumbnail_names(profile)
         ):
-            asset_bundle_name = self.metadata.get(str(member))
-            if default_image == "original":
-                file_name = f"{asset_bundle_name}_normal.png"
-            elif default_image == "special_training":
-                file_name = f"{asset_bundle_name}_after_training.png"
-            else:
-                raise ValueError(
-                    f"Unknown default image type: {default_image}")
-
-            # 检查角色缩略图是否已缓存，如果不存在则从sekaiviewer下载
-            file_dir = f"{self.PATH_CACHE_DIR}/{file_name}"
-            if os.path.exists(file_dir):
-                card_img = Image.open(file_dir)
-            else:
-                url = f"{self.URL_SEIKAI_VIEWER}/{file_name}"
-                src = requests.get(url, timeout=10)
-                raw = BytesIO(src.content)
-                card_img = Image.open(raw)
-                card_img.save(
-                    file_dir,
-                    format="png"
-                )
+            card_img = self.thumbnail(file_name)
 
             # 绘制于对应位置
             mask = card_img.getchannel("A")
@@ -140,13 +375,12 @@ class PJSKProfileCard(BytesIO):
 
             # 绘制用户头像
             if member == member_leader:
-                card_img = card_img.resize((151, 151))
+                card_img = self.avatar(file_name, card_img)
                 mask = card_img.getchannel("A")
                 img.paste(card_img, (118, 51), mask)
 
         # 绘制 Easy ~ Master 统计数据
-        font_style = ImageFont.truetype(
-            f"{assets}/FOT-RodinNTLGPro-DB.ttf", 24)
+        font_style = self.glyphs(self.FONT_RODIN, 24)
         text_height = font_style.size / 2 + 1
         for i, item in enumerate(profile.userMusicDifficultyClearCount[:5]):
             # clear
@@ -155,11 +389,11 @@ class PJSKProfileCard(BytesIO):
                 int(167 + 105 * i - text_width / 2),
                 int(732 - text_height)
             )
-            draw.text(
+            font_style.text(
+                draw,
                 text_coordinate,
                 str(item.liveClear),
-                fill=(0, 0, 0),
-                font=font_style
+                fill=(0, 0, 0)
             )
 
             # full combo
@@ -168,11 +402,11 @@ class PJSKProfileCard(BytesIO):
                 int(167 + 105 * i - text_width / 2),
                 int(732 + 133 - text_height)
             )
-            draw.text(
+            font_style.text(
+                draw,
                 text_coordinate,
                 str(item.fullCombo),
-                fill=(0, 0, 0),
-                font=font_style
+                fill=(0, 0, 0)
             )
 
             # all perfect
@@ -181,11 +415,11 @@ class PJSKProfileCard(BytesIO):
                 int(167 + 105 * i - text_width / 2),
                 int(732 + 2 * 133 - text_height)
             )
-            draw.text(
+            font_style.text(
+                draw,
                 text_coordinate,
                 str(item.allPerfect),
-                fill=(0, 0, 0),
-                font=font_style
+                fill=(0, 0, 0)
             )
 
         # 绘制 Append 难度统计数据
@@ -197,11 +431,11 @@ class PJSKProfileCard(BytesIO):
             int(707 - text_width / 2),
             int(732 - text_height)
         )
-        draw.text(
+        font_style.text(
+            draw,
             text_coordinate,
             str(item.liveClear),
-            fill=(0, 0, 0),
-            font=font_style
+            fill=(0, 0, 0)
         )
 
         # full combo
@@ -210,11 +444,11 @@ class PJSKProfileCard(BytesIO):
             int(707 - text_width / 2),
             int(732 + 133 - text_height)
         )
-        draw.text(
+        font_style.text(
+            draw,
             text_coordinate,
             str(item.fullCombo),
-            fill=(0, 0, 0),
-            font=font_style
+            fill=(0, 0, 0)
         )
 
         # all perfect
@@ -223,17 +457,16 @@ class PJSKProfileCard(BytesIO):
             int(707 - text_width / 2),
             int(732 + 2 * 133 - text_height)
         )
-        draw.text(
+        font_style.text(
+            draw,
             text_coordinate,
             str(item.allPerfect),
-            fill=(0, 0, 0),
-            font=font_style
+            fill=(0, 0, 0)
         )
 
         # 绘制世界团体角色等级
         character_id = 1
-        font_style = ImageFont.truetype(
-            f"{assets}/FOT-RodinNTLGPro-DB.ttf", 29)
+        font_style = self.glyphs(self.FONT_RODIN, 29)
         for i in range(0, 5):
             for j in range(0, 4):
                 characterRank = profile.userCharacters[character_id -
@@ -243,8 +476,8 @@ class PJSKProfileCard(BytesIO):
                     int(916 + 184 * j - text_width / 2),
                     int(688 + 87.5 * i - text_height)
                 )
-                draw.text(text_coordinate, str(characterRank),
-                          fill=(0, 0, 0), font=font_style)
+                font_style.text(draw, text_coordinate, str(characterRank),
+                                fill=(0, 0, 0))
 
                 character_id += 1
 
@@ -258,45 +491,64 @@ class PJSKProfileCard(BytesIO):
                     int(916 + 184 * j - text_width / 2),
                     int(512 + 88 * i - text_height)
                 )
-                draw.text(text_coordinate, str(characterRank),
-                          fill=(0, 0, 0), font=font_style)
+                font_style.text(draw, text_coordinate, str(characterRank),
+                                fill=(0, 0, 0))
                 character_id = character_id + 1
                 if character_id == 27:
                     break
 
         # 绘制 Mvp 和 Super Star 统计数据
-        draw.text(
+        font_style.text(
+            draw,
             (952, 141),
             f'{profile.userMultiLiveTopScoreCount.mvp}回',
-            fill=(0, 0, 0),
-            font=font_style
+            fill=(0, 0, 0)
         )
-        draw.text(
+        font_style.text(
+            draw,
             (1259, 141),
             f'{profile.userMultiLiveTopScoreCount.superStar}回',
-            fill=(0, 0, 0),
-            font=font_style
+            fill=(0, 0, 0)
         )
 
         # 绘制挑战 Live 结果
-        chara = Image.open(
-            f'{assets}/chara/'
-            f'chr_ts_{profile.userChallengeLiveSoloResult.characterId}.png'
-        )
-        chara = chara.resize((70, 70))
+        chara = self.chara(profile.userChallengeLiveSoloResult.characterId)
         mask = chara.getchannel("A")
         img.paste(chara, (952, 293), mask)
 
-        draw.text(
+        font_style.text(
+            draw,
             (1032, 315),
             str(profile.userChallengeLiveSoloResult.highScore),
-            fill=(0, 0, 0),
-            font=font_style
+            fill=(0, 0, 0)
         )
 
         # 绘制用户称号
         # TODO: 以后再说
 
+        return img
+
+
+profile_renderer = PJSKProfileRenderer()
+
+
+class PJSKProfileCard(BytesIO):
+    """
+    PNG 编码的个人信息卡片.
+    """
+
+    def __init__(
+        self,
+        profile: PJSKProfileCardContent,
+        renderer: Optional[PJSKProfileRenderer] = None
+    ):
+        """
+        渲染个人信息卡片.
+        Args:
+            profile (PJSKProfileCardContent): 个人信息.
+            renderer (Optional[PJSKProfileRenderer]): 渲染器, 默认使用共用的渲染器.
+        """
         # 保存图片到 BytesIO
         super().__init__()
-        img.save(self, format='PNG')
+        renderer = renderer or profile_renderer
+        renderer.render(profile).save(self, format='PNG')
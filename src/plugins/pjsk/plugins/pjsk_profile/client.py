@@ -0,0 +1,181 @@
+import asyncio
+from typing import Dict, Optional, Sequence, Tuple
+
+import aiohttp
+from nonebot import logger
+
+from .cache import PJSKProfileCache
+from .models import PJSKProfileBase, PJSKProfileCardContent
+
+
+class PJSKProfileClient:
+    """
+    各区服共用的异步个人信息客户端.
+    所有请求共用一个带连接池的会话, 每个请求都有严格的超时,
+    网络错误与服务端错误按指数退避重试, 每个区服的并发请求数有上限.
+    设置缓存时, 个人信息优先从缓存获取.
+    """
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        regions: Sequence[PJSKProfileBase],
+        timeout: float = 10,
+        retries: int = 2,
+        backoff: float = 0.5,
+        concurrency: int = 8,
+        cache: Optional[PJSKProfileCache] = None
+    ) -> None:
+        """
+        初始化个人信息客户端.
+        Args:
+            regions (Sequence[PJSKProfileBase]): 区服接口.
+            timeout (float): 单次请求的总超时秒数, 默认为10.
+            retries (int): 失败后的最大重试次数, 默认为2.
+            backoff (float): 首次重试前等待的秒数, 之后每次翻倍, 默认为0.5.
+            concurrency (int): 每个区服的最大并发请求数, 默认为8.
+            cache (Optional[PJSKProfileCache]): 个人信息缓存, 默认不缓存.
+        """
+        self.regions: Dict[str, PJSKProfileBase] = {
+            region.REGION: region for region in regions
+        }
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=timeout / 2)
+        self.retries = retries
+        self.backoff = backoff
+        self.concurrency = concurrency
+        self.cache = cache
+        self._semaphores = {
+            region: asyncio.Semaphore(concurrency) for region in self.regions
+        }
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def fetch(self, region: str, user_id: str) -> Optional[bytes]:
+        """
+        获取个人信息的原始响应.
+        Args:
+            region (str): 区服名称.
+            user_id (str): 用户ID.
+        Returns:
+            content (Optional[bytes]): 响应内容, 用户不存在或多次失败时为 None.
+        """
+        api = self.regions[region]
+        url = api.get_url(user_id)
+        async with self._semaphores[region]:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                try:
+                    async with self.session.get(url, headers=api.headers) as response:
+                        if response.status == 200:
+                            return await response.read()
+                        if response.status not in self.RETRY_STATUS:
+                            return None
+                        error = f"HTTP {response.status}"
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = repr(e)
+
+            logger.warning(
+                "[PJSK.Profile] "
+                f"获取 {region} 个人信息失败: {user_id}, {error}"
+            )
+            return None
+
+    async def get_profile(
+        self,
+        region: str,
+        user_id: str
+    ) -> Optional[PJSKProfileCardContent]:
+        """
+        获取一个区服的个人信息, 解析失败视为获取失败.
+        Args:
+            region (str): 区服名称.
+            user_id (str): 用户ID.
+        Returns:
+            profile (Optional[PJSKProfileCardContent]): 个人信息, 获取失败时为 None.
+        """
+        try:
+            if self.cache is not None:
+                return await self.cache.get(
+                    (region, user_id),
+                    lambda: self._load(region, user_id)
+                )
+            result = await self._load(region, user_id)
+        except ValueError as e:
+            logger.warning(
+                "[PJSK.Profile] "
+                f"解析 {region} 个人信息失败: {user_id}, {e!r}"
+            )
+            return None
+        return result[0] if result is not None else None
+
+    async def get_profile_auto(
+        self,
+        user_id: str
+    ) -> Optional[Tuple[str, PJSKProfileCardContent]]:
+        """
+        同时查询所有区服, 返回最先获取成功的个人信息并取消其余请求.
+        Args:
+            user_id (str): 用户ID.
+        Returns:
+            result (Optional[Tuple[str, PJSKProfileCardContent]]):
+                区服名称与个人信息, 所有区服都获取失败时为 None.
+        """
+        tasks = [
+            asyncio.create_task(self._get_profile_with_region(region, user_id))
+            for region in self.regions
+        ]
+        try:
+            for future in asyncio.as_completed(tasks):
+                region, profile = await future
+                if profile is not None:
+                    return region, profile
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _load(
+        self,
+        region: str,
+        user_id: str
+    ) -> Optional[Tuple[PJSKProfileCardContent, int]]:
+        """
+        获取并解析个人信息, 以响应长度估算占用.
+        在 get_profile 方法中调用.
+        """
+        content = await self.fetch(region, user_id)
+        if content is None:
+            return None
+        return self.regions[region].parse(content), len(content)
+
+    async def _get_profile_with_region(
+        self,
+        region: str,
+        user_id: str
+    ) -> Tuple[str, Optional[PJSKProfileCardContent]]:
+        """
+        获取一个区服的个人信息并附带区服名称.
+        在 get_profile_auto 方法中调用.
+        """
+        return region, await self.get_profile(region, user_id)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        共用的会话, 在首次请求时创建.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=self.concurrency * len(self.regions))
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """
+        关闭缓存与会话.
+        """
+        if self.cache is not None:
+            await self.cache.close()
+        if self._session is not None:
+            await self._session.close()
@@ -0,0 +1,183 @@
+import math
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageChops, ImageStat
+
+
+class CardEncoder:
+    """
+    卡片图片的输出编码.
+    完全不透明的图片去掉透明通道; 颜色不超过256种时无损转换为调色板图片,
+    设置 min_psnr 时颜色更多的图片也会量化为256色, 峰值信噪比不低于阈值才采用.
+    支持可配置压缩级别的 PNG 与无损 WebP.
+    """
+    EXTENSIONS = {"PNG": "png", "WEBP": "webp"}
+
+    def __init__(
+        self,
+        format: str = "PNG",
+        compress_level: int = 3,
+        palette: bool = True,
+        min_psnr: Optional[float] = None,
+        webp_method: int = 4
+    ) -> None:
+        """
+        初始化编码器.
+        Args:
+            format (str): 输出格式, PNG 或 WEBP, 默认为 PNG.
+            compress_level (int): PNG 的 zlib 压缩级别, 0到9, 默认为3.
+            palette (bool): 是否尝试转换为调色板图片, 默认为 True.
+            min_psnr (Optional[float]): 有损量化允许的最低峰值信噪比, 默认不进行有损量化.
+            webp_method (int): 无损 WebP 的压缩方法, 0到6, 越大越慢, 默认为4.
+        """
+        format = format.upper()
+        assert format in self.EXTENSIONS, f"不支持的输出格式: {format}"
+        assert 0 <= compress_level <= 9, f"压缩级别应在0到9之间: {compress_level}"
+        self.format = format
+        self.compress_level = compress_level
+        self.palette = palette
+        self.min_psnr = min_psnr
+        self.webp_method = webp_method
+
+    def get_options(self) -> Dict[str, Any]:
+        """
+        获取编码配置, 用于在其他进程中创建相同的编码器.
+        Returns:
+            options (Dict[str, Any]): 初始化参数.
+        """
+        return {
+            "format": self.format,
+            "compress_level": self.compress_level,
+            "palette": self.palette,
+            "min_psnr": self.min_psnr,
+            "webp_method": self.webp_method
+        }
+
+    @property
+    def extension(self) -> str:
+        """
+        输出文件的扩展名.
+        """
+        return self.EXTENSIONS[self.format]
+
+    def encode(self, img: Image.Image) -> bytes:
+        """
+        编码图片.
+        Args:
+            img (Image.Image): 图片.
+        Returns:
+            content (bytes): 编码后的图片.
+        """
+        if img.mode == "RGBA" and img.getchannel("A").getextrema() == (255, 255):
+            img = img.convert("RGB")
+
+        buffer = BytesIO()
+        if self.format == "WEBP":
+            # WebP 无损编码自带调色板变换, 无需预先量化
+            img.save(buffer, format="WEBP", lossless=True, method=self.webp_method)
+            return buffer.getvalue()
+
+        if self.palette:
+            img = self.to_palette(img) or img
+        img.save(buffer, format="PNG", compress_level=self.compress_level)
+        return buffer.getvalue()
+
+    def to_palette(self, img: Image.Image) -> Optional[Image.Image]:
+        """
+        转换为调色板图片.
+        Args:
+            img (Image.Image): RGB 或 RGBA 图片.
+        Returns:
+            img (Optional[Image.Image]): 调色板图片, 无法无损或在阈值内转换时为 None.
+        """
+        if img.mode == "RGBA":
+            return self._to_palette_rgba(img)
+        if img.mode != "RGB":
+            return None
+
+        colors = img.getcolors(256)
+        if colors is not None:
+            return self._quantize_exact(img, [color for _, color in colors])
+        if self.min_psnr is None:
+            return None
+
+        quantized = img.quantize(256, method=Image.Quantize.FASTOCTREE)
+        if self.psnr(img, quantized.convert("RGB")) < self.min_psnr:
+            return None
+        return quantized
+
+    @staticmethod
+    def psnr(expected: Image.Image, actual: Image.Image) -> float:
+        """
+        计算两张 RGB 图片的峰值信噪比.
+        Args:
+            expected (Image.Image): 原图.
+            actual (Image.Image): 比较的图片.
+        Returns:
+            psnr (float): 峰值信噪比, 单位为dB, 完全相同时为无穷大.
+        """
+        stat = ImageStat.Stat(ImageChops.difference(expected, actual))
+        mse = sum(rms ** 2 for rms in stat.rms) / len(stat.rms)
+        if mse == 0:
+            return math.inf
+        return 10 * math.log10(255 ** 2 / mse)
+
+    def _to_palette_rgba(self, img: Image.Image) -> Optional[Image.Image]:
+        """
+        将只有全透明与不透明像素的 RGBA 图片无损转换为带透明色的调色板图片.
+        全透明像素的颜色不可见, 统一替换为一个未使用的颜色作为透明色.
+        """
+        alpha = img.getchannel("A")
+        if any(value not in (0, 255) for _, value in alpha.getcolors(256)):
+            return None
+        # 全透明像素的颜色不计入颜色数量
+        visible = Image.new("RGBA", img.size, (0, 0, 0, 0))
+        visible.paste(img, mask=alpha)
+        colors = visible.getcolors(257)
+        if colors is None:
+            return None
+        opaque = {color[:3] for _, color in colors if color[3] == 255}
+        if len(opaque) > 255:
+            return None
+
+        transparent = next(
+            (value, value, value) for value in range(256)
+            if (value, value, value) not in opaque
+        )
+        flat = Image.new("RGB", img.size, transparent)
+        flat.paste(img.convert("RGB"), mask=alpha)
+        palette = list(opaque) + [transparent]
+        quantized = self._quantize_exact(flat, palette)
+        if quantized is None:
+            return None
+        # 透明色不在不透明颜色中, 索引为透明色的像素恰好是全透明像素
+        quantized.info["transparency"] = len(palette) - 1
+        return quantized
+
+    @staticmethod
+    def _quantize_exact(
+        img: Image.Image,
+        colors: List[Tuple[int, int, int]]
+    ) -> Optional[Image.Image]:
+        """
+        以图片中出现的全部颜色按给定顺序作为调色板转换, 每个像素精确对应一个调色板颜色.
+        索引直接按颜色值查表得到, 不使用 Pillow 的近似最近颜色匹配,
+        转换结果与原图不一致时返回 None.
+        """
+        pixels = np.asarray(img, dtype=np.uint32)
+        packed = (pixels[..., 0] << 16) | (pixels[..., 1] << 8) | pixels[..., 2]
+        keys = np.array(
+            [(r << 16) | (g << 8) | b for r, g, b in colors],
+            dtype=np.uint32
+        )
+        order = np.argsort(keys)
+        positions = np.searchsorted(keys[order], packed).clip(0, len(keys) - 1)
+        indices = order[positions].astype(np.uint8)
+
+        quantized = Image.frombytes("P", img.size, indices.tobytes())
+        quantized.putpalette(bytes(channel for color in colors for channel in color))
+        if quantized.convert("RGB").tobytes() != img.tobytes():
+            return None
+        return quantized
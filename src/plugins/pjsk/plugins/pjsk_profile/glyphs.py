@@ -0,0 +1,155 @@
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+Sprite = Tuple[
+    Optional[Image.Image],  # 字形遮罩, 空白字形为 None
+    int,  # 相对笔位置的横向偏移
+    int  # 相对文本原点的纵向偏移
+]
+
+
+class GlyphAtlas:
+    """
+    一种字体字号下预先栅格化的字形.
+    与 Pillow 的基本排版一致: 笔位置以 1/64 像素累加步进与字距, 字形放在四舍五入后的笔位置,
+    重叠处取遮罩最大值, 最后以一次 draw_bitmap 绘制, 因此结果与 draw.text 逐像素相同.
+    合成后的整段文本遮罩也会缓存, 重复的数字直接复用.
+    包含未栅格化字符的文本或非整数坐标回退到 draw.text.
+    """
+
+    def __init__(
+        self,
+        font: ImageFont.FreeTypeFont,
+        chars: str,
+        max_masks: int = 4096
+    ) -> None:
+        """
+        栅格化字形并计算步进与字距.
+        Args:
+            font (ImageFont.FreeTypeFont): 字体.
+            chars (str): 预先栅格化的字符.
+            max_masks (int): 缓存的文本遮罩数上限, 默认为4096.
+        """
+        self.font = font
+        self.size = font.size
+        self.max_masks = max_masks
+        self._sprites: Dict[str, Sprite] = {}
+        self._advances: Dict[str, int] = {}
+        self._kerning: Dict[Tuple[str, str], int] = {}
+        self._masks: Dict[str, Tuple[Image.Image, int, int]] = {}
+
+        for char in chars:
+            mask, (x, y) = font.getmask2(char, "L")
+            sprite = None
+            if mask.size[0] and mask.size[1]:
+                sprite = Image.frombytes("L", mask.size, bytes(mask))
+            self._sprites[char] = (sprite, x, y)
+            self._advances[char] = round(font.getlength(char) * 64)
+        for first in chars:
+            for second in chars:
+                kerning = (
+                    round(font.getlength(first + second) * 64)
+                    - self._advances[first]
+                    - self._advances[second]
+                )
+                if kerning:
+                    self._kerning[(first, second)] = kerning
+
+    def supports(self, text: str) -> bool:
+        """
+        判断文本是否只包含已栅格化的字符.
+        Args:
+            text (str): 文本.
+        Returns:
+            supported (bool): 是否支持.
+        """
+        return all(char in self._sprites for char in text)
+
+    def getlength(self, text: str) -> float:
+        """
+        计算文本步进宽度, 与 FreeTypeFont.getlength 相同.
+        Args:
+            text (str): 文本.
+        Returns:
+            length (float): 宽度, 单位为像素.
+        """
+        if not self.supports(text):
+            return self.font.getlength(text)
+        pen = 0
+        previous = None
+        for char in text:
+            if previous is not None:
+                pen += self._kerning.get((previous, char), 0)
+            pen += self._advances[char]
+            previous = char
+        return pen / 64
+
+    def text(
+        self,
+        draw: ImageDraw.ImageDraw,
+        xy: Tuple[float, float],
+        text: str,
+        fill: Tuple[int, ...]
+    ) -> None:
+        """
+        以左上角为锚点绘制文本.
+        Args:
+            draw (ImageDraw.ImageDraw): 绘图对象.
+            xy (Tuple[float, float]): 坐标.
+            text (str): 文本.
+            fill (Tuple[int, ...]): 颜色.
+        """
+        if (
+            draw.fontmode != "L"
+            or not isinstance(xy[0], int)
+            or not isinstance(xy[1], int)
+            or not self.supports(text)
+        ):
+            draw.text(xy, text, fill=fill, font=self.font)
+            return
+
+        cached = self._masks.get(text)
+        if cached is None:
+            cached = self._compose(text)
+            if len(self._masks) >= self.max_masks:
+                self._masks.clear()
+            self._masks[text] = cached
+        mask, x, y = cached
+        if mask is not None:
+            draw.bitmap((xy[0] + x, xy[1] + y), mask, fill)
+
+    def _compose(self, text: str) -> Tuple[Optional[Image.Image], int, int]:
+        """
+        由字形合成文本遮罩.
+        Returns:
+            mask (Tuple[Optional[Image.Image], int, int]): 遮罩与相对文本原点的偏移.
+        """
+        placements = []
+        pen = 0
+        previous = None
+        for char in text:
+            if previous is not None:
+                pen += self._kerning.get((previous, char), 0)
+            sprite, x, y = self._sprites[char]
+            if sprite is not None:
+                placements.append((sprite, ((pen + 32) >> 6) + x, y))
+            pen += self._advances[char]
+            previous = char
+        if not placements:
+            return None, 0, 0
+
+        left = min(x for _, x, _ in placements)
+        top = min(y for _, _, y in placements)
+        right = max(x + sprite.size[0] for sprite, x, _ in placements)
+        bottom = max(y + sprite.size[1] for sprite, _, y in placements)
+        mask = Image.new("L", (right - left, bottom - top), 0)
+        for sprite, x, y in placements:
+            box = (
+                x - left,
+                y - top,
+                x - left + sprite.size[0],
+                y - top + sprite.size[1]
+            )
+            mask.paste(ImageChops.lighter(mask.crop(box), sprite), box)
+        return mask, left, top
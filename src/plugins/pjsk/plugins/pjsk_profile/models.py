@@ -1,8 +1,8 @@
-﻿import requests
+﻿import ujson as json
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import ClassVar, List, Optional, Type
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 
 class User(BaseModel):
@@ -129,62 +129,162 @@ class PJSKProfileContentJP(PJSKProfileContentBase):
     isMysekaiOwnerAcceptVisit: bool
 
 
+class CardUserProfile(BaseModel):
+    word: str
+    twitterId: str
+
+class CardUserDeck(BaseModel):
+    leader: int
+    member1: int
+    member2: int
+    member3: int
+    member4: int
+    member5: int
+
+class CardUserCard(BaseModel):
+    defaultImage: str
+
+class CardUserCharacter(BaseModel):
+    characterRank: int
+
+
+class PJSKProfileCardContent(BaseModel):
+    """
+    个人信息卡片用到的字段投影.
+    只校验卡片绘制的字段, 列表只保留卡片读取的前若干项,
+    完整的个人信息通过 full 方法从保留的原始响应按需解析.
+    """
+    CARD_LIMIT: ClassVar[int] = 5
+    CHARACTER_LIMIT: ClassVar[int] = 26
+    DIFFICULTY_LIMIT: ClassVar[int] = 6
+
+    user: User
+    userProfile: CardUserProfile
+    userDeck: CardUserDeck
+    userCards: List[CardUserCard]
+    userCharacters: List[CardUserCharacter]
+    userChallengeLiveSoloResult: UserChallengeLiveSoloResult
+    userMusicDifficultyClearCount: List[UserMusicDifficultyClearCount]
+    userMultiLiveTopScoreCount: UserMultiLiveTopScoreCount
+
+    _raw: bytes = PrivateAttr(b"")
+    _content: Type[PJSKProfileContentBase] = PrivateAttr(PJSKProfileContentBase)
+    _full: Optional[PJSKProfileContentBase] = PrivateAttr(None)
+
+    @classmethod
+    def from_json(
+        cls,
+        content: bytes,
+        full_model: Type[PJSKProfileContentBase] = PJSKProfileContentBase
+    ) -> "PJSKProfileCardContent":
+        """
+        从原始响应解析卡片字段.
+        Args:
+            content (bytes): 响应内容.
+            full_model (Type[PJSKProfileContentBase]): 完整个人信息模型.
+        Returns:
+            profile (PJSKProfileCardContent): 卡片字段投影.
+        """
+        data = json.loads(content)
+        profile = cls(
+            user=data["user"],
+            userProfile=data["userProfile"],
+            userDeck=data["userDeck"],
+            userCards=data["userCards"][:cls.CARD_LIMIT],
+            userCharacters=data["userCharacters"][:cls.CHARACTER_LIMIT],
+            userChallengeLiveSoloResult=data["userChallengeLiveSoloResult"],
+            userMusicDifficultyClearCount=(
+                data["userMusicDifficultyClearCount"][:cls.DIFFICULTY_LIMIT]
+            ),
+            userMultiLiveTopScoreCount=data["userMultiLiveTopScoreCount"]
+        )
+        profile._raw = content
+        profile._content = full_model
+        return profile
+
+    def full(self) -> PJSKProfileContentBase:
+        """
+        获取完整的个人信息, 首次调用时解析.
+        Returns:
+            profile (PJSKProfileContentBase): 完整个人信息.
+        """
+        if self._full is None:
+            self._full = self._content(**json.loads(self._raw))
+        return self._full
+
+
 class PJSKProfileBase(ABC):
+    """
+    一个区服的个人信息接口, 只描述请求地址与响应解析, 请求由 PJSKProfileClient 统一发送.
+    Attributes:
+        REGION (str): 区服名称.
+        CONTENT (Type[PJSKProfileContentBase]): 个人信息模型.
+    """
+    REGION: str = ""
+    CONTENT: Type[PJSKProfileContentBase] = PJSKProfileContentBase
     base_url: str = ""
     headers: Optional[dict] = None
 
-    def __init__(self):
+    def __init__(self, base_url: str, headers: Optional[dict] = None):
+        self.base_url = base_url
+        self.headers = headers
         if self.base_url == "":
             raise ValueError("Base_url must be set.")
 
     @abstractmethod
-    def get_profile(self, user_id: str) -> PJSKProfileContentBase:
+    def get_url(self, user_id: str) -> str:
+        """
+        获取个人信息请求地址.
+        Args:
+            user_id (str): 用户ID.
+        Returns:
+            url (str): 请求地址.
+        """
         pass
 
+    def parse(self, content: bytes) -> PJSKProfileCardContent:
+        """
+        解析个人信息响应中卡片用到的字段.
+        Args:
+            content (bytes): 响应内容.
+        Returns:
+            profile (PJSKProfileCardContent): 卡片字段投影.
+        """
+        try:
+            return PJSKProfileCardContent.from_json(content, self.CONTENT)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid profile content: {e!r}") from e
+
+    def parse_full(self, content: bytes) -> PJSKProfileContentBase:
+        """
+        完整解析个人信息响应.
+        Args:
+            content (bytes): 响应内容.
+        Returns:
+            profile (PJSKProfileContentBase): 完整个人信息.
+        """
+        return self.CONTENT(**json.loads(content))
+
 
 class PJSKProfileCN(PJSKProfileBase):
-    def __init__(self, base_url: str, headers: Optional[dict] = None):
-        self.base_url = base_url
-        self.headers = headers
-        super().__init__()
+    REGION = "cn"
+    CONTENT = PJSKProfileContentCN
 
-    def get_profile(self, user_id: str) -> Optional[PJSKProfileContentCN]:
-        url = f"{self.base_url}/cn/user/{user_id}/profile"
-        content = requests.get(url, headers=self.headers)
-        if content.ok:
-            content = content.json()
-            return PJSKProfileContentCN(**content)
-        else:
-            return None
+    def get_url(self, user_id: str) -> str:
+        return f"{self.base_url}/cn/user/{user_id}/profile"
 
 
 class PJSKProfileTW(PJSKProfileBase):
-    def __init__(self, base_url: str, headers: Optional[dict] = None):
-        self.base_url = base_url
-        self.headers = headers
-        super().__init__()
+    REGION = "tw"
+    CONTENT = PJSKProfileContentTW
 
-    def get_profile(self, user_id: str) -> Optional[PJSKProfileContentTW]:
-        url = f"{self.base_url}/tw/user/{user_id}/profile"
-        content = requests.get(url, headers=self.headers)
-        if content.ok:
-            content = content.json()
-            return PJSKProfileContentTW(**content)
-        else:
-            return None
+    def get_url(self, user_id: str) -> str:
+        return f"{self.base_url}/tw/user/{user_id}/profile"
 
 
 class PJSKProfileJP(PJSKProfileBase):
-    def __init__(self, base_url: str, headers: Optional[dict] = None):
-        self.base_url = base_url
-        self.headers = headers
-        super().__init__()
-
-    def get_profile(self, user_id: str) -> Optional[PJSKProfileContentJP]:
-        url = f"{self.base_url}/jp/user/%25user_id/{user_id}/profile"
-        content = requests.get(url, headers=self.headers)
-        if content.ok:
-            content = content.json()
-            return PJSKProfileContentJP(**content)
-        else:
-            return None
+    REGION = "jp"
+    CONTENT = PJSKProfileContentJP
+
+    def get_url(self, user_id: str) -> str:
+        return f"{self.base_url}/jp/user/%25user_id/{user_id}/profile"
@@ -0,0 +1,83 @@
+"""
+卡片渲染进程的入口.
+渲染进程以 spawn 方式启动, 不继承主进程的线程与锁. 新进程无法导入会注册事件响应器的插件包,
+因此本模块只依赖标准库, 并以独立的包名 PACKAGE 导入插件目录中的渲染模块, 不执行插件的 __init__.
+进程池以 runpy.run_path 执行本文件作为初始化函数, 任务函数以 PACKAGE 下的模块名传入渲染进程.
+"""
+import os
+import sys
+import types
+import importlib
+from typing import Any, Dict, List
+
+PACKAGE = "pjsk_profile_render"
+PATH_PACKAGE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load() -> types.ModuleType:
+    """
+    以独立的包名导入本模块.
+    Returns:
+        module (types.ModuleType): 可以在渲染进程中按模块名找到的本模块.
+    """
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [PATH_PACKAGE]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.process")
+
+
+def _init_worker() -> None:
+    """
+    渲染进程初始化, 预加载卡片资源.
+    """
+    from .card import profile_renderer
+
+    profile_renderer.warm_up()
+
+
+def _use_encoder(options: Dict[str, Any]) -> Any:
+    """
+    按主进程的编码配置获取渲染器.
+    """
+    from .card import profile_renderer
+    from .encoder import CardEncoder
+
+    if profile_renderer.encoder.get_options() != options:
+        profile_renderer.encoder = CardEncoder(**options)
+    return profile_renderer
+
+
+def _render(data: Dict[str, Any], options: Dict[str, Any]) -> bytes:
+    """
+    在渲染进程中渲染个人信息卡片.
+    Args:
+        data (Dict[str, Any]): 卡片字段.
+        options (Dict[str, Any]): 输出编码配置.
+    Returns:
+        content (bytes): 编码后的图片.
+    """
+    from .models import PJSKProfileCardContent
+
+    return _use_encoder(options).render_bytes(PJSKProfileCardContent(**data))
+
+
+def _render_compare(datas: List[Dict[str, Any]], options: Dict[str, Any]) -> bytes:
+    """
+    在渲染进程中一次渲染多个用户的对比图.
+    Args:
+        datas (List[Dict[str, Any]]): 各用户的卡片字段.
+        options (Dict[str, Any]): 输出编码配置.
+    Returns:
+        content (bytes): 编码后的图片.
+    """
+    from .models import PJSKProfileCardContent
+
+    return _use_encoder(options).render_compare_bytes(
+        [PJSKProfileCardContent(**data) for data in datas]
+    )
+
+
+if __name__ == "<run_path>":
+    # 作为进程池的初始化函数执行
+    load()._init_worker()
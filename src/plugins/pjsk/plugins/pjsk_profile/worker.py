@@ -0,0 +1,227 @@
+import runpy
+import asyncio
+import hashlib
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+import ujson as json
+from nonebot import logger
+from nonebot.compat import model_dump
+
+from . import process
+from .card import profile_renderer
+from .models import PJSKProfileCardContent
+
+# 以独立包名导入的渲染进程入口, 任务函数按该模块名传入渲染进程
+render_process = process.load()
+
+
+class PJSKProfileCardWorker:
+    """
+    在进程池中渲染个人信息卡片, 并按卡片字段的内容哈希缓存渲染结果.
+    传入工作进程的只有卡片字段与编码配置, 返回编码后的图片, 不阻塞事件循环.
+    工作进程以 spawn 方式启动, 不继承主进程中其他线程持有的锁.
+    同一内容的并发请求只渲染一次, 缓存总大小超过上限时按最近使用淘汰.
+    工作进程意外退出时重建进程池并重试一次.
+    渲染前在主进程中并发获取缺失的角色缩略图并加入图集, 工作进程只从图集读取.
+    """
+
+    def __init__(self, processes: int = 2, max_bytes: int = 64 * 1024 * 1024) -> None:
+        """
+        初始化渲染进程池, 进程在启动或首次渲染时创建.
+        Args:
+            processes (int): 工作进程数, 为0时在线程中渲染, 默认为2.
+            max_bytes (int): 渲染结果缓存的总大小上限, 单位为字节, 默认为64MiB.
+        """
+        self.processes = processes
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cards: OrderedDict[str, bytes] = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def digest(data: Any) -> str:
+        """
+        计算卡片字段的内容哈希.
+        Args:
+            data (Any): 卡片字段.
+        Returns:
+            digest (str): 内容哈希.
+        """
+        content = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+    async def start(self) -> None:
+        """
+        启动全部工作进程.
+        """
+        if self.processes <= 0 or self._executor is not None:
+            return
+        # 初始化函数必须能在新进程中按模块名找到, 以标准库的 runpy 执行入口文件
+        self._executor = ProcessPoolExecutor(
+            self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=runpy.run_path,
+            initargs=(process.__file__,)
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executor, render_process._init_worker)
+                for _ in range(self.processes)
+            )
+        )
+
+    async def render(self, profile: PJSKProfileCardContent) -> bytes:
+        """
+        渲染个人信息卡片, 内容未变化时返回缓存的结果.
+        Args:
+            profile (PJSKProfileCardContent): 个人信息.
+        Returns:
+            content (bytes): 编码后的图片.
+        """
+        data = model_dump(profile)
+        return await self._get(
+            self.digest(data), [profile], render_process._render, data
+        )
+
+    async def render_compare(self, profiles: List[PJSKProfileCardContent]) -> bytes:
+        """
+        在一次工作进程调用中渲染多个用户的对比图, 内容未变化时返回缓存的结果.
+        Args:
+            profiles (List[PJSKProfileCardContent]): 个人信息.
+        Returns:
+            content (bytes): 编码后的图片.
+        """
+        datas = [model_dump(profile) for profile in profiles]
+        return await self._get(
+            self.digest({"compare": datas}),
+            profiles,
+            render_process._render_compare,
+            datas
+        )
+
+    async def _get(
+        self,
+        key: str,
+        profiles: List[PJSKProfileCardContent],
+        render: Callable[[Any, Dict[str, Any]], bytes],
+        payload: Any
+    ) -> bytes:
+        """
+        读取缓存的渲染结果, 未命中时渲染, 同一内容的并发请求共用一次渲染.
+        """
+        card = self._cards.get(key)
+        if card is not None:
+            self.hits += 1
+            self._cards.move_to_end(key)
+            return card
+
+        future = self._pending.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            future = asyncio.ensure_future(
+                self._render(key, profiles, render, payload)
+            )
+            self._pending[key] = future
+        return await asyncio.shield(future)
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        获取渲染缓存统计.
+        Returns:
+            stats (Dict[str, float]): 命中数, 未命中数, 加入进行中渲染的请求数,
+                命中率, 缓存条目数与总大小.
+        """
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "entries": len(self._cards),
+            "bytes": self.size
+        }
+
+    async def close(self) -> None:
+        """
+        停止工作进程并关闭缩略图图集的下载.
+        """
+        await profile_renderer.atlas.close()
+        self._shutdown()
+
+    def _shutdown(self) -> None:
+        """
+        停止进程池, 之后的渲染会重新创建.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(
+        self,
+        render: Callable[[Any, Dict[str, Any]], bytes],
+        payload: Any
+    ) -> bytes:
+        """
+        在进程池中执行渲染, 进程池未启动时先启动.
+        工作进程意外退出时进程池不再可用, 重建进程池并重试一次.
+        """
+        loop = asyncio.get_running_loop()
+        options = profile_renderer.encoder.get_options()
+        await self.start()
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, render, payload, options)
+        except BrokenProcessPool as e:
+            logger.warning(
+                "[PJSK.Profile] "
+                f"渲染进程意外退出, 重建进程池: {e!r}"
+            )
+            # 并发的渲染可能已经重建了进程池
+            if self._executor is executor:
+                self._shutdown()
+
+        await self.start()
+        return await loop.run_in_executor(self._executor, render, payload, options)
+
+    async def _render(
+        self,
+        key: str,
+        profiles: List[PJSKProfileCardContent],
+        render: Callable[[Any, Dict[str, Any]], bytes],
+        payload: Any
+    ) -> bytes:
+        """
+        渲染卡片并写入缓存.
+        """
+        try:
+            await profile_renderer.atlas.prefetch(
+                name
+                for profile in profiles
+                for name in profile_renderer.thumbnail_names(profile)
+            )
+            if self.processes > 0:
+                card = await self._submit(render, payload)
+            else:
+                card = await asyncio.to_thread(
+                    render, payload, profile_renderer.encoder.get_options()
+                )
+        finally:
+            self._pending.pop(key, None)
+
+        self._cards[key] = card
+        self.size += len(card)
+        while self.size > self.max_bytes and len(self._cards) > 1:
+            _, oldest = self._cards.popitem(last=False)
+            self.size -= len(oldest)
+        return card
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 测试与开发脚本共用 scripts 中的模块导入工具与替身
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.joinpath("scripts")))
@@ -0,0 +1,106 @@
+"""
+反应任务池测试.
+"""
+import sys
+import types
+import asyncio
+import importlib
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+PATH_PACKAGE = Path(__file__).resolve().parents[2].joinpath(
+    "src/plugins/imaybeabu/plugins/react"
+)
+
+
+def load_module(name: str) -> types.ModuleType:
+    """
+    导入 react 的模块, 不执行插件的 __init__.
+    """
+    if "imaybeabu_react" not in sys.modules:
+        package = types.ModuleType("imaybeabu_react")
+        package.__path__ = [str(PATH_PACKAGE)]
+        sys.modules["imaybeabu_react"] = package
+    return importlib.import_module(f"imaybeabu_react.{name}")
+
+
+pool = load_module("pool")
+base = load_module("database.base")
+
+
+class RecordingDatabase(base.ReactDatabaseBase):
+    """
+    记录加载与卸载顺序的存储, 卸载需要一段时间才完成.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[Tuple[str, int]] = []
+
+    async def setup(self) -> None:
+        pass
+
+    async def load(self, guild_id: int):
+        self.events.append(("load", guild_id))
+        return {}
+
+    async def unload(self, guild_id: int) -> None:
+        self.events.append(("unload", guild_id))
+        await asyncio.sleep(0.01)
+        self.events.append(("unloaded", guild_id))
+
+    async def add(self, guild_id: int, user_id: int, emoji) -> None:
+        pass
+
+    async def remove(self, guild_id: int, user_id: int, emojis) -> None:
+        pass
+
+    async def clear(self, guild_id: int, user_id: int) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    """
+    可手动推进的单调时钟.
+    """
+    now = [0.0]
+    # 只替换任务池使用的时钟, 事件循环仍使用真实时钟
+    monkeypatch.setattr(pool, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_requested_idle_guild_is_not_unloaded(clock: List[float]) -> None:
+    async def run() -> List[Tuple[str, int]]:
+        database = RecordingDatabase()
+        tasks = pool.ReactTaskPool(database, idle_timeout=10, sweep_interval=0)
+        await tasks.get(1)
+        await tasks.get(2)
+        clock[0] = 100
+        await tasks.get(1)
+        await tasks.close()
+        return database.events
+
+    events = asyncio.run(run())
+    assert events.count(("load", 1)) == 1
+    assert ("unload", 1) not in events
+    assert ("unload", 2) in events
+
+
+def test_reload_waits_for_unload(clock: List[float]) -> None:
+    async def run() -> List[Tuple[str, int]]:
+        database = RecordingDatabase()
+        tasks = pool.ReactTaskPool(database, idle_timeout=10, sweep_interval=0)
+        await tasks.get(1)
+        clock[0] = 100
+        await tasks.get(2)
+        await tasks.get(1)
+        await tasks.close()
+        return database.events
+
+    events = asyncio.run(run())
+    assert events.index(("unloaded", 1)) < events.index(("load", 1), 1)
@@ -0,0 +1,262 @@
+"""
+猜曲数据库一致性测试.
+任何 PJSKGuessDatabaseBase 的实现都必须通过全部检查,
+内存实现 PJSKGuessDatabaseMemory 作为参考实现.
+设置 PJSK_GUESS_TEST_MONGO_URI 时额外对真实 MongoDB 运行.
+
+在仓库根目录运行:
+    python -m pytest tests
+"""
+import asyncio
+from typing import Awaitable, Callable, List
+
+import pytest
+
+from guess_fixture import BACKENDS, MONGO_URI, KEY, KEY_OTHER, GUILD, GUILD_OTHER
+from guess_fixture import DatabaseFactory, base, mongo_factory
+
+PERIODS = base.PERIODS
+SCORE_WEIGHTS = base.SCORE_WEIGHTS
+TOTAL_KEY = base.TOTAL_KEY
+get_default_stats = base.get_default_stats
+DatabaseBase = base.PJSKGuessDatabaseBase
+
+
+async def check_empty(database: DatabaseBase) -> None:
+    """
+    空排行榜没有数据, 用户没有排名.
+    """
+    assert await database.get_ranking_data(GUILD, KEY) == []
+    assert await database.get_user_rank(GUILD, 1, KEY) is None
+
+
+async def check_update(database: DatabaseBase) -> None:
+    """
+    每次更新使分数加一.
+    """
+    for _ in range(3):
+        await database.update(GUILD, 1, KEY)
+    assert await database.get_ranking_data(GUILD, KEY) == [
+        {"user_id": 1, KEY: 3}
+    ]
+    assert await database.get_user_rank(GUILD, 1, KEY) == (1, 3)
+
+
+async def check_ordering(database: DatabaseBase) -> None:
+    """
+    排行按分数降序, 同分时按用户ID升序.
+    """
+    scores = {5: 2, 3: 4, 4: 2, 1: 1, 2: 4}
+    for user_id, score in scores.items():
+        for _ in range(score):
+            await database.update(GUILD, user_id, KEY)
+
+    expected = [
+        {"user_id": user_id, KEY: score}
+        for user_id, score in sorted(
+            scores.items(),
+            key=lambda item: (-item[1], item[0])
+        )
+    ]
+    assert await database.get_ranking_data(GUILD, KEY) == expected
+    assert await database.get_ranking_data(GUILD, KEY, limit=2) == expected[:2]
+
+
+async def check_rank(database: DatabaseBase) -> None:
+    """
+    用户排名与完整排行中的位置一致.
+    """
+    for user_id in range(1, 41):
+        for _ in range(user_id % 7 + 1):
+            await database.update(GUILD, user_id, KEY)
+
+    data = await database.get_ranking_data(GUILD, KEY, limit=100)
+    assert len(data) == 40
+    for i, item in enumerate(data):
+        rank = await database.get_user_rank(GUILD, item["user_id"], KEY)
+        assert rank == (i + 1, item[KEY]), (item, rank)
+
+
+async def check_isolation(database: DatabaseBase) -> None:
+    """
+    不同群组和不同分数键的成绩互不影响.
+    """
+    await database.update(GUILD, 1, KEY)
+    await database.update(GUILD_OTHER, 1, KEY)
+    await database.update(GUILD_OTHER, 1, KEY)
+    await database.update(GUILD, 2, KEY_OTHER)
+
+    assert await database.get_ranking_data(GUILD, KEY) == [
+        {"user_id": 1, KEY: 1}
+    ]
+    assert await database.get_ranking_data(GUILD_OTHER, KEY) == [
+        {"user_id": 1, KEY: 2}
+    ]
+    assert await database.get_ranking_data(GUILD, KEY_OTHER) == [
+        {"user_id": 2, KEY_OTHER: 1}
+    ]
+    assert await database.get_user_rank(GUILD, 2, KEY) is None
+
+
+async def check_concurrent_updates(database: DatabaseBase) -> None:
+    """
+    并发更新不会丢失.
+    """
+    await asyncio.gather(
+        *(database.update(GUILD, user_id % 10, KEY) for user_id in range(500))
+    )
+    data = await database.get_ranking_data(GUILD, KEY)
+    assert sorted(item[KEY] for item in data) == [50] * 10
+
+
+async def check_generate_ranking(database: DatabaseBase) -> None:
+    """
+    排行榜信息包含每一行的成员名称与分数.
+    """
+    await database.update(GUILD, 7, KEY)
+    await database.update(GUILD, 7, KEY)
+    await database.update(GUILD, 8, KEY)
+    data = await database.get_ranking_data(GUILD, KEY)
+    lines = (await database.generate_ranking(GUILD, data, KEY)).split("\n")
+    assert len(lines) == 3
+    assert "user-7" in lines[1] and "2 次" in lines[1]
+    assert "user-8" in lines[2] and "1 次" in lines[2]
+
+
+async def check_periods(database: DatabaseBase) -> None:
+    """
+    周期排行与总排行同时更新, 且同样按群组和分数键隔离.
+    """
+    scores = {3: 2, 1: 3, 2: 2}
+    for user_id, score in scores.items():
+        for _ in range(score):
+            await database.update(GUILD, user_id, KEY)
+    await database.update(GUILD_OTHER, 1, KEY)
+    await database.update(GUILD, 4, KEY_OTHER)
+
+    expected = await database.get_ranking_data(GUILD, KEY)
+    assert expected == [
+        {"user_id": 1, KEY: 3},
+        {"user_id": 2, KEY: 2},
+        {"user_id": 3, KEY: 2},
+    ]
+    for period in PERIODS:
+        assert await database.get_ranking_data(GUILD, KEY, period=period) \
+            == expected, period
+        assert await database.get_ranking_data(
+            GUILD, KEY, limit=1, period=period
+        ) == expected[:1], period
+        assert await database.get_user_rank(GUILD, 3, KEY, period=period) \
+            == (3, 2), period
+        assert await database.get_user_rank(GUILD, 4, KEY, period=period) \
+            is None, period
+        assert await database.get_ranking_data(
+            GUILD_OTHER, KEY, period=period
+        ) == [{"user_id": 1, KEY: 1}], period
+
+
+async def check_total(database: DatabaseBase) -> None:
+    """
+    总排行按权重累计各分数键, 并随排行返回各分数键的分数.
+    """
+    key_weighted = "score_guess_jacket_hard"
+    updates = {1: [KEY, KEY, KEY_OTHER], 2: [key_weighted], 3: [KEY_OTHER]}
+    for user_id, keys in updates.items():
+        for key in keys:
+            await database.update(GUILD, user_id, key)
+
+    fields = [KEY, KEY_OTHER, key_weighted]
+    expected = sorted(
+        (
+            {
+                "user_id": user_id,
+                TOTAL_KEY: sum(SCORE_WEIGHTS.get(key, 1) for key in keys),
+                **{field: keys.count(field) for field in fields}
+            }
+            for user_id, keys in updates.items()
+        ),
+        key=lambda item: (-item[TOTAL_KEY], item["user_id"])
+    )
+    for period in (None, *PERIODS):
+        assert await database.get_ranking_data(
+            GUILD, TOTAL_KEY, period=period, fields=fields
+        ) == expected, period
+        assert await database.get_user_rank(
+            GUILD, 3, TOTAL_KEY, period=period
+        ) == (3, 1), period
+
+    lines = (await database.generate_total_ranking(
+        GUILD, expected, dict.fromkeys(fields, "")
+    )).split("\n")
+    assert len(lines) == 1 + 2 * len(expected)
+
+
+async def check_stats(database: DatabaseBase) -> None:
+    """
+    用户统计按发生顺序累计尝试次数, 连续猜中与最快用时.
+    """
+    assert await database.get_user_stats(GUILD, 1) == {}
+
+    await database.update(GUILD, 1, KEY, elapsed=12.5)
+    await database.update(GUILD, 1, KEY, elapsed=8.0)
+    await database.update(GUILD, 1, KEY)
+    await database.record_miss(GUILD, 1, KEY)
+    await database.update(GUILD, 1, KEY, elapsed=9.0)
+    await database.record_miss(GUILD, 1, KEY_OTHER)
+    await database.update(GUILD_OTHER, 1, KEY, elapsed=1.0)
+
+    assert await database.get_user_stats(GUILD, 1) == {
+        KEY: {
+            "score": 4,
+            "attempts": 5,
+            "streak": 1,
+            "best_streak": 3,
+            "fastest": 8.0
+        },
+        KEY_OTHER: {**get_default_stats(), "attempts": 1}
+    }
+    assert (await database.get_user_stats(GUILD_OTHER, 1))[KEY]["fastest"] == 1.0
+
+
+CHECKS: List[Callable[[DatabaseBase], Awaitable[None]]] = [
+    check_empty,
+    check_update,
+    check_ordering,
+    check_rank,
+    check_isolation,
+    check_concurrent_updates,
+    check_generate_ranking,
+    check_periods,
+    check_total,
+    check_stats,
+]
+
+
+@pytest.fixture(params=[*BACKENDS, "mongo"])
+def factory(request: pytest.FixtureRequest) -> DatabaseFactory:
+    """
+    各实现的空数据库工厂, 未设置 MongoDB URI 时跳过真实 MongoDB.
+    """
+    if request.param == "mongo":
+        if not MONGO_URI:
+            pytest.skip("未设置 PJSK_GUESS_TEST_MONGO_URI")
+        return mongo_factory(MONGO_URI, "PJSK-Guess-Test")
+    return BACKENDS[request.param]
+
+
+@pytest.mark.parametrize("check", CHECKS, ids=lambda check: check.__name__)
+def test_conformance(
+    factory: DatabaseFactory,
+    check: Callable[[DatabaseBase], Awaitable[None]]
+) -> None:
+    """
+    在新建的数据库上运行一项检查.
+    """
+    async def run() -> None:
+        database = await factory()
+        try:
+            await check(database)
+        finally:
+            await database.close()
+
+    asyncio.run(run())
@@ -0,0 +1,54 @@
+"""
+个人信息客户端测试.
+无法解析的个人信息视为获取失败, 返回 None 而不是抛出异常.
+"""
+import json
+import asyncio
+from typing import Dict, Optional
+
+import pytest
+
+from profile_fixture import generate_profile, load_module
+
+models = load_module("models")
+cache = load_module("cache")
+client = load_module("client")
+
+
+class FakeClient(client.PJSKProfileClient):
+    """
+    以固定内容代替上游请求的客户端.
+    """
+
+    def __init__(self, contents: Dict[str, bytes], **kwargs) -> None:
+        super().__init__([models.PJSKProfileCN("http://localhost")], **kwargs)
+        self.contents = contents
+
+    async def fetch(self, region: str, user_id: str) -> Optional[bytes]:
+        return self.contents.get(user_id)
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_unparsable_profile_is_none(cached: bool) -> None:
+    contents = {
+        "valid": json.dumps(generate_profile(cards=5, honors=5)).encode(),
+        "invalid": b"{\"user\": null}"
+    }
+
+    async def run():
+        profiles = FakeClient(
+            contents,
+            cache=cache.PJSKProfileCache() if cached else None
+        )
+        return await asyncio.gather(
+            profiles.get_profile("cn", "valid"),
+            profiles.get_profile("cn", "invalid"),
+            profiles.get_profile("cn", "missing"),
+            profiles.get_profile_auto("invalid")
+        )
+
+    valid, invalid, missing, auto = asyncio.run(run())
+    assert isinstance(valid, models.PJSKProfileCardContent)
+    assert invalid is None
+    assert missing is None
+    assert auto is None
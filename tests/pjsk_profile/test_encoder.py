@@ -0,0 +1,65 @@
+"""
+卡片输出编码测试.
+无损配置编码后再解码, 可见像素必须与原图完全相同.
+"""
+import random
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from profile_fixture import load_module
+
+encoder = load_module("encoder")
+
+
+def random_image(seed: int, mode: str, colors: int) -> Image.Image:
+    """
+    生成颜色数量有限的随机图片, 颜色彼此相近以覆盖近似匹配容易出错的情况.
+    RGBA 图片只包含全透明与不透明像素, 全透明像素的颜色随机.
+    """
+    rng = random.Random(seed)
+    base = [rng.randrange(256) for _ in range(3)]
+    palette = [
+        tuple(min(255, max(0, channel + rng.randint(-12, 12))) for channel in base)
+        for _ in range(colors)
+    ]
+    pixels = [rng.choice(palette) for _ in range(48 * 32)]
+    if mode == "RGBA":
+        pixels = [
+            (*pixel, 255) if rng.random() < 0.8
+            else (*(rng.randrange(256) for _ in range(3)), 0)
+            for pixel in pixels
+        ]
+    img = Image.new(mode, (48, 32))
+    img.putdata(pixels)
+    return img
+
+
+def visible(img: Image.Image) -> bytes:
+    """
+    将全透明像素的颜色统一, 只比较可见像素.
+    """
+    img = img.convert("RGBA")
+    flat = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    flat.paste(img, mask=img.getchannel("A"))
+    return flat.tobytes()
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA"])
+@pytest.mark.parametrize("seed", range(100))
+def test_palette_round_trip(mode: str, seed: int) -> None:
+    img = random_image(seed, mode, colors=random.Random(seed).randint(2, 255))
+    content = encoder.CardEncoder().encode(img)
+    with Image.open(BytesIO(content)) as decoded:
+        assert decoded.mode == "P"
+        assert visible(decoded) == visible(img)
+
+
+@pytest.mark.parametrize("format", ["PNG", "WEBP"])
+def test_lossless_without_palette(format: str) -> None:
+    img = random_image(0, "RGB", colors=1)
+    img.putdata([(i % 256, i // 256, 7) for i in range(48 * 32)])
+    content = encoder.CardEncoder(format).encode(img)
+    with Image.open(BytesIO(content)) as decoded:
+        assert decoded.convert("RGB").tobytes() == img.tobytes()
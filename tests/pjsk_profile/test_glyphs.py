@@ -0,0 +1,42 @@
+"""
+个人信息卡片字形绘制测试.
+以预先栅格化的字形绘制的卡片必须与 draw.text 绘制的卡片逐像素相同.
+"""
+import json
+import random
+from typing import Tuple
+
+import pytest
+from PIL import ImageChops
+
+from profile_fixture import generate_profile, load_module, prepare_assets, randomize
+
+card = load_module("card")
+models = load_module("models")
+
+Renderers = Tuple[card.PJSKProfileRenderer, card.PJSKProfileRenderer]
+
+
+@pytest.fixture(scope="module")
+def renderers(tmp_path_factory: pytest.TempPathFactory) -> Renderers:
+    """
+    共用资源的字形渲染器与 draw.text 渲染器.
+    """
+    paths = prepare_assets(
+        tmp_path_factory.mktemp("profile"),
+        generate_profile(cards=5, honors=5)
+    )
+    return (
+        card.PJSKProfileRenderer(**paths),
+        card.PJSKProfileRenderer(**paths, use_glyphs=False)
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_glyphs_pixel_identical(renderers: Renderers, seed: int) -> None:
+    glyphs, reference = renderers
+    data = randomize(generate_profile(cards=5, honors=5), random.Random(seed))
+    profile = models.PJSKProfileCardContent.from_json(json.dumps(data).encode())
+    expected = reference.render(profile)
+    actual = glyphs.render(profile)
+    assert ImageChops.difference(expected, actual).getbbox() is None